@@ -0,0 +1,15 @@
+"""
+URL configuration for requests served under ASGI
+
+The same routes as `LittleLemon.urls`, with the hot read endpoints of
+the API answered by the native async views of LittleLemonAPI. See
+ASGI_URLCONF in settings.
+"""
+from django.urls import path, include
+from LittleLemonAPI.urls import async_urlpatterns
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/", include(async_urlpatterns)),
+    *sync_urlpatterns,
+]
@@ -44,6 +44,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "LittleLemonAPI.async_views.NativeRoutesMiddleware",
+    "LittleLemonAPI.replicas.ReplicaMiddleware",
+    "LittleLemonAPI.query_budget.QueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -54,6 +57,10 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "LittleLemon.urls"
 
+# Requests served under ASGI resolve here, where the hot read
+# endpoints are the native async views
+ASGI_URLCONF = "LittleLemon.asgi_urls"
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -76,10 +83,44 @@ WSGI_APPLICATION = "LittleLemon.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite tuned for concurrent requests (WAL, pragmas, BEGIN IMMEDIATE),
+# with connections kept open between requests
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "LittleLemonAPI.sqlite",
         "NAME": BASE_DIR / "db.sqlite3",
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Read replicas for GET requests (see LittleLemonAPI.replicas). Locally,
+# SQLite copies of db.sqlite3 refreshed by `manage.py sync_replicas`
+# stand in for them; set LOCAL_REPLICAS to how many to use.
+LOCAL_REPLICAS = 0
+for number in range(1, LOCAL_REPLICAS + 1):
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "NAME": BASE_DIR / f"db.replica{number}.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["LittleLemonAPI.replicas.ReplicaRouter"]
+
+# Seconds a client reads from the primary after writing
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache shared by every worker process on the host. Cached roles, the
+# menu version and replica pins are invalidated through it, so a
+# per-process cache (LocMem) would leave other workers serving stale
+# permissions and validators. Point it at Redis or Memcached when
+# running on more than one host.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
     }
 }
 
@@ -120,6 +161,9 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Tests run against their own cache and throttle store
+TEST_RUNNER = "LittleLemonAPI.testing.TestRunner"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -135,23 +179,26 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
         "rest_framework.filters.SearchFilter",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "LittleLemonAPI.pagination.PageNumberPagination",
     "PAGE_SIZE": 5,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "LittleLemonAPI.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle"
+        "LittleLemonAPI.throttling.AnonRateThrottle",
+        "LittleLemonAPI.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "10/minute",
         "user": "20/minute"
     },
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "LittleLemonAPI.streaming.StreamingJSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
-        "rest_framework_xml.renderers.XMLRenderer",
+        "LittleLemonAPI.streaming.StreamingXMLRenderer",
     ]
 }
+
+# Token buckets shared by every worker process on the host
+THROTTLE_STORE_PATH = BASE_DIR / "throttle.sqlite3"
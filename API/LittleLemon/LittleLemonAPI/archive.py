@@ -0,0 +1,65 @@
+"""
+Little Lemon Order Archive
+
+Delivered orders are history: nobody pages through them, yet every
+list, count and index scan of the live Order and OrderItem tables
+pays for them. `archive_orders` moves delivered orders older than
+a number of days, with their items, into ArchivedOrder and
+ArchivedOrderItem, which have the same columns and keep the ids.
+
+Each batch is one transaction of a fixed number of statements: read
+the batch of orders and their items, insert them into the archive
+tables, delete them from the live ones. Batches stay short so
+checkouts are never blocked for long.
+
+The order detail endpoint falls back to the archive for an order
+that is no longer live. Order lists, exports and the event feed only
+cover live orders. The sales summaries already count archived orders
+and `rebuild_summaries` reads both.
+"""
+
+from datetime import date, timedelta
+from django.db import transaction
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+ORDER_FIELDS = ['id', 'user_id', 'delivery_crew_id', 'status', 'total', 'date']
+ITEM_FIELDS = ['id', 'order_id', 'menuitem_id', 'quantity', 'unit_price', 'price']
+
+
+def archivable_orders(days, today=None):
+    """ Delivered orders dated more than `days` days ago """
+    cutoff = (today or date.today()) - timedelta(days=days)
+    return Order.objects.filter(status=True, date__lt=cutoff)
+
+
+def archive_batch(orders, batch_size):
+    """
+    Moves up to `batch_size` of `orders` into the archive
+
+    Returns how many orders were moved.
+    """
+    with transaction.atomic():
+        rows = list(orders.select_for_update().order_by('id').values(*ORDER_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+        ArchivedOrder.objects.bulk_create([ArchivedOrder(**row) for row in rows])
+        ArchivedOrderItem.objects.bulk_create([
+            ArchivedOrderItem(**row)
+            for row in OrderItem.objects.filter(order_id__in=ids).values(*ITEM_FIELDS)
+        ])
+        Order.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_orders(days, batch_size=500, today=None):
+    """
+    Moves every archivable order in batches, returns how many moved
+    """
+    orders = archivable_orders(days, today)
+    moved = 0
+    while True:
+        count = archive_batch(orders, batch_size)
+        moved += count
+        if count < batch_size:
+            return moved
@@ -0,0 +1,385 @@
+"""
+Little Lemon Async Read Views
+
+Native async versions of the hot read endpoints. Under ASGI,
+`NativeRoutesMiddleware` resolves requests against ASGI_URLCONF,
+which mounts these views at the URLs of the synchronous DRF views,
+so the existing endpoints run on the event loop and use Django's
+async ORM instead of occupying a worker thread per request. WSGI
+deployments keep the DRF views.
+
+A native view serves plain JSON GETs with page number pagination:
+same serializers, same envelope, same token and session
+authentication, same throttles, the same menu cache and validators.
+Anything else (writes, `?pagination=cursor`, `?stream=`, other
+formats) is handed to its DRF view, so a URL behaves the same
+whichever way it is served. Cache and throttle store I/O blocks, and
+goes through the async cache API or `sync_to_async`.
+
+`OrderEventsView` has no synchronous twin: it pushes order changes
+from the `events` outbox as server-sent events or a long poll.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.db.models import Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .authentication import aget_token_user
+from .events import (
+    ORDER_EVENTS_KEEPALIVE, ORDER_EVENTS_LONG_POLL, ORDER_EVENTS_STREAM_TIMEOUT, ORDER_EVENTS_WSGI_LONG_POLL,
+    visible_events, wait_for_events,
+)
+from .menu_cache import (
+    MENU_CACHE_TIMEOUT, aget_menu_version, menu_cache_key, menu_etag, set_validators,
+)
+from .models import Category, MenuItem, Cart, Order, OrderEvent
+from .pagination import PageNumberPagination
+from .replicas import read_from_primary
+from .roles import MANAGER, DELIVERY_CREW, aget_roles
+from .search import MenuSearchFilter, has_fts_index
+from .serializers import CategorySerializer, MenuItemSerializer, CartSerializer, OrderSerializer, OrderEventSerializer
+from .serializers import category_rows, menu_item_rows, order_rows
+from . import views
+
+JSON = 'application/json'
+NATIVE_MEDIA_TYPES = {'', '*/*', 'application/*', JSON}
+SYNC_PARAMS = ('format', 'stream', 'cursor')
+EVENT_STREAM = 'text/event-stream'
+
+
+async def authenticate(request):
+    """
+    Token authentication with a session fallback, as configured for DRF
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if header and header[0].lower() == 'token':
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        return await aget_token_user(header[1])
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        # No session to load, skip the thread hop
+        return AnonymousUser()
+    return await sync_to_async(get_user)(request)
+
+
+def render(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), content_type=JSON, status=status)
+
+
+def error(exc):
+    response = render({'detail': exc.detail}, exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = 'Token'
+    if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+        response['Retry-After'] = str(int(exc.wait))
+    return response
+
+
+class AsyncReadView(View):
+    """
+    Base for async GET endpoints
+
+    Subclasses implement `async def get_data(request, user, **kwargs)`
+    returning the response payload. With a `sync_view` (the view
+    function of the DRF view at the same URL) every request the view
+    does not serve natively is handed to it.
+    """
+    authentication_required = False
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    sync_view = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Like the DRF views, which enforce CSRF for session
+        # authenticated writes themselves
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.sync_view is not None and not self.serves_natively(request):
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
+
+    def serves_natively(self, request):
+        """ Plain JSON GETs with page number pagination """
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        params = request.GET
+        if any(param in params for param in SYNC_PARAMS) or params.get('pagination') == 'cursor':
+            return False
+        accept = request.headers.get('Accept', '')
+        return {media.split(';')[0].strip() for media in accept.split(',')} <= NATIVE_MEDIA_TYPES
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user = await authenticate(request)
+            request.user = user
+            if self.authentication_required and not user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            # The throttle store does blocking SQLite I/O
+            await sync_to_async(self.check_throttles, thread_sensitive=False)(request)
+            return await self.respond(request, user, **kwargs)
+        except exceptions.APIException as exc:
+            return error(exc)
+
+    async def respond(self, request, user, **kwargs):
+        return render(await self.get_data(request, user, **kwargs))
+
+    def check_throttles(self, request):
+        """
+        Runs the DRF throttles, which only need `user` and `META`
+        """
+        throttle_request = SimpleNamespace(user=request.user, META=request.META)
+        waits = [
+            throttle.wait()
+            for throttle in (cls() for cls in self.throttle_classes)
+            if not throttle.allow_request(throttle_request, self)
+        ]
+        if waits:
+            waits = [wait for wait in waits if wait is not None]
+            raise exceptions.Throttled(max(waits, default=None))
+
+    async def paginate(self, request, queryset, serializer_class, row_serializer=None):
+        """
+        Page number pagination with the same envelope as the sync views
+
+        With a `row_serializer` the page is read as values() rows, as
+        `RowListMixin` does for the sync views.
+        """
+        fast = row_serializer is not None and getattr(settings, 'FAST_READ_SERIALIZERS', True)
+        if fast:
+            queryset = queryset.values(*row_serializer.values_fields)
+        paginator = PageNumberPagination()
+        page_size = paginator.page_size
+        if paginator.page_size_query_param in request.GET:
+            try:
+                page_size = min(int(request.GET[paginator.page_size_query_param]), paginator.max_page_size)
+            except ValueError:
+                pass
+            if page_size <= 0:
+                page_size = paginator.page_size
+
+        count = await queryset.acount()
+        pages = max(1, -(-count // page_size))
+        page = request.GET.get(paginator.page_query_param, 1)
+        try:
+            page = pages if page == 'last' else int(page)
+        except ValueError:
+            page = 0
+        if page < 1 or page > pages:
+            raise exceptions.NotFound('Invalid page.')
+
+        offset = (page - 1) * page_size
+        rows = [row async for row in queryset[offset:offset + page_size]]
+        url = request.build_absolute_uri()
+        previous = None
+        if page > 1:
+            previous = (remove_query_param(url, paginator.page_query_param) if page == 2
+                        else replace_query_param(url, paginator.page_query_param, page - 1))
+        return {
+            'count': count,
+            'next': replace_query_param(url, paginator.page_query_param, page + 1) if page < pages else None,
+            'previous': previous,
+            'results': row_serializer.many(rows) if fast else serializer_class(rows, many=True).data,
+        }
+
+
+class CachedMenuReadView(AsyncReadView):
+    """
+    Serves menu payloads through the versioned menu cache
+    """
+
+    async def respond(self, request, user, **kwargs):
+        version, last_modified = await aget_menu_version()
+        path = request.get_full_path()
+        etag = menu_etag(version, path, JSON)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            key = menu_cache_key(version, path)
+            data = await cache.aget(key)
+            if data is None:
+                with read_from_primary():
+                    data = await self.get_data(request, user, **kwargs)
+                await cache.aset(key, data, MENU_CACHE_TIMEOUT)
+            response = render(data)
+        return set_validators(response, etag, last_modified)
+
+
+class CategoriesView(CachedMenuReadView):
+    sync_view = staticmethod(views.CategoriesView.as_view())
+    query_budget = views.CategoriesView.query_budget
+
+    async def get_data(self, request, user):
+        return await self.paginate(request, Category.objects.all(), CategorySerializer, category_rows)
+
+
+class MenuItemsListView(CachedMenuReadView):
+    sync_view = staticmethod(views.MenuItemsListView.as_view())
+    query_budget = views.MenuItemsListView.query_budget
+    ordering_fields = ['price']
+    search_fields = ['title', 'category__title']
+
+    async def get_data(self, request, user):
+        queryset = MenuItemSerializer.setup_eager_loading(MenuItem.objects.all())
+        category = request.GET.get('category')
+        if category:
+            queryset = queryset.filter(category__title=category)
+
+        ordering = request.GET.get(api_settings.ORDERING_PARAM)
+        if ordering:
+            fields = [
+                field.strip() for field in ordering.split(',')
+                if field.strip().lstrip('-') in self.ordering_fields
+            ]
+            if fields:
+                queryset = queryset.order_by(*fields)
+
+        if request.GET.get(api_settings.SEARCH_PARAM):
+            alias = queryset.db
+            # Warm the per-process index check off the event loop
+            await sync_to_async(lambda: has_fts_index(connections[alias]))()
+            queryset = MenuSearchFilter().filter_queryset(
+                SimpleNamespace(query_params=request.GET), queryset, self
+            )
+        return await self.paginate(request, queryset, MenuItemSerializer, menu_item_rows)
+
+
+class MenuItemView(CachedMenuReadView):
+    sync_view = staticmethod(views.MenuItemView.as_view())
+    query_budget = views.MenuItemView.query_budget
+
+    async def get_data(self, request, user, pk):
+        queryset = MenuItemSerializer.setup_eager_loading(MenuItem.objects.all())
+        try:
+            item = await queryset.aget(pk=pk)
+        except MenuItem.DoesNotExist:
+            raise exceptions.NotFound()
+        return MenuItemSerializer(item).data
+
+
+class CartView(AsyncReadView):
+    sync_view = staticmethod(views.CartView.as_view())
+    authentication_required = True
+    query_budget = views.CartView.query_budget
+
+    async def get_data(self, request, user):
+        queryset = CartSerializer.setup_eager_loading(Cart.objects.filter(user=user))
+        return await self.paginate(request, queryset, CartSerializer)
+
+
+class OrdersView(AsyncReadView):
+    sync_view = staticmethod(views.OrdersView.as_view())
+    authentication_required = True
+    query_budget = views.OrdersView.query_budget
+
+    async def get_data(self, request, user):
+        roles = await aget_roles(user)
+        if MANAGER in roles:
+            queryset = Order.objects.all()
+        elif DELIVERY_CREW in roles:
+            queryset = Order.objects.filter(delivery_crew=user)
+        else:
+            queryset = Order.objects.filter(user=user)
+        return await self.paginate(request, queryset.order_by('-date', '-id'), OrderSerializer, order_rows)
+
+
+class OrderEventsView(AsyncReadView):
+    """
+    Changes to the orders the user may see, as they happen
+
+    With `Accept: text/event-stream` the response is a server-sent
+    event stream resuming after `Last-Event-ID`. Streams need ASGI:
+    under WSGI Django buffers an async iterator whole before sending
+    it, so those requests get the long poll instead. Otherwise it is a
+    long poll answering `{"events": [...], "last_id": n}` as soon as
+    there are events after `?after=`, or with no events after `?wait=`
+    seconds. Without either cursor only events from now on are sent.
+    Under WSGI the wait holds a worker thread, so it is capped at
+    ORDER_EVENTS_WSGI_LONG_POLL seconds there.
+    """
+    authentication_required = True
+    query_budget = {'GET': 4}
+
+    async def respond(self, request, user):
+        events = visible_events(user, await aget_roles(user))
+        after = await self.get_cursor(request)
+        asgi = isinstance(request, ASGIRequest)
+        if EVENT_STREAM in request.headers.get('Accept', '') and asgi:
+            response = StreamingHttpResponse(self.stream(events, after), content_type=EVENT_STREAM)
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        longest = ORDER_EVENTS_LONG_POLL if asgi else min(ORDER_EVENTS_WSGI_LONG_POLL, ORDER_EVENTS_LONG_POLL)
+        try:
+            wait = min(max(float(request.GET.get('wait', longest)), 0), longest)
+        except ValueError:
+            raise exceptions.ParseError('wait must be a number of seconds')
+        batch = await wait_for_events(events, after, wait)
+        return render({
+            'events': OrderEventSerializer(batch, many=True).data,
+            'last_id': batch[-1].id if batch else after,
+        })
+
+    async def get_cursor(self, request):
+        """ The id events are sent after, the latest one by default """
+        after = request.GET.get('after', request.headers.get('Last-Event-ID'))
+        if after is None:
+            return (await OrderEvent.objects.aaggregate(last=Max('id')))['last'] or 0
+        try:
+            return int(after)
+        except ValueError:
+            raise exceptions.ParseError('Invalid event id')
+
+    async def stream(self, events, after):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + ORDER_EVENTS_STREAM_TIMEOUT
+        # Seeds Last-Event-ID so a reconnect resumes here even if
+        # nothing was sent
+        yield f'retry: 1000\nid: {after}\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            batch = await wait_for_events(events, after, min(remaining, ORDER_EVENTS_KEEPALIVE))
+            if not batch:
+                yield ': keep-alive\n\n'
+                continue
+            for event in OrderEventSerializer(batch, many=True).data:
+                data = JSONRenderer().render(event).decode()
+                yield f'id: {event["id"]}\nevent: order\ndata: {data}\n\n'
+            after = batch[-1].id
+
+
+class NativeRoutesMiddleware:
+    """
+    Resolves ASGI requests against ASGI_URLCONF
+
+    There the hot read endpoints are mounted as the native views of
+    this module, at the same URLs as in ROOT_URLCONF.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.urlconf = getattr(settings, 'ASGI_URLCONF', None)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = self.urlconf
+        return self.get_response(request)
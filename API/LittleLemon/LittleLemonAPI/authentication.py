@@ -0,0 +1,200 @@
+"""
+Little Lemon Token Authentication
+
+DRF's TokenAuthentication resolves the Authorization header with a
+token-plus-user join before every view runs. CachedTokenAuthentication
+keeps recent resolutions in a bounded per-process LRU with a TTL. The
+user's roles come from the shared roles cache on every request, so a
+warm token costs no queries at all.
+
+Each user has a credentials version in the shared default cache. An
+entry records the version it was resolved under and is only used
+while that is still current. Deleting a token (e.g. djoser logout) or
+saving or deleting the user replaces the version once the change is
+committed (see `signals`), so every worker stops accepting the old
+resolution on its next request.
+"""
+
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from .roles import aget_cached_roles, get_cached_roles, remember_roles
+
+TOKEN_CACHE_TIMEOUT = getattr(settings, 'TOKEN_CACHE_TIMEOUT', 60)
+TOKEN_CACHE_SIZE = getattr(settings, 'TOKEN_CACHE_SIZE', 1024)
+
+
+def _version_key(user_id):
+    return f'littlelemon:credentials:{user_id}'
+
+
+def get_credentials_version(user_id):
+    """
+    The shared credentials version of a user, created on first use
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_credentials_version(user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, None)
+        version = await cache.aget(key)
+    return version
+
+
+def revoke_credentials(*user_ids):
+    """
+    Makes every worker re-resolve the tokens of the given users
+    """
+    cache.set_many({_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+    token_cache.discard_users(*user_ids)
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of token key -> [expires, user, credentials version]
+
+    Callers always get a copy of the cached user, with its cached roles
+    remembered, so per-request state set on it never leaks into the
+    next request.
+    """
+
+    def __init__(self, timeout=TOKEN_CACHE_TIMEOUT, maxsize=TOKEN_CACHE_SIZE):
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def accept(self, key, entry, version, roles):
+        _, user, resolved = entry
+        if version != resolved:
+            self.discard(key)
+            return None
+        user = copy.copy(user)
+        if roles is not None:
+            remember_roles(user, roles)
+        return user
+
+    def get(self, key):
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        user_id = entry[1].pk
+        return self.accept(key, entry, cache.get(_version_key(user_id)), get_cached_roles(user_id))
+
+    async def aget(self, key):
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        user_id = entry[1].pk
+        return self.accept(
+            key, entry, await cache.aget(_version_key(user_id)), await aget_cached_roles(user_id)
+        )
+
+    def store(self, key, user, version):
+        entry = [time.monotonic() + self.timeout, copy.copy(user), version]
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def set(self, key, user):
+        self.store(key, user, get_credentials_version(user.pk))
+
+    async def aset(self, key, user):
+        self.store(key, user, await aget_credentials_version(user.pk))
+
+    def discard(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def discard_users(self, *user_ids):
+        user_ids = set(user_ids)
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if entry[1].pk in user_ids]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def _check_user(token):
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return token.user
+
+
+def get_token_user(key):
+    """
+    The active user owning a token key, from the cache if possible
+    """
+    user = token_cache.get(key)
+    if user is None:
+        try:
+            # Read from the primary, see `replicas`
+            token = Token.objects.using(DEFAULT_DB_ALIAS).select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        user = _check_user(token)
+        token_cache.set(key, user)
+    return user
+
+
+async def aget_token_user(key):
+    """
+    Async counterpart of `get_token_user` for the native async views
+    """
+    user = await token_cache.aget(key)
+    if user is None:
+        try:
+            token = await Token.objects.using(DEFAULT_DB_ALIAS).select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        user = _check_user(token)
+        await token_cache.aset(key, user)
+    return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication backed by the token cache
+
+    `request.auth` is the token key rather than the Token instance,
+    which would need the query this class exists to avoid.
+    """
+
+    def authenticate_credentials(self, key):
+        return (get_token_user(key), key)
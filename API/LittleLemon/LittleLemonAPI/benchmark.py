@@ -0,0 +1,691 @@
+"""
+Little Lemon Benchmark Runner
+
+Drives every route of `LittleLemonAPI.urls` in-process through the
+Django test client and records latency percentiles, throughput and
+SQL query counts per route. Used by the `benchmark_api` management
+command against a database filled by `seed_littlelemon`.
+
+Each scenario names the URL pattern it covers, the actor making the
+request and, optionally, an untimed `prepare` step that puts the
+data in the state the request needs (e.g. a full cart before
+checkout). Throttle rates are lifted for the duration of a run so
+the limiter is measured but never trips.
+"""
+
+import asyncio
+import itertools
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Optional
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User, Group
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.throttling import SimpleRateThrottle
+from .archive import archive_batch
+from .models import Category, MenuItem, Cart, Order
+from .serializers import (
+    CategorySerializer, MenuItemSerializer, OrderSerializer, category_rows, menu_item_rows, order_rows,
+)
+from .roles import MANAGER, DELIVERY_CREW
+from . import urls
+
+UNTHROTTLED_RATES = {'anon': '1000000/second', 'user': '1000000/second'}
+
+
+def percentile(samples, pct):
+    """ Nearest-rank percentile of a list of numbers """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(durations, query_counts, errors):
+    """ Reduces the raw samples of one scenario to its report """
+    total = sum(durations)
+    return {
+        'requests': len(durations),
+        'errors': errors,
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 95) * 1000, 3),
+        'p99_ms': round(percentile(durations, 99) * 1000, 3),
+        'mean_ms': round(total / len(durations) * 1000, 3),
+        'throughput_rps': round(len(durations) / total, 1) if total else None,
+        'queries_mean': round(sum(query_counts) / len(query_counts), 2),
+        'queries_max': max(query_counts),
+    }
+
+
+@dataclass
+class Actors:
+    """ The users scenarios make their requests as """
+    manager: User
+    crew: User
+    customer: User
+    tokens: dict = field(default_factory=dict)
+
+    @classmethod
+    def load(cls):
+        def first(**lookup):
+            user = User.objects.filter(**lookup).order_by('id').first()
+            if user is None:
+                raise LookupError(f'No user matching {lookup}; run seed_littlelemon first')
+            return user
+
+        manager = first(groups__name=MANAGER)
+        crew = first(groups__name=DELIVERY_CREW)
+        customer = first(order__isnull=False, groups__isnull=True)
+        actors = cls(manager, crew, customer)
+        for user in (manager, crew, customer):
+            actors.tokens[user.pk] = Token.objects.get_or_create(user=user)[0].key
+        return actors
+
+    def headers(self, user):
+        if user is None:
+            return {}
+        return {'HTTP_AUTHORIZATION': f'Token {self.tokens[user.pk]}'}
+
+
+@dataclass
+class Scenario:
+    """
+    One timed request shape
+
+    `path` and `payload` may be callables taking the Context so they
+    can refer to seeded rows; `prepare` runs untimed before each
+    request and may store extra values in the context. `asgi`
+    scenarios go through the ASGI handler, where the hot read
+    endpoints are served by the native async views.
+    """
+    name: str
+    pattern: str
+    method: str
+    actor: Optional[str]
+    path: object
+    payload: object = None
+    prepare: Optional[Callable] = None
+    expect: tuple = (200,)
+    asgi: bool = False
+
+
+class Context(dict):
+    """ Attribute access to values scenarios share """
+    __getattr__ = dict.__getitem__
+
+
+def build_context(actors):
+    order = Order.objects.filter(user=actors.customer).order_by('-id').first()
+    crew_order = Order.objects.filter(delivery_crew=actors.crew).order_by('-id').first()
+    return Context(
+        actors=actors,
+        category=Category.objects.order_by('id').first(),
+        menuitem=MenuItem.objects.order_by('id').first(),
+        menuitems=list(MenuItem.objects.order_by('id').values_list('id', flat=True)[:10]),
+        order=order,
+        crew_order=crew_order or order,
+        counter=0,
+    )
+
+
+def fill_cart(ctx):
+    Cart.objects.filter(user=ctx.actors.customer).delete()
+    items = MenuItem.objects.filter(pk__in=ctx.menuitems)
+    Cart.objects.bulk_create(
+        Cart(user=ctx.actors.customer, menuitem=item, quantity=2,
+             unit_price=item.price, price=item.price * 2)
+        for item in items
+    )
+
+
+def empty_cart(ctx):
+    Cart.objects.filter(user=ctx.actors.customer).delete()
+
+
+def new_menuitem(ctx):
+    ctx['scratch_item'] = MenuItem.objects.create(
+        title='Benchmark Special', price=Decimal('9.99'), featured=False,
+        category=ctx.category,
+    )
+
+
+def next_id(ctx):
+    ctx['counter'] += 1
+    return ctx.counter
+
+
+def unassign_orders(ctx):
+    keep = [ctx.order.pk, ctx.crew_order.pk]
+    orders = Order.objects.exclude(pk__in=keep).order_by('id').values_list('pk', flat=True)[:10]
+    Order.objects.filter(pk__in=list(orders)).update(delivery_crew=None, status=False)
+
+
+def archive_an_order(ctx):
+    if 'archived_order' in ctx:
+        return
+    keep = [ctx.order.pk, ctx.crew_order.pk]
+    order = Order.objects.filter(user=ctx.actors.customer).exclude(pk__in=keep).order_by('id').first()
+    Order.objects.filter(pk=order.pk).update(status=True)
+    archive_batch(Order.objects.filter(pk=order.pk), 1)
+    ctx['archived_order'] = order
+
+
+def remove_from_group(group):
+    def prepare(ctx):
+        ctx.actors.customer.groups.remove(*ctx.actors.customer.groups.filter(name=group))
+    return prepare
+
+
+def add_to_group(group):
+    def prepare(ctx):
+        Group.objects.get(name=group).user_set.add(ctx.actors.customer)
+    return prepare
+
+
+SCENARIOS = [
+    Scenario('categories.list', 'menu-categories', 'get', None, '/api/menu-categories'),
+    Scenario('categories.create', 'menu-categories', 'post', 'manager', '/api/menu-categories',
+             payload=lambda ctx: {'title': f'Bench {next_id(ctx)}', 'slug': f'bench-{ctx.counter}'},
+             expect=(201,)),
+    Scenario('menu-items.list', 'menu-items', 'get', None, '/api/menu-items'),
+    Scenario('menu-items.search', 'menu-items', 'get', None, '/api/menu-items?search=lem'),
+    Scenario('menu-items.cursor', 'menu-items', 'get', None,
+             '/api/menu-items?pagination=cursor&ordering=price'),
+    Scenario('menu-items.create', 'menu-items', 'post', 'manager', '/api/menu-items',
+             payload=lambda ctx: {'title': f'Bench {next_id(ctx)}', 'price': '5.00',
+                                  'featured': False, 'category_id': ctx.category.pk},
+             expect=(201,)),
+    Scenario('menu-items.detail', 'menu-items/<int:pk>', 'get', None,
+             lambda ctx: f'/api/menu-items/{ctx.menuitem.pk}'),
+    Scenario('menu-items.update', 'menu-items/<int:pk>', 'patch', 'manager',
+             lambda ctx: f'/api/menu-items/{ctx.menuitem.pk}',
+             payload=lambda ctx: {'featured': bool(next_id(ctx) % 2)}),
+    Scenario('menu-items.delete', 'menu-items/<int:pk>', 'delete', 'manager',
+             lambda ctx: f'/api/menu-items/{ctx.scratch_item.pk}',
+             prepare=new_menuitem, expect=(204,)),
+    Scenario('cart.list', 'cart/menu-items', 'get', 'customer', '/api/cart/menu-items',
+             prepare=fill_cart),
+    Scenario('cart.add', 'cart/menu-items', 'post', 'customer', '/api/cart/menu-items',
+             payload=lambda ctx: {'menuitem': ctx.menuitem.pk, 'quantity': 2},
+             prepare=empty_cart, expect=(201,)),
+    Scenario('cart.add-batch', 'cart/menu-items', 'post', 'customer', '/api/cart/menu-items',
+             payload=lambda ctx: [{'menuitem': pk, 'quantity': 1} for pk in ctx.menuitems],
+             expect=(201,)),
+    Scenario('cart.empty', 'cart/menu-items', 'delete', 'customer', '/api/cart/menu-items',
+             prepare=fill_cart, expect=(204,)),
+    Scenario('cart.detail', 'cart/menu-items/<int:pk>', 'get', 'customer',
+             lambda ctx: f'/api/cart/menu-items/{ctx.menuitem.pk}', prepare=fill_cart),
+    Scenario('orders.list.manager', 'orders', 'get', 'manager', '/api/orders'),
+    Scenario('orders.list.crew', 'orders', 'get', 'crew', '/api/orders'),
+    Scenario('orders.list.customer', 'orders', 'get', 'customer', '/api/orders'),
+    Scenario('orders.list.cursor', 'orders', 'get', 'manager', '/api/orders?pagination=cursor'),
+    Scenario('orders.checkout', 'orders', 'post', 'customer', '/api/orders',
+             prepare=fill_cart, expect=(201,)),
+    Scenario('orders.detail', 'orders/<int:pk>', 'get', 'customer',
+             lambda ctx: f'/api/orders/{ctx.order.pk}'),
+    Scenario('orders.detail.archived', 'orders/<int:pk>', 'get', 'customer',
+             lambda ctx: f'/api/orders/{ctx.archived_order.pk}', prepare=archive_an_order),
+    Scenario('orders.assign', 'orders/<int:pk>', 'patch', 'manager',
+             lambda ctx: f'/api/orders/{ctx.order.pk}',
+             payload=lambda ctx: {'delivery_crew': ctx.actors.crew.username}),
+    Scenario('orders.status', 'orders/<int:pk>', 'patch', 'crew',
+             lambda ctx: f'/api/orders/{ctx.crew_order.pk}',
+             payload=lambda ctx: {'status': next_id(ctx) % 2}),
+    Scenario('orders.export.csv', 'orders/export.<str:fmt>', 'get', 'manager',
+             '/api/orders/export.csv'),
+    Scenario('orders.export.ndjson', 'orders/export.<str:fmt>', 'get', 'manager',
+             '/api/orders/export.ndjson'),
+    Scenario('orders.dispatch', 'orders/dispatch', 'post', 'manager', '/api/orders/dispatch',
+             payload={'limit': 10}, prepare=unassign_orders),
+    Scenario('orders.events.customer', 'orders/events', 'get', 'customer',
+             '/api/orders/events?after=0&wait=0'),
+    Scenario('orders.events.crew', 'orders/events', 'get', 'crew', '/api/orders/events?wait=0'),
+    Scenario('managers.list', 'groups/manager/users', 'get', 'manager', '/api/groups/manager/users'),
+    Scenario('managers.add', 'groups/manager/users', 'post', 'manager', '/api/groups/manager/users',
+             payload=lambda ctx: {'username': ctx.actors.customer.username},
+             prepare=remove_from_group(MANAGER), expect=(201,)),
+    Scenario('managers.remove', 'groups/manager/users/<int:pk>', 'delete', 'manager',
+             lambda ctx: f'/api/groups/manager/users/{ctx.actors.customer.pk}',
+             prepare=add_to_group(MANAGER), expect=(204,)),
+    Scenario('crew.list', 'groups/delivery-crew/users', 'get', 'manager',
+             '/api/groups/delivery-crew/users'),
+    Scenario('crew.add', 'groups/delivery-crew/users', 'post', 'manager',
+             '/api/groups/delivery-crew/users',
+             payload=lambda ctx: {'username': ctx.actors.customer.username},
+             prepare=remove_from_group(DELIVERY_CREW), expect=(201,)),
+    Scenario('crew.add-batch', 'groups/delivery-crew/users', 'post', 'manager',
+             '/api/groups/delivery-crew/users',
+             payload=lambda ctx: {'usernames': [ctx.actors.customer.username, 'nobody']},
+             prepare=remove_from_group(DELIVERY_CREW)),
+    Scenario('crew.remove-batch', 'groups/delivery-crew/users', 'delete', 'manager',
+             '/api/groups/delivery-crew/users',
+             payload=lambda ctx: {'usernames': [ctx.actors.customer.username, 'nobody']},
+             prepare=add_to_group(DELIVERY_CREW)),
+    Scenario('crew.remove', 'groups/delivery-crew/users/<int:pk>', 'delete', 'manager',
+             lambda ctx: f'/api/groups/delivery-crew/users/{ctx.actors.customer.pk}',
+             prepare=add_to_group(DELIVERY_CREW), expect=(204,)),
+    Scenario('reports.daily-sales', 'reports/daily-sales', 'get', 'manager',
+             '/api/reports/daily-sales'),
+    Scenario('reports.delivery-crew', 'reports/delivery-crew', 'get', 'manager',
+             '/api/reports/delivery-crew'),
+    Scenario('reports.top-items', 'reports/top-items', 'get', 'manager', '/api/reports/top-items'),
+    Scenario('asgi.categories.list', 'menu-categories', 'get', None, '/api/menu-categories',
+             asgi=True),
+    Scenario('asgi.menu-items.list', 'menu-items', 'get', None, '/api/menu-items', asgi=True),
+    Scenario('asgi.menu-items.search', 'menu-items', 'get', None,
+             '/api/menu-items?search=lem&ordering=-price', asgi=True),
+    Scenario('asgi.menu-items.detail', 'menu-items/<int:pk>', 'get', None,
+             lambda ctx: f'/api/menu-items/{ctx.menuitem.pk}', asgi=True),
+    Scenario('asgi.cart.list', 'cart/menu-items', 'get', 'customer', '/api/cart/menu-items',
+             prepare=fill_cart, asgi=True),
+    Scenario('asgi.orders.list.manager', 'orders', 'get', 'manager', '/api/orders', asgi=True),
+    Scenario('asgi.orders.list.customer', 'orders', 'get', 'customer', '/api/orders', asgi=True),
+]
+
+
+def uncovered_patterns(scenarios):
+    """ URL patterns of LittleLemonAPI.urls no scenario exercises """
+    covered = {scenario.pattern for scenario in scenarios}
+    return sorted(str(p.pattern) for p in urls.urlpatterns if str(p.pattern) not in covered)
+
+
+class Runner:
+    """ Runs scenarios and collects a machine readable report """
+
+    def __init__(self, requests=200, warmup=10, scenarios=SCENARIOS, client=None):
+        self.requests = requests
+        self.warmup = warmup
+        self.scenarios = scenarios
+        self.client = client or Client()
+        self.async_client = AsyncClient()
+
+    def run(self):
+        actors = Actors.load()
+        ctx = build_context(actors)
+        report = {}
+        with mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, UNTHROTTLED_RATES):
+            for scenario in self.scenarios:
+                report[scenario.name] = self.run_scenario(scenario, ctx)
+        return {
+            'meta': {
+                'vendor': connection.vendor,
+                'requests_per_route': self.requests,
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'uncovered_patterns': uncovered_patterns(self.scenarios),
+            },
+            'routes': report,
+        }
+
+    def run_scenario(self, scenario, ctx):
+        durations, query_counts, errors = [], [], 0
+        for i in range(self.warmup + self.requests):
+            if scenario.prepare:
+                scenario.prepare(ctx)
+            response, elapsed, queries = self.request(scenario, ctx)
+            if i < self.warmup:
+                continue
+            durations.append(elapsed)
+            query_counts.append(queries)
+            if response.status_code not in scenario.expect:
+                errors += 1
+        result = summarize(durations, query_counts, errors)
+        result.update(method=scenario.method.upper(), pattern=scenario.pattern)
+        return result
+
+    def request(self, scenario, ctx):
+        resolve = lambda value: value(ctx) if callable(value) else value
+        path = resolve(scenario.path)
+        payload = resolve(scenario.payload)
+        actor = getattr(ctx.actors, scenario.actor) if scenario.actor else None
+        kwargs = dict(ctx.actors.headers(actor))
+        if payload is not None:
+            kwargs.update(data=json.dumps(payload), content_type='application/json')
+        send = getattr(self.client, scenario.method)
+        if scenario.asgi:
+            kwargs = {key: value for key, value in kwargs.items() if not key.startswith('HTTP_')}
+            kwargs['headers'] = asgi_headers(ctx.actors.headers(actor))
+            send = async_to_sync(getattr(self.async_client, scenario.method))
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = send(path, **kwargs)
+            if response.streaming:
+                read_body(response)
+            elapsed = time.perf_counter() - start
+        return response, elapsed, len(queries)
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Compares a report against a baseline report
+
+    Returns (rows, regressions): one row per route present in both,
+    and the names of routes whose p95 grew by more than `tolerance`
+    or whose mean query count went up.
+    """
+    rows, regressions = [], []
+    for name, current in report['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if before is None:
+            continue
+        p95_change = (current['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0
+        queries_change = current['queries_mean'] - before['queries_mean']
+        rows.append((name, before['p95_ms'], current['p95_ms'], p95_change,
+                     before['queries_mean'], current['queries_mean']))
+        if p95_change > tolerance or queries_change > 0:
+            regressions.append(name)
+    return rows, regressions
+
+
+def concurrency_report(durations, errors, elapsed):
+    """ Latency percentiles and wall clock throughput of a concurrent run """
+    return {
+        'requests': len(durations),
+        'errors': errors,
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 95) * 1000, 3),
+        'throughput_rps': round(len(durations) / elapsed, 1),
+    }
+
+
+def run_threaded(path, headers, concurrency, requests):
+    """
+    Sends `requests` GETs through the WSGI handler from a thread pool
+    """
+    tickets = itertools.count()
+    lock = threading.Lock()
+    durations, errors = [], []
+
+    def worker():
+        client = Client()
+        try:
+            while next(tickets) < requests:
+                start = time.perf_counter()
+                response = client.get(path, **headers)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    durations.append(elapsed)
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+        finally:
+            connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return concurrency_report(durations, len(errors), time.perf_counter() - start)
+
+
+def read_body(response):
+    """
+    Reads a streamed body, so the time and queries spent producing it
+    are measured with the request
+    """
+    if response.is_async:
+        async def read():
+            return b''.join([chunk async for chunk in response.streaming_content])
+        return async_to_sync(read)()
+    return b''.join(response.streaming_content)
+
+
+def asgi_headers(extra):
+    """ Test client HTTP_* keys as the header names AsyncClient takes """
+    return {
+        key[5:].replace('_', '-').title(): value for key, value in extra.items() if key.startswith('HTTP_')
+    }
+
+
+async def run_async(path, headers, concurrency, requests):
+    """
+    Sends `requests` GETs through the ASGI handler from concurrent tasks
+    """
+    tickets = itertools.count()
+    client = AsyncClient()
+    headers = asgi_headers(headers)
+    durations, errors = [], []
+
+    async def worker():
+        while next(tickets) < requests:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            durations.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return concurrency_report(durations, len(errors), time.perf_counter() - start)
+
+
+ASYNC_ENDPOINTS = [
+    ('menu-categories', None),
+    ('menu-items', None),
+    ('menu-items/{menuitem}', None),
+    ('cart/menu-items', 'customer'),
+    ('orders', 'customer'),
+]
+
+
+def compare_sync_async(concurrency_levels, requests):
+    """
+    Throughput of each hot read endpoint, sync (WSGI) vs async (ASGI)
+
+    The same endpoint is driven at every concurrency level through
+    the WSGI handler, where the sync DRF view runs on a thread pool,
+    and through the ASGI handler, where its native async view runs on
+    the event loop.
+    """
+    actors = Actors.load()
+    ctx = build_context(actors)
+    fill_cart(ctx)
+    report = {}
+    with mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, UNTHROTTLED_RATES):
+        for template, actor in ASYNC_ENDPOINTS:
+            path = template.format(menuitem=ctx.menuitem.pk)
+            headers = actors.headers(getattr(actors, actor) if actor else None)
+            for level in concurrency_levels:
+                report[f'{path}@{level}'] = {
+                    'sync_wsgi': run_threaded(f'/api/{path}', headers, level, requests),
+                    'async_asgi': asyncio.run(
+                        run_async(f'/api/{path}', headers, level, requests)
+                    ),
+                }
+    return report
+
+
+def time_best(func, repeat):
+    """ Fastest of `repeat` timed calls, in seconds """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare_serializers(rows=1000, repeat=10):
+    """
+    Model serializers vs compiled row serializers, per thousand rows
+
+    `serialize` times turning already fetched rows into output dicts;
+    `fetch_and_serialize` includes the query, building instances for
+    the model serializer and values() dicts for the row serializer.
+    """
+    cases = [
+        ('category', CategorySerializer, category_rows, Category.objects.order_by('id')),
+        ('menu-item', MenuItemSerializer, menu_item_rows, MenuItem.objects.order_by('id')),
+        ('order', OrderSerializer, order_rows, Order.objects.order_by('id')),
+    ]
+    report = {}
+    for name, serializer, row_serializer, queryset in cases:
+        instances = serializer.setup_eager_loading(queryset) if hasattr(serializer, 'setup_eager_loading') else queryset
+        instances = instances[:rows]
+        values = queryset.values(*row_serializer.values_fields)[:rows]
+        count = len(values)
+        if not count:
+            raise LookupError(f'No {name} rows to serialize, run seed_littlelemon first')
+        fetched_instances, fetched_values = list(instances), list(values)
+        per_thousand = lambda seconds: round(seconds * 1000 * 1000 / count, 3)
+        model = {
+            'serialize': time_best(lambda: serializer(fetched_instances, many=True).data, repeat),
+            'fetch_and_serialize': time_best(lambda: serializer(list(instances.all()), many=True).data, repeat),
+        }
+        compiled = {
+            'serialize': time_best(lambda: row_serializer.many(fetched_values), repeat),
+            'fetch_and_serialize': time_best(lambda: row_serializer.many(list(values.all())), repeat),
+        }
+        report[name] = {
+            'rows': count,
+            **{
+                f'{stage}_ms_per_1k': {
+                    'model_serializer': per_thousand(model[stage]),
+                    'row_serializer': per_thousand(compiled[stage]),
+                    'speedup': round(model[stage] / compiled[stage], 1),
+                }
+                for stage in model
+            },
+        }
+    return report
+
+
+DATABASE_PROFILES = {
+    # What Django ships with: rollback journal, one connection per request
+    'stock': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}, 'CONN_MAX_AGE': 0},
+    # `LittleLemonAPI.sqlite` with persistent connections, as in settings
+    'tuned': {'ENGINE': 'LittleLemonAPI.sqlite', 'OPTIONS': {}, 'CONN_MAX_AGE': 600},
+}
+
+JSON_CONTENT = 'application/json'
+
+# One customer's loop: browse, look at their orders, add to the cart, check out
+MIXED_WORKLOAD = [
+    ('menu.read', 200, lambda client, headers, item: client.get('/api/menu-items?page=2', **headers)),
+    ('orders.read', 200, lambda client, headers, item: client.get('/api/orders', **headers)),
+    ('cart.write', 201, lambda client, headers, item: client.post(
+        '/api/cart/menu-items', json.dumps({'menuitem': item, 'quantity': 1}),
+        content_type=JSON_CONTENT, **headers)),
+    ('menu.read', 200, lambda client, headers, item: client.get('/api/menu-categories', **headers)),
+    ('checkout.write', 201, lambda client, headers, item: client.post('/api/orders', **headers)),
+]
+
+
+@contextmanager
+def database_profile(name, alias=DEFAULT_DB_ALIAS):
+    """
+    Points `alias` at one of DATABASE_PROFILES inside the block
+
+    Connections are per thread, so threads started inside the block
+    open theirs with the profile's backend and CONN_MAX_AGE. Every
+    profile starts from the rollback journal a new database file has,
+    since WAL mode is stored in the file.
+    """
+    settings_dict = connections.settings[alias]
+    saved = {key: settings_dict[key] for key in DATABASE_PROFILES[name]}
+
+    def switch(values):
+        connections[alias].close()
+        in_memory = connections[alias].is_in_memory_db()
+        del connections[alias]
+        settings_dict.update(values)
+        if not in_memory:
+            with closing(sqlite3.connect(settings_dict['NAME'])) as db:
+                db.execute('PRAGMA journal_mode = DELETE')
+
+    switch(DATABASE_PROFILES[name])
+    try:
+        yield
+    finally:
+        connections.close_all()
+        switch(saved)
+
+
+def run_mixed(headers, menuitems, requests):
+    """
+    Sends `requests` MIXED_WORKLOAD requests, one thread per customer
+
+    Each thread walks the workload in order as its own customer, so
+    cart writes and checkouts from different threads contend for the
+    database while the others read.
+    """
+    tickets = itertools.count()
+    lock = threading.Lock()
+    durations, errors = defaultdict(list), Counter()
+
+    def worker(customer_headers):
+        client = Client(raise_request_exception=False)
+        try:
+            for step in itertools.count():
+                if next(tickets) >= requests:
+                    break
+                name, expect, send = MIXED_WORKLOAD[step % len(MIXED_WORKLOAD)]
+                start = time.perf_counter()
+                response = send(client, customer_headers, menuitems[step % len(menuitems)])
+                elapsed = time.perf_counter() - start
+                # What request_finished does under a WSGI server; the
+                # test client leaves connections open
+                close_old_connections()
+                with lock:
+                    durations[name].append(elapsed)
+                    if response.status_code != expect:
+                        errors[name] += 1
+        finally:
+            connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(len(headers)) as pool:
+        for future in [pool.submit(worker, customer_headers) for customer_headers in headers]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    return {
+        'overall': concurrency_report(
+            [duration for samples in durations.values() for duration in samples],
+            sum(errors.values()), elapsed,
+        ),
+        'operations': {
+            name: concurrency_report(samples, errors[name], elapsed)
+            for name, samples in sorted(durations.items())
+        },
+    }
+
+
+def compare_database_profiles(workers, requests, profiles=tuple(DATABASE_PROFILES)):
+    """
+    Mixed read/write throughput of the default database per profile
+
+    `workers` customers run MIXED_WORKLOAD concurrently against the
+    same database file under each profile in turn.
+    """
+    customers = list(
+        User.objects.filter(groups__isnull=True, is_staff=False).order_by('id')[:workers]
+    )
+    if len(customers) < workers:
+        raise LookupError(f'Need {workers} customers, found {len(customers)}; seed more users')
+    headers = [
+        {'HTTP_AUTHORIZATION': f'Token {Token.objects.get_or_create(user=user)[0].key}'}
+        for user in customers
+    ]
+    menuitems = list(MenuItem.objects.order_by('id').values_list('id', flat=True)[:10])
+    if not menuitems:
+        raise LookupError('No menu items, run seed_littlelemon first')
+
+    report = {}
+    with mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, UNTHROTTLED_RATES):
+        for name in profiles:
+            Cart.objects.filter(user__in=customers).delete()
+            with database_profile(name):
+                report[name] = run_mixed(headers, menuitems, requests)
+    return report
@@ -0,0 +1,69 @@
+"""
+Little Lemon Delivery Dispatch
+
+Spreads a batch of unassigned orders over the Delivery Crew group.
+Each crew member's current load is their number of open (assigned,
+not yet delivered) orders, read from the CrewDeliveryStats summary
+in one query. Orders then go one at a time to whoever is least
+loaded at that moment, using a heap, so a batch evens out an
+uneven crew before it adds to anyone already busy.
+
+The whole batch is written with a single UPDATE whose CASE picks
+each order's crew member.
+"""
+
+import heapq
+from collections import Counter
+from django.contrib.auth.models import User
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+from .models import Order
+from .reporting import record_assignments
+from .roles import DELIVERY_CREW
+
+
+def crew_loads():
+    """
+    [(open orders, user id)] for every Delivery Crew member
+    """
+    return list(
+        User.objects.filter(groups__name=DELIVERY_CREW)
+        .annotate(open=Coalesce(F('delivery_stats__assigned') - F('delivery_stats__delivered'), 0))
+        .values_list('open', 'pk')
+    )
+
+
+def assign_least_loaded(order_ids, loads):
+    """
+    Maps each order id to the crew member with the fewest open orders
+
+    Ties go to the lower user id so a batch is assigned the same way
+    every time.
+    """
+    heap = list(loads)
+    heapq.heapify(heap)
+    assignments = {}
+    for order_id in order_ids:
+        load, crew_id = heap[0]
+        assignments[order_id] = crew_id
+        heapq.heapreplace(heap, (load + 1, crew_id))
+    return assignments
+
+
+def apply_assignments(assignments):
+    """
+    Writes {order id: crew id} in one UPDATE and updates the crew stats
+
+    Only orders that are still unassigned are touched. Returns how
+    many were updated; the caller should roll back if that is short.
+    """
+    if not assignments:
+        return 0
+    updated = Order.objects.filter(pk__in=list(assignments), delivery_crew__isnull=True).update(
+        delivery_crew=Case(
+            *[When(pk=order_id, then=Value(crew_id)) for order_id, crew_id in assignments.items()],
+            output_field=IntegerField(),
+        )
+    )
+    record_assignments(Counter(assignments.values()))
+    return updated
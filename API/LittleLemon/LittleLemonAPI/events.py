@@ -0,0 +1,136 @@
+"""
+Little Lemon Order Events
+
+Every change to an order that its customer or delivery crew would
+otherwise poll for is written to the OrderEvent outbox in the same
+transaction as the change itself:
+
+    created     checkout (`OrdersView`)
+    assigned    a delivery crew member was set (`OrderItemsView`,
+                `DispatchView`)
+    status      the delivery crew changed the status
+
+An event is visible to the order's customer, to the delivery crew
+member it names and to managers. `/api/orders/events` (an async view,
+see `async_views.OrderEventsView`) serves them as server-sent events
+when running under ASGI or, for plain JSON requests and under WSGI,
+as a long poll. A WSGI worker is blocked for as long as a poll waits,
+so there polls wait at most ORDER_EVENTS_WSGI_LONG_POLL seconds.
+
+Feeds wake up as soon as an event is committed in the same process
+(`bell`) and re-read the outbox every ORDER_EVENTS_POLL_INTERVAL
+seconds to pick up events written by other processes. One indexed
+query per interval per open feed replaces a fully authenticated,
+throttled list request per poll.
+
+Event streams end after ORDER_EVENTS_STREAM_TIMEOUT seconds and the
+client reconnects with `Last-Event-ID`, so no connection is held
+forever. Old events are removed by the `prune_order_events` command.
+"""
+
+import asyncio
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from .models import OrderEvent
+from .roles import MANAGER
+
+CREATED = 'created'
+ASSIGNED = 'assigned'
+STATUS = 'status'
+
+ORDER_EVENTS_POLL_INTERVAL = getattr(settings, 'ORDER_EVENTS_POLL_INTERVAL', 1.0)
+ORDER_EVENTS_LONG_POLL = getattr(settings, 'ORDER_EVENTS_LONG_POLL', 25)
+ORDER_EVENTS_WSGI_LONG_POLL = getattr(settings, 'ORDER_EVENTS_WSGI_LONG_POLL', 2)
+ORDER_EVENTS_STREAM_TIMEOUT = getattr(settings, 'ORDER_EVENTS_STREAM_TIMEOUT', 300)
+ORDER_EVENTS_KEEPALIVE = 15
+ORDER_EVENTS_BATCH_SIZE = 100
+
+
+class Bell:
+    """
+    Wakes waiting feeds, on whichever event loop they run
+
+    `ring` may be called from any thread, typically from
+    `transaction.on_commit` in a synchronous view.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters = set()
+
+    def ring(self):
+        with self.lock:
+            waiters = list(self.waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The loop was closed under a waiter that never got to clean up
+                pass
+
+    async def wait(self, timeout):
+        """ Returns when rung or after `timeout` seconds """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self.lock:
+            self.waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.lock:
+                self.waiters.discard(waiter)
+
+
+bell = Bell()
+
+
+def order_event(order, kind):
+    """ An unsaved OrderEvent describing the current state of `order` """
+    return OrderEvent(
+        order_id=order.pk,
+        user_id=order.user_id,
+        delivery_crew_id=order.delivery_crew_id,
+        kind=kind,
+        status=order.status,
+    )
+
+
+def record_events(events):
+    """
+    Writes OrderEvents in one INSERT and wakes the feeds on commit
+
+    Must be called inside the transaction making the change.
+    """
+    if events:
+        OrderEvent.objects.bulk_create(events)
+        transaction.on_commit(bell.ring)
+
+
+def visible_events(user, roles):
+    """ The OrderEvents `user` may see """
+    events = OrderEvent.objects.order_by('id')
+    if MANAGER in roles:
+        return events
+    return events.filter(Q(user_id=user.pk) | Q(delivery_crew_id=user.pk))
+
+
+async def next_events(events, after):
+    """ The next batch of `events` with an id above `after` """
+    return [event async for event in events.filter(id__gt=after)[:ORDER_EVENTS_BATCH_SIZE]]
+
+
+async def wait_for_events(events, after, timeout):
+    """
+    The next batch of events, waiting up to `timeout` seconds for one
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        batch = await next_events(events, after)
+        remaining = deadline - loop.time()
+        if batch or remaining <= 0:
+            return batch
+        await bell.wait(min(remaining, ORDER_EVENTS_POLL_INTERVAL))
@@ -0,0 +1,76 @@
+"""
+Little Lemon Order Export
+
+Streams every order joined with its order items for accounting.
+Rows are read with one query through `QuerySet.iterator`, which
+fetches them from the cursor in chunks, and each chunk is written
+out before the next is read. Memory stays flat however many orders
+there are.
+
+    csv     one line per order item, order columns repeated; an
+            order without items is one line with empty item columns
+    ndjson  one JSON object per order with its items nested
+
+The query walks orders by primary key and each order's items by
+the (order, menuitem) unique index, so the rows arrive grouped by
+order without a sort.
+"""
+
+import csv
+from itertools import groupby
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Order
+
+ORDER_FIELDS = ['id', 'user', 'delivery_crew', 'status', 'total', 'date']
+ITEM_FIELDS = ['menuitem', 'quantity', 'unit_price', 'price']
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_rows(queryset=None):
+    """
+    Flat (order fields..., item fields...) tuples, grouped by order
+    """
+    if queryset is None:
+        queryset = Order.objects.all()
+    return (
+        queryset
+        .order_by('id', 'orderitem__menuitem')
+        .values_list(*ORDER_FIELDS, *(f'orderitem__{field}' for field in ITEM_FIELDS))
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+class Echo:
+    """ File-like object handing back what the csv writer writes """
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(['order', *ORDER_FIELDS[1:], *ITEM_FIELDS])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    encoder = DjangoJSONEncoder()
+    width = len(ORDER_FIELDS)
+    for order, lines in groupby(rows, key=lambda row: row[:width]):
+        record = dict(zip(ORDER_FIELDS, order))
+        record['items'] = [
+            dict(zip(ITEM_FIELDS, line[width:]))
+            for line in lines if line[width] is not None
+        ]
+        yield encoder.encode(record) + '\n'
+
+
+STREAMS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
@@ -0,0 +1,37 @@
+"""
+Moves delivered orders out of the live order tables
+
+    python manage.py archive_orders --days 90
+    python manage.py archive_orders --days 90 --loop --interval 3600
+
+Delivered orders dated more than --days days ago are moved, with
+their items, into the archive tables in batches of --batch-size
+orders, one short transaction each. With --loop the command keeps
+running and archives again every --interval seconds.
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = 'Archive delivered orders older than --days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90,
+                            help='Archive delivered orders older than this (default 90)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Orders moved per transaction (default 500)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep archiving every --interval seconds')
+        parser.add_argument('--interval', type=float, default=3600,
+                            help='Seconds between runs with --loop (default 3600)')
+
+    def handle(self, *args, **options):
+        while True:
+            moved = archive_orders(options['days'], options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Archived {moved} orders'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,76 @@
+"""
+Benchmarks every LittleLemonAPI route in-process
+
+    python manage.py seed_littlelemon
+    python manage.py benchmark_api --output run.json
+    python manage.py benchmark_api --baseline run.json
+
+Writes p50/p95/p99 latency, throughput and SQL query counts per
+route as JSON. With `--baseline`, prints the p95 and query count
+change against an earlier run and exits non-zero on regressions.
+Writes made by the benchmark are rolled back unless `--keep-writes`.
+"""
+
+import json
+import sys
+from contextlib import redirect_stdout
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from LittleLemonAPI.benchmark import SCENARIOS, Runner, compare
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, throughput and query counts of every API route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Untimed requests per route before measuring')
+        parser.add_argument('--routes', nargs='*',
+                            help='Only run scenarios whose name starts with one of these')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+        parser.add_argument('--baseline', help='JSON report of an earlier run to compare with')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed relative p95 growth before a route regresses')
+        parser.add_argument('--keep-writes', action='store_true',
+                            help='Commit the rows the benchmark creates')
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options['routes']:
+            scenarios = [s for s in SCENARIOS if s.name.startswith(tuple(options['routes']))]
+            if not scenarios:
+                raise CommandError('No scenario matches --routes')
+
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        runner = Runner(options['requests'], options['warmup'], scenarios, Client(HTTP_HOST=host))
+        try:
+            # Keep stray prints of the views out of the JSON on stdout
+            with transaction.atomic(), redirect_stdout(sys.stderr):
+                report = runner.run()
+                if not options['keep_writes']:
+                    transaction.set_rollback(True)
+        except LookupError as error:
+            raise CommandError(str(error))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                stream.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['baseline']:
+            with open(options['baseline']) as stream:
+                baseline = json.load(stream)
+            rows, regressions = compare(report, baseline, options['tolerance'])
+            for name, p95_before, p95_now, change, q_before, q_now in rows:
+                sys.stderr.write(
+                    f'{name:28} p95 {p95_before:9.3f} -> {p95_now:9.3f} ms ({change:+.0%})'
+                    f'  queries {q_before:6.2f} -> {q_now:6.2f}\n'
+                )
+            if regressions:
+                raise CommandError(f'Regressed routes: {", ".join(regressions)}')
@@ -0,0 +1,42 @@
+"""
+Compares the sync WSGI and native async ASGI read paths
+
+    python manage.py benchmark_asgi --concurrency 1 10 50 --requests 500
+
+Drives each hot read endpoint through the WSGI handler (the sync DRF
+view) and the ASGI handler (its native async view) with the given
+numbers of concurrent clients, in-process, and writes throughput and
+latency percentiles for both as JSON. Needs a
+database filled by `seed_littlelemon`.
+"""
+
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from LittleLemonAPI.benchmark import compare_sync_async
+
+
+class Command(BaseCommand):
+    help = 'Concurrent throughput of the sync (WSGI) and async (ASGI) read endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests per endpoint and concurrency level')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+
+    def handle(self, *args, **options):
+        # The in-process clients send Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            try:
+                report = compare_sync_async(options['concurrency'], options['requests'])
+            except LookupError as error:
+                raise CommandError(str(error))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                stream.write(output + '\n')
+        else:
+            self.stdout.write(output)
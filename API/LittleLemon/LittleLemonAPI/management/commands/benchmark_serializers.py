@@ -0,0 +1,36 @@
+"""
+Times the model serializers against the compiled row serializers
+
+    python manage.py benchmark_serializers --rows 1000 --repeat 10
+
+Serializes the first `--rows` categories, menu items and orders both
+ways and writes milliseconds per thousand rows, and the speedup, as
+JSON. Needs a database filled by `seed_littlelemon`.
+"""
+
+import json
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.benchmark import compare_serializers
+
+
+class Command(BaseCommand):
+    help = 'Model serializers vs values() row serializers, per thousand rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=10,
+                            help='Timed runs per case, the fastest is reported')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            report = compare_serializers(options['rows'], options['repeat'])
+        except LookupError as error:
+            raise CommandError(str(error))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                stream.write(output + '\n')
+        else:
+            self.stdout.write(output)
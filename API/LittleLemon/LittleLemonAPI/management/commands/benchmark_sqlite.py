@@ -0,0 +1,49 @@
+"""
+Compares the stock and tuned SQLite setups under a mixed workload
+
+    python manage.py benchmark_sqlite --workers 8 --requests 2000
+
+Concurrent customers browse the menu, list their orders, add to
+their carts and check out against the configured database file, once
+with Django's stock sqlite3 backend and a connection per request and
+once with `LittleLemonAPI.sqlite` and persistent connections. Writes
+throughput, latency percentiles and errors (e.g. "database is
+locked") per operation as JSON. Needs a database filled by
+`seed_littlelemon`; the run adds orders to it.
+"""
+
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from LittleLemonAPI.benchmark import DATABASE_PROFILES, compare_database_profiles
+
+
+class Command(BaseCommand):
+    help = 'Mixed read/write throughput of the stock and tuned SQLite backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Concurrent customers (default 8)')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Requests per profile (default 2000)')
+        parser.add_argument('--profiles', nargs='+', choices=list(DATABASE_PROFILES),
+                            default=list(DATABASE_PROFILES))
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+
+    def handle(self, *args, **options):
+        # The in-process clients send Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            try:
+                report = compare_database_profiles(
+                    options['workers'], options['requests'], options['profiles']
+                )
+            except LookupError as error:
+                raise CommandError(str(error))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                stream.write(output + '\n')
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,26 @@
+"""
+Deletes order events older than the feeds need
+
+    python manage.py prune_order_events --days 7
+
+Clients resume a feed from their last event id; events older than
+the longest expected disconnection can go.
+"""
+
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from LittleLemonAPI.models import OrderEvent
+
+
+class Command(BaseCommand):
+    help = 'Delete order events older than --days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7,
+                            help='Keep events from this many days (default 7)')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = OrderEvent.objects.filter(created__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} order events'))
@@ -0,0 +1,24 @@
+"""
+Recomputes the sales summary tables from the orders
+
+    python manage.py rebuild_sales_summaries
+
+The order views keep the summaries current as they write. Run this
+after changing orders any other way, e.g. through the admin.
+"""
+
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.models import DailySales, CrewDeliveryStats, MenuItemSales
+from LittleLemonAPI.reporting import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily sales, delivery crew and menu item sales summaries'
+
+    def handle(self, *args, **options):
+        rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {DailySales.objects.count()} days, '
+            f'{CrewDeliveryStats.objects.count()} delivery crew and '
+            f'{MenuItemSales.objects.count()} menu items'
+        ))
@@ -0,0 +1,24 @@
+"""
+Reprices cart lines whose stored price no longer matches the menu
+
+    python manage.py reprice_carts
+    python manage.py reprice_carts --menu-items 3 7
+
+Saving a menu item reprices its carts already. Run this after prices
+were changed without `save()`, e.g. by a catalog-wide update.
+"""
+
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.pricing import reprice_carts
+
+
+class Command(BaseCommand):
+    help = 'Reprice cart lines to the current menu item prices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--menu-items', type=int, nargs='*',
+                            help='Only reprice carts holding these menu items')
+
+    def handle(self, *args, **options):
+        count = reprice_carts(options['menu_items'])
+        self.stdout.write(self.style.SUCCESS(f'Repriced {count} cart lines'))
@@ -0,0 +1,203 @@
+"""
+Seeds the database with a large, realistic Little Lemon data set
+
+    python manage.py seed_littlelemon --users 100000 --orders 100000
+
+Generated users are named `seed_<role>_<n>` and share one password
+hash, so seeding 100k users does not pay for 100k hashes. Generated
+categories have `seed_` slugs. Rows are written with bulk_create in
+batches; `--flush` removes a previous seeded data set first: the
+seeded users with their orders and carts, then the seeded menu
+except items that orders (live or archived) or carts of other users
+still refer to. The sales summaries are rebuilt afterwards. The same
+`--seed` always produces the same data.
+"""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User, Group
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from LittleLemonAPI.menu_cache import bump_menu_version
+from LittleLemonAPI.models import Category, MenuItem, Cart, Order, OrderItem, ArchivedOrderItem
+from LittleLemonAPI.reporting import rebuild_summaries
+from LittleLemonAPI.roles import MANAGER, DELIVERY_CREW
+
+SEED_PREFIX = 'seed_'
+SEED_PASSWORD = 'lemon@seed!'
+
+DISHES = [
+    'Bruschetta', 'Greek Salad', 'Lemon Dessert', 'Grilled Fish', 'Pasta',
+    'Moussaka', 'Souvlaki', 'Falafel', 'Hummus', 'Baklava', 'Risotto',
+    'Calamari', 'Gyro', 'Spanakopita', 'Tiramisu', 'Paella', 'Shakshuka',
+]
+STYLES = [
+    'Classic', 'Spicy', 'Family Size', 'Vegan', 'Chef\'s', 'Lemon', 'Smoked',
+    'Roasted', 'Garden', 'Seaside', 'Village', 'Grandma\'s',
+]
+CATEGORIES = [
+    'Appetizers', 'Salads', 'Mains', 'Seafood', 'Grill', 'Pasta', 'Desserts',
+    'Drinks', 'Sides', 'Kids', 'Specials', 'Breakfast',
+]
+
+
+class Command(BaseCommand):
+    help = 'Generate a large deterministic data set for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--menu-items', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--managers', type=int, default=5)
+        parser.add_argument('--delivery-crew', type=int, default=50)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--max-order-lines', type=int, default=5)
+        parser.add_argument('--cart-users', type=int, default=1000,
+                            help='Customers that get a few lines in their cart')
+        parser.add_argument('--days', type=int, default=365,
+                            help='Spread order dates over this many past days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete previously seeded data first')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        if options['flush']:
+            self.flush()
+
+        with transaction.atomic():
+            menu = self.seed_menu(options['categories'], options['menu_items'])
+            managers, crew, customers = self.seed_users(
+                options['users'], options['managers'], options['delivery_crew']
+            )
+            self.seed_orders(
+                options['orders'], customers, crew, menu,
+                options['max_order_lines'], options['days']
+            )
+            self.seed_carts(customers[:options['cart_users']], menu)
+            rebuild_summaries()
+        bump_menu_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(menu)} menu items, {len(managers)} managers, '
+            f'{len(crew)} delivery crew, {len(customers)} customers and '
+            f'{options["orders"]} orders'
+        ))
+
+    def flush(self):
+        seeded = User.objects.filter(username__startswith=SEED_PREFIX)
+        Order.objects.filter(user__in=seeded).delete()
+        Cart.objects.filter(user__in=seeded).delete()
+        seeded.delete()
+
+        item = OuterRef('pk')
+        MenuItem.objects.filter(category__slug__startswith=SEED_PREFIX).exclude(
+            Exists(OrderItem.objects.filter(menuitem=item))
+        ).exclude(
+            Exists(Cart.objects.filter(menuitem=item))
+        ).exclude(
+            Exists(ArchivedOrderItem.objects.filter(menuitem=item))
+        ).delete()
+        Category.objects.filter(slug__startswith=SEED_PREFIX).exclude(
+            Exists(MenuItem.objects.filter(category=OuterRef('pk')))
+        ).delete()
+        self.stdout.write('Flushed seeded data')
+
+    def seed_menu(self, category_count, item_count):
+        Category.objects.bulk_create(
+            (Category(slug=f'{SEED_PREFIX}{i}', title=CATEGORIES[i % len(CATEGORIES)]
+                      + ('' if i < len(CATEGORIES) else f' {i}'))
+             for i in range(category_count)),
+            # Categories kept by a flush are reused
+            ignore_conflicts=True,
+        )
+        categories = list(
+            Category.objects.filter(slug__in=[f'{SEED_PREFIX}{i}' for i in range(category_count)]).order_by('pk')
+        )
+        items = []
+        for i in range(item_count):
+            title = f'{self.random.choice(STYLES)} {self.random.choice(DISHES)} #{i}'
+            price = Decimal(self.random.randrange(250, 4000)) / 100
+            items.append(MenuItem(
+                title=title,
+                price=price,
+                featured=self.random.random() < 0.05,
+                category=self.random.choice(categories)))
+        MenuItem.objects.bulk_create(items, batch_size=self.batch_size)
+        return list(
+            MenuItem.objects.filter(category__slug__startswith=SEED_PREFIX).values_list('id', 'price')
+        )
+
+    def seed_users(self, customer_count, manager_count, crew_count):
+        password = make_password(SEED_PASSWORD)
+        roles = [('manager', manager_count), ('crew', crew_count), ('customer', customer_count)]
+        for role, count in roles:
+            User.objects.bulk_create(
+                (User(username=f'{SEED_PREFIX}{role}_{n}', password=password,
+                      email=f'{role}_{n}@seed.littlelemon.com')
+                 for n in range(count)),
+                batch_size=self.batch_size,
+                ignore_conflicts=True,
+            )
+
+        def ids(role):
+            return list(
+                User.objects.filter(username__startswith=f'{SEED_PREFIX}{role}_')
+                .order_by('id').values_list('id', flat=True)
+            )
+
+        managers, crew, customers = ids('manager'), ids('crew'), ids('customer')
+        Membership = User.groups.through
+        for name, members in ((MANAGER, managers), (DELIVERY_CREW, crew)):
+            group, _ = Group.objects.get_or_create(name=name)
+            Membership.objects.bulk_create(
+                (Membership(group_id=group.pk, user_id=user_id) for user_id in members),
+                batch_size=self.batch_size,
+                ignore_conflicts=True,
+            )
+        return managers, crew, customers
+
+    def seed_orders(self, count, customers, crew, menu, max_lines, days):
+        today = date.today()
+        for start in range(0, count, self.batch_size):
+            orders, lines = [], []
+            for _ in range(min(self.batch_size, count - start)):
+                age = self.random.randrange(days)
+                picks = self.random.sample(menu, self.random.randint(1, max_lines))
+                quantities = [self.random.randint(1, 4) for _ in picks]
+                order_lines = [
+                    (menuitem_id, quantity, price, price * quantity)
+                    for (menuitem_id, price), quantity in zip(picks, quantities)
+                ]
+                orders.append(Order(
+                    user_id=self.random.choice(customers),
+                    delivery_crew_id=self.random.choice(crew) if crew and age > 0 else None,
+                    status=age > 1,
+                    total=sum(line[3] for line in order_lines),
+                    date=today - timedelta(days=age)))
+                lines.append(order_lines)
+
+            Order.objects.bulk_create(orders)
+            OrderItem.objects.bulk_create(
+                OrderItem(order_id=order.pk, menuitem_id=menuitem_id, quantity=quantity,
+                          unit_price=unit_price, price=price)
+                for order, order_lines in zip(orders, lines)
+                for menuitem_id, quantity, unit_price, price in order_lines
+            )
+            self.stdout.write(f'  {start + len(orders)} / {count} orders')
+
+    def seed_carts(self, customers, menu):
+        Cart.objects.bulk_create(
+            (Cart(user_id=user_id, menuitem_id=menuitem_id, quantity=1,
+                  unit_price=price, price=price)
+             for user_id in customers
+             for menuitem_id, price in self.random.sample(menu, 3)),
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
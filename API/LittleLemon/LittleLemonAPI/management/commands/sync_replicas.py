@@ -0,0 +1,41 @@
+"""
+Refreshes the local SQLite read replicas from the primary
+
+    python manage.py sync_replicas
+    python manage.py sync_replicas --interval 2
+
+Copies `default` over every alias in DATABASE_REPLICAS with SQLite's
+online backup, once or every --interval seconds until interrupted.
+The interval is the replication lag the replicas simulate.
+"""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from LittleLemonAPI.replicas import copy_database, get_replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database over the local read replicas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Keep copying every this many seconds')
+
+    def handle(self, *args, **options):
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError('DATABASE_REPLICAS is empty; set LOCAL_REPLICAS in settings')
+        for alias in [DEFAULT_DB_ALIAS, *replicas]:
+            if connections[alias].vendor != 'sqlite' or connections[alias].is_in_memory_db():
+                raise CommandError(f'{alias} is not an SQLite database file')
+
+        while True:
+            for alias in replicas:
+                connections[alias].close()
+                copy_database(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'],
+                              connections[alias].settings_dict['NAME'])
+            self.stdout.write(self.style.SUCCESS(f"Copied {DEFAULT_DB_ALIAS} to {', '.join(replicas)}"))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,88 @@
+"""
+Little Lemon Group Membership
+
+Adds users to and removes them from the Manager and Delivery Crew
+groups in batches, at a fixed number of queries however many
+usernames are given:
+
+    add_members(DELIVERY_CREW, ['mario', 'luigi'])
+    remove_members(DELIVERY_CREW, ['luigi'])
+
+All usernames are resolved, together with whether each user is
+already in the group, by one query. Membership then changes with a
+single bulk INSERT into, or DELETE from, the `User.groups` through
+table. Both return a {username: result} report in input order.
+
+Writing the through table directly sends no `m2m_changed` signal,
+so the cached roles of the affected users are dropped here instead
+of in `signals`.
+"""
+
+from django.contrib.auth.models import User, Group
+from django.db.models import Exists, OuterRef
+from .roles import invalidate_roles
+
+Membership = User.groups.through
+
+ADDED = 'added'
+REMOVED = 'removed'
+ALREADY_MEMBER = 'already a member'
+NOT_MEMBER = 'not a member'
+NOT_FOUND = 'not found'
+
+
+def resolve_users(group_name, usernames):
+    """
+    {username: (user id, is member)} for the usernames that exist
+    """
+    member = Membership.objects.filter(user_id=OuterRef('pk'), group__name=group_name)
+    return {
+        username: (pk, is_member)
+        for username, pk, is_member in User.objects
+        .filter(username__in=usernames)
+        .annotate(is_member=Exists(member))
+        .values_list('username', 'pk', 'is_member')
+    }
+
+
+def add_members(group_name, usernames):
+    """
+    Adds the users named to the group with one INSERT
+    """
+    usernames = list(dict.fromkeys(usernames))
+    group_id = Group.objects.values_list('pk', flat=True).get(name=group_name)
+    users = resolve_users(group_name, usernames)
+    added = [pk for pk, is_member in users.values() if not is_member]
+    if added:
+        Membership.objects.bulk_create(
+            [Membership(user_id=pk, group_id=group_id) for pk in added],
+            ignore_conflicts=True,
+        )
+        invalidate_roles(*added)
+    return {
+        username: NOT_FOUND if username not in users else ALREADY_MEMBER if users[username][1] else ADDED
+        for username in usernames
+    }
+
+
+def remove_members(group_name, usernames):
+    """
+    Removes the users named from the group with one DELETE
+    """
+    usernames = list(dict.fromkeys(usernames))
+    users = resolve_users(group_name, usernames)
+    removed = [pk for pk, is_member in users.values() if is_member]
+    if removed:
+        remove_user_ids(group_name, removed)
+    return {
+        username: NOT_FOUND if username not in users else REMOVED if users[username][1] else NOT_MEMBER
+        for username in usernames
+    }
+
+
+def remove_user_ids(group_name, user_ids):
+    """
+    Removes users by id from the group with one DELETE
+    """
+    Membership.objects.filter(group__name=group_name, user_id__in=user_ids).delete()
+    invalidate_roles(*user_ids)
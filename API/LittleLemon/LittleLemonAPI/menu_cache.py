@@ -0,0 +1,134 @@
+"""
+Little Lemon Menu Cache
+
+The menu (categories and menu items) changes a few times a day but
+is read on almost every anonymous request. Serialized menu responses
+are kept in the default cache under a key that includes a menu
+version. Saving or deleting a MenuItem or Category replaces the
+version once the change is committed (see `signals`), which orphans
+every cached entry at once; a read racing the write can only have
+cached the old menu under the old version.
+
+The version also feeds the ETag and Last-Modified headers, so
+clients revalidating with If-None-Match/If-Modified-Since get a 304
+without the view touching the database. Writes that bypass model
+signals (`QuerySet.update`, `bulk_create`) must call
+`bump_menu_version` themselves.
+
+The version lives in the default cache, which every worker process
+shares (see CACHES in settings), so a change saved by one worker
+moves the ETag served by all of them.
+"""
+
+import hashlib
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from .replicas import read_from_primary
+
+MENU_CACHE_TIMEOUT = getattr(settings, 'MENU_CACHE_TIMEOUT', 300)
+
+_VERSION_KEY = 'littlelemon:menu:version'
+
+
+def new_menu_version():
+    """ A fresh (version, last_modified) pair """
+    return uuid.uuid4().hex, int(time.time())
+
+
+def get_menu_version():
+    """
+    Returns the current (version, last_modified) pair
+
+    A missing version, e.g. after the cache was flushed, is replaced
+    by a fresh one, which can never collide with entries cached under
+    an earlier version.
+    """
+    state = cache.get(_VERSION_KEY)
+    if state is None:
+        cache.add(_VERSION_KEY, new_menu_version(), None)
+        state = cache.get(_VERSION_KEY)
+    return state
+
+
+async def aget_menu_version():
+    """
+    Async counterpart of `get_menu_version` for the native async views
+    """
+    state = await cache.aget(_VERSION_KEY)
+    if state is None:
+        await cache.aadd(_VERSION_KEY, new_menu_version(), None)
+        state = await cache.aget(_VERSION_KEY)
+    return state
+
+
+def bump_menu_version():
+    """
+    Invalidates every cached menu response
+
+    Writes a fresh version rather than incrementing the old one:
+    `incr` is a read-modify-write on most backends, so two writers
+    could both land on the same number.
+    """
+    cache.set(_VERSION_KEY, new_menu_version(), None)
+
+
+def menu_etag(version, path, media_type):
+    """
+    Strong validator for one representation of one menu URL
+    """
+    digest = hashlib.md5(f'{path}|{media_type}'.encode()).hexdigest()
+    return quote_etag(f'{version}-{digest}')
+
+
+def menu_cache_key(version, path):
+    return f'littlelemon:menu:{version}:{path}'
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+class CachedMenuMixin:
+    """
+    Serves GET list/retrieve responses from the versioned menu cache
+
+    Mixed into the generic menu views. Authentication, permissions
+    and throttling still run as usual before the cache is consulted.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        version, last_modified = get_menu_version()
+        path = request.get_full_path()
+        etag = menu_etag(version, path, request.accepted_media_type)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            key = menu_cache_key(version, path)
+            data = cache.get(key)
+            if data is None:
+                with read_from_primary():
+                    response = handler(request, *args, **kwargs)
+                # Streamed listings may be lazy and are not kept
+                if response.status_code == 200 and not getattr(self, 'stream_mode', None):
+                    cache.set(key, response.data, MENU_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+
+        return set_validators(response, etag, last_modified)
@@ -0,0 +1,92 @@
+# Full-text index over menu item and category titles (SQLite FTS5)
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = "littlelemonapi_menuitem_fts"
+
+CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, category, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    f"""
+    INSERT INTO {FTS_TABLE} (rowid, title, category)
+    SELECT m.id, m.title, c.title
+    FROM littlelemonapi_menuitem m
+    JOIN littlelemonapi_category c ON c.id = m.category_id
+    """,
+    f"""
+    CREATE TRIGGER littlelemonapi_menuitem_fts_insert
+    AFTER INSERT ON littlelemonapi_menuitem BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, category)
+        SELECT new.id, new.title, c.title
+        FROM littlelemonapi_category c WHERE c.id = new.category_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER littlelemonapi_menuitem_fts_update
+    AFTER UPDATE OF title, category_id ON littlelemonapi_menuitem BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, title, category)
+        SELECT new.id, new.title, c.title
+        FROM littlelemonapi_category c WHERE c.id = new.category_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER littlelemonapi_menuitem_fts_delete
+    AFTER DELETE ON littlelemonapi_menuitem BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER littlelemonapi_category_fts_update
+    AFTER UPDATE OF title ON littlelemonapi_category BEGIN
+        UPDATE {FTS_TABLE} SET category = new.title
+        WHERE rowid IN (
+            SELECT id FROM littlelemonapi_menuitem WHERE category_id = new.id
+        );
+    END
+    """,
+]
+
+DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS littlelemonapi_category_fts_update",
+    "DROP TRIGGER IF EXISTS littlelemonapi_menuitem_fts_delete",
+    "DROP TRIGGER IF EXISTS littlelemonapi_menuitem_fts_update",
+    "DROP TRIGGER IF EXISTS littlelemonapi_menuitem_fts_insert",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_fts_index(apps, schema_editor):
+    """
+    Builds the index on SQLite builds with FTS5; elsewhere searches
+    fall back to the icontains SearchFilter.
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        schema_editor.execute(CREATE_STATEMENTS[0])
+    except OperationalError:
+        return
+    for statement in CREATE_STATEMENTS[1:]:
+        schema_editor.execute(statement)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("LittleLemonAPI", "0002_alter_orderitem_order"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.2 on 2026-10-18 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0003_menuitem_fts"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="order",
+            name="date",
+            field=models.DateField(),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["date", "id"], name="order_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "date", "id"], name="order_user_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["delivery_crew", "date", "id"], name="order_crew_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["delivery_crew", "status", "date"],
+                name="order_crew_status_date_idx",
+            ),
+        ),
+    ]
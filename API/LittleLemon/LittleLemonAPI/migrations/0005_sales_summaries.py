@@ -0,0 +1,88 @@
+# Generated by Django 4.2.2 on 2026-10-18 10:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_summaries(apps, schema_editor):
+    from LittleLemonAPI.reporting import rebuild_summaries
+
+    rebuild_summaries(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("LittleLemonAPI", "0004_order_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CrewDeliveryStats",
+            fields=[
+                (
+                    "crew",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="delivery_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("assigned", models.IntegerField(default=0)),
+                ("delivered", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("orders", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="MenuItemSales",
+            fields=[
+                (
+                    "menuitem",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="sales",
+                        serialize=False,
+                        to="LittleLemonAPI.menuitem",
+                    ),
+                ),
+                ("quantity", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-quantity", "menuitem"],
+                        name="menuitemsales_quantity_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.2 on 2026-10-18 10:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0005_sales_summaries"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("order_id", models.IntegerField()),
+                ("user_id", models.IntegerField()),
+                ("delivery_crew_id", models.IntegerField(null=True)),
+                ("kind", models.CharField(max_length=16)),
+                ("status", models.BooleanField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["user_id", "id"], name="orderevent_user_idx"),
+                    models.Index(
+                        fields=["delivery_crew_id", "id"], name="orderevent_crew_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
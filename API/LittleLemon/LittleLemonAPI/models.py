@@ -48,7 +48,22 @@ class Order(models.Model):
         null=True)
     status = models.BooleanField(db_index=True, default=0)
     total = models.DecimalField(max_digits=6, decimal_places=2)
-    date = models.DateField(db_index=True)
+    date = models.DateField()
+
+    class Meta:
+        """
+        Composite indexes matching the role scoped order listings
+
+        Managers page through every order by date, customers through
+        their own orders and delivery crew through their assignments,
+        optionally narrowed to open or delivered orders.
+        """
+        indexes = [
+            models.Index(fields=['date', 'id'], name='order_date_id_idx'),
+            models.Index(fields=['user', 'date', 'id'], name='order_user_date_idx'),
+            models.Index(fields=['delivery_crew', 'date', 'id'], name='order_crew_date_idx'),
+            models.Index(fields=['delivery_crew', 'status', 'date'], name='order_crew_status_date_idx'),
+        ]
 
 
 class OrderItem(models.Model):
@@ -62,3 +77,88 @@ class OrderItem(models.Model):
     class Meta:
         """ Only 1 Menu Item per Order """
         unique_together = ('order', 'menuitem')
+
+
+class DailySales(models.Model):
+    """ Orders and Revenue per Day, maintained by `reporting` """
+    date = models.DateField(unique=True)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+
+class CrewDeliveryStats(models.Model):
+    """ Orders Assigned to and Delivered by a Delivery Crew Member """
+    crew = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="delivery_stats")
+    assigned = models.IntegerField(default=0)
+    delivered = models.IntegerField(default=0)
+
+
+class MenuItemSales(models.Model):
+    """ Quantity and Revenue Sold per Menu Item """
+    menuitem = models.OneToOneField(
+        MenuItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="sales")
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        """ Top sellers are read by quantity """
+        indexes = [
+            models.Index(fields=['-quantity', 'menuitem'], name='menuitemsales_quantity_idx'),
+        ]
+
+
+class OrderEvent(models.Model):
+    """
+    Outbox of Order Changes, read by the order event feed
+
+    Ids are plain integers rather than foreign keys so events outlive
+    the order and cost no extra lookups when filtered by recipient.
+    """
+    order_id = models.IntegerField()
+    user_id = models.IntegerField()
+    delivery_crew_id = models.IntegerField(null=True)
+    kind = models.CharField(max_length=16)
+    status = models.BooleanField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """ Feeds read the events of one customer or crew member after an id """
+        indexes = [
+            models.Index(fields=['user_id', 'id'], name='orderevent_user_idx'),
+            models.Index(fields=['delivery_crew_id', 'id'], name='orderevent_crew_idx'),
+        ]
+
+
+class ArchivedOrder(models.Model):
+    """ Delivered Order moved out of the live tables by `archive` """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_orders")
+    delivery_crew = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="archived_deliveries",
+        null=True)
+    status = models.BooleanField(default=0)
+    total = models.DecimalField(max_digits=6, decimal_places=2)
+    date = models.DateField()
+
+
+class ArchivedOrderItem(models.Model):
+    """ Order Item of an Archived Order """
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name="items")
+    menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
+    quantity = models.SmallIntegerField()
+    unit_price = models.DecimalField(max_digits=6, decimal_places=2)
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+
+    class Meta:
+        """ Only 1 Menu Item per Order """
+        unique_together = ('order', 'menuitem')
@@ -0,0 +1,163 @@
+"""
+Little Lemon Pagination
+
+Page number pagination stays the default, with clients allowed to
+pick their own page size via `?page_size=`. Large, ever growing
+lists (orders, menu items) also offer a keyset mode: requesting
+`?pagination=cursor` switches to keyset pagination, which seeks on
+indexed columns instead of running COUNT(*) and OFFSET scans.
+"""
+
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+
+MAX_PAGE_SIZE = getattr(settings, 'MAX_PAGE_SIZE', 100)
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    """ Default pagination with a client selectable page size """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """
+    Cursor pagination seeking on every ordering column
+
+    DRF's CursorPagination only remembers the first ordering column
+    and pages through rows sharing its value with OFFSET, capped at
+    `offset_cutoff`. Here the cursor holds the values of all ordering
+    columns of the row at the page edge, e.g. (date, id), and the next
+    page starts with a row comparison:
+
+        date < d OR (date = d AND id < i)
+
+    so every page is an index seek, however many rows share a date.
+
+    An explicit `?ordering=` from the view's OrderingFilter wins over
+    the class ordering, and the primary key is always appended as a
+    tie-breaker so the position of a row is unique. Ordering columns
+    must not be nullable.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(field.replace('pk', 'id') if field.lstrip('-') == 'pk' else field for field in ordering)
+
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = None if self.cursor is None else self.cursor.position
+
+        ordering = pagination._reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def seek(self, ordering, position):
+        """
+        Filter for the rows after `position` in `ordering`
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        seek = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            seek |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return seek
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if isinstance(instance, dict):
+                values.append(instance[name])
+            else:
+                values.append(getattr(instance, instance._meta.get_field(name).attname))
+        return json.dumps(values, cls=DjangoJSONEncoder)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(pagination.Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(pagination.Cursor(offset=0, reverse=True, position=position))
+
+
+class OrderCursorPagination(KeysetPagination):
+    """ Newest orders first """
+    ordering = ('-date', '-id')
+
+
+class MenuItemCursorPagination(KeysetPagination):
+    """ Cheapest menu items first """
+    ordering = ('price', 'id')
+
+
+class SelectablePaginationMixin:
+    """
+    Lets a list view switch to its `cursor_pagination_class`
+
+    Cursor mode is chosen with `?pagination=cursor`; the `next` and
+    `previous` links keep that parameter, and any request carrying a
+    `cursor` is treated as cursor mode as well.
+    """
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if self.cursor_pagination_class is not None and (
+                params.get('pagination') == 'cursor' or 'cursor' in params
+            ):
+                self._paginator = self.cursor_pagination_class()
+        return super().paginator
@@ -0,0 +1,47 @@
+"""
+Little Lemon Cart Pricing
+
+A Cart line stores the `unit_price` and `price` of its menu item at
+the time it was added, and checkout charges those. When a menu item's
+price changes, open carts holding it are repriced in the database:
+
+    reprice_item(menuitem)      one UPDATE for the carts of one item,
+                                run from the MenuItem post_save signal
+    reprice_carts()             one UPDATE for every stale cart line,
+                                reading prices through a subquery
+
+Both only touch lines whose `unit_price` differs from the current
+price, so saving an item without changing its price writes nothing.
+Price changes that bypass `save()` (`QuerySet.update`, bulk imports)
+are caught up by the `reprice_carts` command.
+"""
+
+from django.db.models import F, OuterRef, Subquery
+from .models import Cart, MenuItem
+
+
+def reprice_item(menuitem):
+    """
+    Reprices the cart lines of one menu item, returns how many changed
+    """
+    return (
+        Cart.objects
+        .filter(menuitem_id=menuitem.pk)
+        .exclude(unit_price=menuitem.price)
+        .update(unit_price=menuitem.price, price=F('quantity') * menuitem.price)
+    )
+
+
+def reprice_carts(menuitems=None):
+    """
+    Reprices every stale cart line, or those of `menuitems` (ids)
+    """
+    current = Subquery(MenuItem.objects.filter(pk=OuterRef('menuitem_id')).values('price')[:1])
+    carts = Cart.objects.all()
+    if menuitems is not None:
+        carts = carts.filter(menuitem_id__in=menuitems)
+    return (
+        carts
+        .exclude(unit_price=current)
+        .update(unit_price=current, price=F('quantity') * current)
+    )
@@ -0,0 +1,196 @@
+"""
+Little Lemon Query Budgets
+
+Views declare how many SQL queries a request may cost:
+
+    class OrdersView(...):
+        query_budget = {'GET': 4, 'POST': 6}
+
+An int applies to every method. `QueryRecorder` counts, times and
+de-duplicates the statements run while it is installed as a
+connection execute wrapper. `QueryBudgetMiddleware` uses it to add
+per-request numbers to the response headers, labelled with the DRF
+view class that served the request:
+
+    X-Query-View, X-Query-Count, X-Query-Time-Ms,
+    X-Query-Duplicates, X-Query-Budget
+
+and logs a warning on the `LittleLemonAPI.query_budget` logger when a
+view goes over its budget. The middleware is active only when
+QUERY_BUDGET_ENABLED is set (defaults to DEBUG). The test suite
+enforces the budgets with `testing.QueryBudgetTestMixin`.
+
+Async requests are measured too, with the recorder installed from the
+thread `sync_to_async` runs the request's ORM work on. A streamed
+response sends its headers before the body is read, so their numbers
+stop there, while the budget is checked once the body is sent and
+counts the queries run while streaming it. Event streams
+(`text/event-stream`) stay open and poll for as long as the client
+listens, so only their queries before the body count.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM = 'text/event-stream'
+
+
+def get_query_budget(view_class, method):
+    """
+    Returns the budget a view declares for an HTTP method, or None
+    """
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        return budget.get(method.upper())
+    return budget
+
+
+def resolve_view_class(request):
+    """
+    The class behind the view function that served the request
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None)
+
+
+class QueryRecorder:
+    """
+    Connection execute wrapper that records every statement
+
+    Duplicates are counted on the SQL text without parameters, so an
+    N+1 pattern (the same SELECT for each row) shows up as one
+    statement repeated N times. Savepoint bookkeeping is not counted
+    since it depends on whether the caller is already in a
+    transaction (as every test is).
+    """
+    ignored_prefixes = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.startswith(self.ignored_prefixes):
+                self.statements.append((sql, time.perf_counter() - start))
+
+    def record(self, using=None):
+        """
+        Context manager installing the recorder on one or all connections
+        """
+        stack = ExitStack()
+        aliases = [using] if using else list(connections)
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.statements)
+
+    @property
+    def duplicates(self):
+        """ {sql: times} for statements run more than once """
+        counts = Counter(sql for sql, _ in self.statements)
+        return {sql: times for sql, times in counts.items() if times > 1}
+
+
+class QueryBudgetMiddleware:
+    """
+    Records the queries of each request and reports them in headers
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        # Installed from the thread the ORM of async views and of
+        # sync views behind `sync_to_async` runs its queries on
+        recording = await sync_to_async(recorder.record)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        view_class = resolve_view_class(request)
+        if view_class is None:
+            return response
+
+        budget = get_query_budget(view_class, request.method)
+        response['X-Query-View'] = view_class.__name__
+        response['X-Query-Count'] = str(recorder.count)
+        response['X-Query-Time-Ms'] = f'{recorder.total_time * 1000:.3f}'
+        response['X-Query-Duplicates'] = str(self.count_duplicates(recorder))
+        if budget is not None:
+            response['X-Query-Budget'] = str(budget)
+
+        def check():
+            if budget is not None and recorder.count > budget:
+                logger.warning(
+                    '%s %s ran %d queries, over its budget of %d (%d duplicates)',
+                    view_class.__name__, request.method, recorder.count, budget,
+                    self.count_duplicates(recorder),
+                )
+
+        if response.streaming and not response.get('Content-Type', '').startswith(EVENT_STREAM):
+            response.streaming_content = self.record_stream(response, recorder, check)
+        else:
+            check()
+        return response
+
+    def count_duplicates(self, recorder):
+        return sum(times - 1 for times in recorder.duplicates.values())
+
+    def record_stream(self, response, recorder, check):
+        """ The body of a streamed response, recorded as it is read """
+        content = response.streaming_content
+        if response.is_async:
+            async def stream():
+                recording = await sync_to_async(recorder.record)()
+                try:
+                    async for chunk in content:
+                        yield chunk
+                finally:
+                    await sync_to_async(recording.close)()
+                    check()
+        else:
+            def stream():
+                try:
+                    with recorder.record():
+                        yield from content
+                finally:
+                    check()
+        return stream()
@@ -0,0 +1,187 @@
+"""
+Little Lemon Read Replicas
+
+GET, HEAD and OPTIONS requests read from a replica database; every
+write, and every read of a request that has written, goes to
+`default`. Configure the replica aliases in settings:
+
+    DATABASES = {'default': {...}, 'replica1': {...}, 'replica2': {...}}
+    DATABASE_REPLICAS = ['replica1', 'replica2']
+    DATABASE_ROUTERS = ['LittleLemonAPI.replicas.ReplicaRouter']
+
+and add `ReplicaMiddleware`, which picks one replica per request so
+all reads of a request see the same snapshot. Outside a request
+(management commands, signals, the test suite) everything runs on
+`default`.
+
+Read-your-writes: after an unsafe request the client is pinned to
+`default` for REPLICA_PIN_SECONDS (default 5), by a cookie for
+browsers and by a cache entry keyed on the Authorization header for
+token clients, so a replica lagging behind cannot hide the write it
+just made. The next request may reach any worker, so the default
+cache has to be shared by all of them (see CACHES in settings).
+
+Locally, SQLite copies of the primary stand in for replicas. Set
+LOCAL_REPLICAS in settings and refresh the copies with the
+`sync_replicas` command, which uses SQLite's online backup.
+
+Responses streamed after the view returns (exports, `?stream=`,
+event feeds) read from `default`. So do the reads that fill shared
+caches (roles, token resolutions, menu payloads): a lagging replica
+could otherwise put rows back in the cache that a write has just
+invalidated, see `read_from_primary`.
+"""
+
+import hashlib
+import random
+import sqlite3
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_PIN_SECONDS = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+PIN_COOKIE = 'littlelemon_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@dataclass
+class ReadRouting:
+    """ Where the reads of the current request go """
+    replica: Optional[str] = None
+    wrote: bool = False
+
+
+_routing = ContextVar('littlelemon_read_routing', default=None)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def pin_cache_key(request):
+    """ Cache key pinning a token client to the primary, if it sent one """
+    header = request.META.get('HTTP_AUTHORIZATION')
+    if not header:
+        return None
+    return f'littlelemon:pin:{hashlib.sha256(header.encode()).hexdigest()}'
+
+
+def is_pinned(request):
+    if PIN_COOKIE in request.COOKIES:
+        return True
+    key = pin_cache_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Sends the reads of the block to `default`
+
+    For reads whose result is put in a shared cache, which must not
+    be filled from a replica that has not caught up yet.
+    """
+    routing = _routing.get()
+    if routing is None or routing.replica is None:
+        yield
+        return
+    replica, routing.replica = routing.replica, None
+    try:
+        yield
+    finally:
+        if not routing.wrote:
+            routing.replica = replica
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica chosen for the current request
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None:
+            return None
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            # Later reads of this request must see the write
+            routing.replica = None
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, never migrated themselves
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Scopes read routing to a request and pins clients after writes
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = self.routing(request)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(request, response, routing)
+
+    async def __acall__(self, request):
+        routing = self.routing(request)
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(request, response, routing)
+
+    def routing(self, request):
+        replicas = get_replicas()
+        if request.method in SAFE_METHODS and replicas and not is_pinned(request):
+            return ReadRouting(replica=random.choice(replicas))
+        return ReadRouting()
+
+    def pin(self, request, response, routing):
+        if request.method in SAFE_METHODS and not routing.wrote:
+            return response
+        response.set_cookie(PIN_COOKIE, '1', max_age=REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        key = pin_cache_key(request)
+        if key is not None:
+            cache.set(key, True, REPLICA_PIN_SECONDS)
+        return response
+
+
+def copy_database(source, target):
+    """
+    Copies the SQLite database `source` over `target` with the online
+    backup API, consistent even while `source` is being written
+    """
+    with closing(sqlite3.connect(source)) as primary, closing(sqlite3.connect(target)) as replica:
+        primary.backup(replica)
@@ -0,0 +1,151 @@
+"""
+Little Lemon Sales Reporting
+
+The manager reports read three summary tables instead of scanning
+Order and OrderItem on every request:
+
+    DailySales          orders and revenue per order date
+    CrewDeliveryStats   orders assigned to / delivered by each crew member
+    MenuItemSales       quantity and revenue sold per menu item
+
+The order views (and `dispatch`) apply the change of every checkout,
+assignment, status update and deletion to these tables inside the same
+transaction as the write itself. Each change costs a fixed number
+of statements however many rows it touches: one INSERT that creates
+missing summary rows, then one UPDATE adding a per-row delta picked
+by CASE.
+
+Archiving orders (see `archive`) leaves the tables as they are.
+Writes that bypass the views (the admin, bulk seeding) leave them
+stale until `rebuild_summaries` runs, which the
+`rebuild_sales_summaries` command and the seed command both do.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from .models import CrewDeliveryStats, DailySales, MenuItemSales
+
+
+def increment(model, key, deltas):
+    """
+    Adds {key value: {field: delta}} onto rows of a summary model
+
+    Rows that do not exist yet are created with their defaults first.
+    """
+    deltas = {
+        value: {field: delta for field, delta in fields.items() if delta}
+        for value, fields in deltas.items()
+    }
+    deltas = {value: fields for value, fields in deltas.items() if fields}
+    if not deltas:
+        return
+
+    model.objects.bulk_create([model(**{key: value}) for value in deltas], ignore_conflicts=True)
+    updates = {}
+    for field in {field for fields in deltas.values() for field in fields}:
+        output_field = model._meta.get_field(field)
+        whens = [
+            When(**{key: value}, then=Value(fields[field], output_field=output_field))
+            for value, fields in deltas.items() if field in fields
+        ]
+        updates[field] = F(field) + Case(*whens, default=Value(0), output_field=output_field)
+    model.objects.filter(**{f'{key}__in': list(deltas)}).update(**updates)
+
+
+def record_order(order, lines, sign=1):
+    """
+    Counts a checked out order, or discounts a deleted one (sign=-1)
+
+    `lines` are (menuitem_id, quantity, price) tuples of the order.
+    """
+    increment(DailySales, 'date', {
+        order.date: {'orders': sign, 'revenue': sign * order.total},
+    })
+    sold = defaultdict(lambda: {'quantity': 0, 'revenue': Decimal('0')})
+    for menuitem_id, quantity, price in lines:
+        sold[menuitem_id]['quantity'] += sign * quantity
+        sold[menuitem_id]['revenue'] += sign * price
+    increment(MenuItemSales, 'menuitem_id', sold)
+    if order.delivery_crew_id is not None:
+        if sign > 0:
+            record_delivery(None, (order.delivery_crew_id, order.status))
+        else:
+            record_delivery((order.delivery_crew_id, order.status), None)
+
+
+def record_delivery(before, after):
+    """
+    Moves one order between crew members and/or delivery states
+
+    `before` and `after` are (crew_id, delivered) pairs, or None when
+    the order is not assigned to anyone.
+    """
+    deltas = defaultdict(lambda: {'assigned': 0, 'delivered': 0})
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None and state[0] is not None:
+            crew_id, delivered = state
+            deltas[crew_id]['assigned'] += sign
+            deltas[crew_id]['delivered'] += sign * bool(delivered)
+    increment(CrewDeliveryStats, 'crew_id', deltas)
+
+
+def record_assignments(counts):
+    """
+    Adds {crew_id: n} newly assigned open orders to the crew stats
+    """
+    increment(CrewDeliveryStats, 'crew_id', {
+        crew_id: {'assigned': count} for crew_id, count in counts.items()
+    })
+
+
+def rebuild_summaries(apps=django_apps):
+    """
+    Recomputes every summary table from the live and archived orders
+
+    Takes an app registry so data migrations can pass theirs.
+    """
+    sources = [(
+        apps.get_model('LittleLemonAPI', 'Order'),
+        apps.get_model('LittleLemonAPI', 'OrderItem'),
+    )]
+    try:
+        sources.append((
+            apps.get_model('LittleLemonAPI', 'ArchivedOrder'),
+            apps.get_model('LittleLemonAPI', 'ArchivedOrderItem'),
+        ))
+    except LookupError:
+        # Migrations older than the archive tables
+        pass
+    daily = apps.get_model('LittleLemonAPI', 'DailySales')
+    crew = apps.get_model('LittleLemonAPI', 'CrewDeliveryStats')
+    items = apps.get_model('LittleLemonAPI', 'MenuItemSales')
+
+    days = defaultdict(lambda: {'orders': 0, 'revenue': Decimal('0')})
+    crews = defaultdict(lambda: {'assigned': 0, 'delivered': 0})
+    sold = defaultdict(lambda: {'quantity': 0, 'revenue': Decimal('0')})
+    with transaction.atomic():
+        for Order, OrderItem in sources:
+            for row in Order.objects.order_by().values('date').annotate(orders=Count('id'), revenue=Sum('total')):
+                days[row['date']]['orders'] += row['orders']
+                days[row['date']]['revenue'] += row['revenue']
+            for row in (
+                Order.objects.filter(delivery_crew__isnull=False).order_by()
+                .values('delivery_crew')
+                .annotate(assigned=Count('id'), delivered=Count('id', filter=Q(status=True)))
+            ):
+                crews[row['delivery_crew']]['assigned'] += row['assigned']
+                crews[row['delivery_crew']]['delivered'] += row['delivered']
+            for row in OrderItem.objects.order_by().values('menuitem').annotate(
+                quantity=Sum('quantity'), revenue=Sum('price')
+            ):
+                sold[row['menuitem']]['quantity'] += row['quantity']
+                sold[row['menuitem']]['revenue'] += row['revenue']
+
+        for model in (daily, crew, items):
+            model.objects.all().delete()
+        daily.objects.bulk_create(daily(date=day, **totals) for day, totals in days.items())
+        crew.objects.bulk_create(crew(crew_id=crew_id, **totals) for crew_id, totals in crews.items())
+        items.objects.bulk_create(items(menuitem_id=menuitem_id, **totals) for menuitem_id, totals in sold.items())
@@ -0,0 +1,112 @@
+"""
+Little Lemon Role Resolution
+
+Every permission decision in the API comes down to whether the
+requesting user is in the Manager or Delivery Crew group. Rather
+than asking the database each time, a user's group names are
+loaded once, remembered on the user instance for the rest of the
+request, and shared between requests through the default cache.
+
+Membership changes made through the group views (or anywhere else
+that touches `User.groups`) invalidate the shared entry. The default
+cache must be shared by all worker processes (see CACHES in
+settings), otherwise the other workers keep a removed Manager's
+permissions until their entry expires.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+MANAGER = 'Manager'
+DELIVERY_CREW = 'Delivery Crew'
+
+ROLES_CACHE_TIMEOUT = getattr(settings, 'ROLES_CACHE_TIMEOUT', 300)
+
+_REQUEST_ATTRIBUTE = '_littlelemon_roles'
+
+
+def _cache_key(user_id):
+    return f'littlelemon:roles:{user_id}'
+
+
+def get_roles(user):
+    """
+    Returns the frozenset of group names the user belongs to
+
+    Lookup order is the user instance (per request), then the
+    shared cache (across requests), then a single query.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(user, _REQUEST_ATTRIBUTE, None)
+    if roles is None:
+        key = _cache_key(user.pk)
+        roles = cache.get(key)
+        if roles is None:
+            # Read from the primary, see `replicas`
+            roles = frozenset(user.groups.using(DEFAULT_DB_ALIAS).values_list('name', flat=True))
+            cache.set(key, roles, ROLES_CACHE_TIMEOUT)
+        setattr(user, _REQUEST_ATTRIBUTE, roles)
+    return roles
+
+
+async def aget_roles(user):
+    """
+    Async counterpart of `get_roles` for the native async views
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(user, _REQUEST_ATTRIBUTE, None)
+    if roles is None:
+        key = _cache_key(user.pk)
+        roles = await cache.aget(key)
+        if roles is None:
+            roles = frozenset([
+                name async for name in user.groups.using(DEFAULT_DB_ALIAS).values_list('name', flat=True)
+            ])
+            await cache.aset(key, roles, ROLES_CACHE_TIMEOUT)
+        setattr(user, _REQUEST_ATTRIBUTE, roles)
+    return roles
+
+
+def get_cached_roles(user_id):
+    """
+    The shared cache entry for a user's roles, without querying
+    """
+    return cache.get(_cache_key(user_id))
+
+
+async def aget_cached_roles(user_id):
+    return await cache.aget(_cache_key(user_id))
+
+
+def remember_roles(user, roles):
+    """
+    Seeds the per-request roles of a user instance
+    """
+    setattr(user, _REQUEST_ATTRIBUTE, roles)
+
+
+def is_manager(user):
+    return MANAGER in get_roles(user)
+
+
+def is_delivery_crew(user):
+    return DELIVERY_CREW in get_roles(user)
+
+
+def invalidate_roles(*users):
+    """
+    Forgets the cached roles of the given users (instances or pks)
+    """
+    keys = []
+    for user in users:
+        if hasattr(user, 'pk'):
+            user.__dict__.pop(_REQUEST_ATTRIBUTE, None)
+            user = user.pk
+        keys.append(_cache_key(user))
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,125 @@
+"""
+Little Lemon Row Serializers
+
+Rendering a list through a ModelSerializer builds a model instance
+per row and then walks every declared field's `get_attribute` and
+`to_representation` for it, which dominates CPU time on the hot list
+endpoints. A RowSerializer is compiled once from an existing
+read serializer into a plain function that turns a `.values()` row
+dict into the same output dict:
+
+    categories = RowSerializer(CategorySerializer)
+    categories.many(Category.objects.values(*categories.values_fields))
+
+Field types whose representation is the database value (ids,
+booleans, integers, text) are copied straight across. Other fields
+(decimals, dates) go through the declared field's own
+`to_representation`, so the output stays identical. Nested
+serializers become nested dicts read from `relation__field` columns.
+
+List views opt in with `RowListMixin` and a `row_serializer`. Setting
+FAST_READ_SERIALIZERS = False sends them back through the model
+serializers.
+
+Only declared fields are supported; a serializer using something
+else (method fields, many=True nesting) fails when compiled.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+STREAM_CHUNK_SIZE = 2000
+
+PASS_THROUGH = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+    PrimaryKeyRelatedField,
+)
+
+
+class RowSerializer:
+    """
+    Serializes `.values()` rows exactly like `serializer_class`
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.values_fields = []
+        self.converters = {}
+        source = self.compile_fields(serializer_class(), prefix='')
+        namespace = dict(self.converters)
+        exec(f'def serialize(row):\n    return {source}\n', namespace)
+        self.serialize = namespace['serialize']
+
+    def column(self, name):
+        if name not in self.values_fields:
+            self.values_fields.append(name)
+        return f'row[{name!r}]'
+
+    def compile_fields(self, serializer, prefix):
+        items = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            items.append(f'{name!r}: {self.compile_field(field, prefix)}')
+        return '{' + ', '.join(items) + '}'
+
+    def compile_field(self, field, prefix):
+        unsupported = (
+            field.source == '*'
+            or isinstance(field, (serializers.ListSerializer, ManyRelatedField))
+            or isinstance(field, RelatedField) and not isinstance(field, PrimaryKeyRelatedField)
+        )
+        if unsupported:
+            raise ImproperlyConfigured(
+                f'{self.serializer_class.__name__}.{field.field_name} cannot be read from values() rows'
+            )
+        column = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.BaseSerializer):
+            nested = self.compile_fields(field, f'{column}__')
+            return f'({nested} if {self.column(column)} is not None else None)'
+        value = self.column(column)
+        if isinstance(field, PASS_THROUGH):
+            return value
+        converter = f'_{len(self.converters)}'
+        self.converters[converter] = field.to_representation
+        return f'({converter}({value}) if {value} is not None else None)'
+
+    def many(self, rows):
+        serialize = self.serialize
+        return [serialize(row) for row in rows]
+
+    def iterate(self, rows):
+        """ Lazy `many`, for streaming """
+        serialize = self.serialize
+        for row in rows:
+            yield serialize(row)
+
+
+class RowListMixin:
+    """
+    Renders `list` from values() rows through `row_serializer`
+
+    Filtering and pagination run on the values() queryset exactly as
+    they would on the model queryset.
+    """
+    row_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        if self.row_serializer is None or not getattr(settings, 'FAST_READ_SERIALIZERS', True):
+            return super().list(request, *args, **kwargs)
+
+        rows = self.row_serializer
+        queryset = self.filter_queryset(self.get_queryset()).values(*rows.values_fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.many(page))
+        if getattr(self, 'stream_mode', None) == 'all':
+            # Rendered as it is read, see `streaming`
+            return Response(rows.iterate(queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)))
+        return Response(rows.many(queryset))
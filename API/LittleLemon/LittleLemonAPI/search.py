@@ -0,0 +1,76 @@
+"""
+Little Lemon Menu Search
+
+Ranked prefix search over menu item and category titles, backed by
+the `littlelemonapi_menuitem_fts` SQLite FTS5 table. Migration 0003
+creates the table and the triggers that keep it in sync with
+MenuItem and Category writes, including bulk and raw SQL ones.
+
+Plugs into the usual `?search=` parameter. Every word of the query
+must prefix-match a word of the item or category title. Results come
+back best match first unless the request also asks for `?ordering=`.
+Databases without the index fall back to the icontains search of
+the stock SearchFilter.
+"""
+
+import re
+from django.db import connections
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+FTS_TABLE = 'littlelemonapi_menuitem_fts'
+
+_WORD = re.compile(r'\w+')
+_fts_available = {}
+
+
+def has_fts_index(connection):
+    """
+    Whether the FTS table exists on this connection (checked once)
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    if connection.alias not in _fts_available:
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        _fts_available[connection.alias] = FTS_TABLE in tables
+    return _fts_available[connection.alias]
+
+
+def build_match_expression(terms):
+    """
+    Turns search terms into an FTS5 MATCH expression of quoted prefixes
+
+    Only word characters survive, so user input can never inject FTS
+    query syntax. Returns None when nothing searchable is left.
+    """
+    words = [word for term in terms for word in _WORD.findall(term)]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class MenuSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter that answers from the FTS index when it exists
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not has_fts_index(connections[queryset.db]):
+            return super().filter_queryset(request, queryset, view)
+
+        match = build_match_expression(terms)
+        if match is None:
+            return queryset
+
+        table = queryset.model._meta.db_table
+        queryset = queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'{FTS_TABLE}.rank'},
+        )
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('search_rank', 'id')
+        return queryset
@@ -1,8 +1,28 @@
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
-from .models import Category, MenuItem, Cart, Order, OrderItem
+from .models import Category, MenuItem, Cart, Order, OrderItem, ArchivedOrder, ArchivedOrderItem, DailySales, CrewDeliveryStats, MenuItemSales, OrderEvent
 from django.contrib.auth.models import User
-from datetime import date
+from .row_serializers import RowSerializer
+
+
+class EagerLoadingMixin:
+    """
+    Declares the relations a serializer walks when rendering
+
+    Views pass their querysets through `setup_eager_loading` so the
+    related rows arrive with a fixed number of queries per page
+    instead of one query per row.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
 
 
 class CategorySerializer(ModelSerializer):
@@ -12,8 +32,9 @@ class CategorySerializer(ModelSerializer):
         fields = ['id','title']
 
 
-class MenuItemSerializer(ModelSerializer):
+class MenuItemSerializer(EagerLoadingMixin, ModelSerializer):
     """ Menu Item Serializer """
+    select_related_fields = ['category']
     category_id = serializers.IntegerField(write_only=True)
     category = CategorySerializer(read_only=True)
 
@@ -22,8 +43,9 @@ class MenuItemSerializer(ModelSerializer):
         fields = ['id', 'title', 'featured', 'price', 'category', 'category_id']
 
 
-class CartSerializer(ModelSerializer):
+class CartSerializer(EagerLoadingMixin, ModelSerializer):
     """ Cart Serializer """
+    select_related_fields = ['menuitem']
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
     unit_price = serializers.ReadOnlyField(source='menuitem.price')
     price = serializers.DecimalField(6, 2, read_only=True)
@@ -65,8 +87,78 @@ class CartSerializer(ModelSerializer):
     
 
 
+class CartLineSerializer(serializers.Serializer):
+    """ One {menuitem, quantity} pair of a batch Cart upsert """
+    menuitem = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, max_value=32767)
+
+
+class CartBatchSerializer(serializers.ListSerializer):
+    """
+    Upserts many Cart lines in one request
+
+    Prices for every menu item in the batch are fetched with a
+    single query, and all lines are written with one bulk
+    INSERT ... ON CONFLICT DO UPDATE on the (menuitem, user)
+    unique constraint, so an item already in the cart has its
+    quantity replaced rather than raising an IntegrityError.
+    When a menu item appears more than once, the last line wins.
+    """
+    child = CartLineSerializer()
+    max_lines = 100
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('No cart lines were provided')
+        if len(attrs) > self.max_lines:
+            raise serializers.ValidationError(
+                f'At most {self.max_lines} cart lines may be sent at once'
+            )
+        quantities = {line['menuitem']: line['quantity'] for line in attrs}
+        self.prices = dict(
+            MenuItem.objects.filter(pk__in=quantities).values_list('pk', 'price')
+        )
+        missing = sorted(set(quantities) - set(self.prices))
+        if missing:
+            raise serializers.ValidationError(
+                f'Menu items {missing} do not exist'
+            )
+        return [
+            {'menuitem': menuitem, 'quantity': quantity}
+            for menuitem, quantity in quantities.items()
+        ]
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        lines = [
+            Cart(
+                user=user,
+                menuitem_id=line['menuitem'],
+                quantity=line['quantity'],
+                unit_price=self.prices[line['menuitem']],
+                price=self.prices[line['menuitem']] * line['quantity'])
+            for line in validated_data
+        ]
+        Cart.objects.bulk_create(
+            lines,
+            update_conflicts=True,
+            unique_fields=['menuitem', 'user'],
+            update_fields=['quantity', 'unit_price', 'price'],
+        )
+        return CartSerializer.setup_eager_loading(
+            Cart.objects.filter(user=user, menuitem_id__in=self.prices)
+        )
+
+
 class OrderSerializer(ModelSerializer):
-    """ Order Serializer """
+    """
+    Order Serializer
+
+    The POST request should have no payload. The total and
+    date are supplied by `OrdersView.perform_create` when it
+    checks out the user's Cart. The rest have defaults: a new
+    order is open and unassigned whatever the client sends.
+    """
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
     total = serializers.DecimalField(6, 2, read_only=True)
     date = serializers.DateField(read_only=True)
@@ -74,21 +166,37 @@ class OrderSerializer(ModelSerializer):
     class Meta:
         model = Order
         fields = ['id', 'user', 'delivery_crew', 'status', 'total', 'date']
-    
-    def create(self, validated_data):
-        """
-        Create an Order on POST from user's Cart
+        read_only_fields = ['delivery_crew', 'status']
 
-        The POST request should have no payload. The
-        Order attributes derive from the existing Cart.
-        The rest have defaults.
-        """
 
-        user = self.context['request'].user
-        cart = Cart.objects.filter(user=user)
-        total = sum((item.price for item in cart))
-        order = Order.objects.create(user=user, total=total, date=date.today())
-        return order
+class DispatchSerializer(serializers.Serializer):
+    """
+    Batch of orders to dispatch
+
+    Either name the `orders` or let the oldest `limit` unassigned
+    open orders be picked.
+    """
+    orders = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=500
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=50)
+
+
+class MembershipSerializer(serializers.Serializer):
+    """
+    Users to add to or remove from a group
+
+    Either one `username` or a batch of `usernames`.
+    """
+    username = serializers.CharField(required=False)
+    usernames = serializers.ListField(
+        child=serializers.CharField(), required=False, allow_empty=False, max_length=100
+    )
+
+    def validate(self, attrs):
+        if ('username' in attrs) == ('usernames' in attrs):
+            raise serializers.ValidationError('Provide either a username or a list of usernames')
+        return attrs
 
 
 class OrderItemSerializer(ModelSerializer):
@@ -98,7 +206,9 @@ class OrderItemSerializer(ModelSerializer):
         fields = ['menuitem', 'quantity', 'unit_price', 'price']
 
 
-class OrderDetailSerializer(ModelSerializer):
+class OrderDetailSerializer(EagerLoadingMixin, ModelSerializer):
+    """ Order with its Order Items """
+    prefetch_related_fields = ['orderitem_set']
     items = OrderItemSerializer(many=True, read_only=True, source='orderitem_set')
 
     class Meta:
@@ -106,6 +216,23 @@ class OrderDetailSerializer(ModelSerializer):
         fields = ['id', 'status', 'date', 'total', 'user', 'delivery_crew', 'items']
 
 
+class ArchivedOrderItemSerializer(ModelSerializer):
+    """ Archived Order Item, shaped like OrderItemSerializer """
+    class Meta:
+        model = ArchivedOrderItem
+        fields = ['menuitem', 'quantity', 'unit_price', 'price']
+
+
+class ArchivedOrderDetailSerializer(EagerLoadingMixin, ModelSerializer):
+    """ Archived Order, shaped like OrderDetailSerializer """
+    prefetch_related_fields = ['items']
+    items = ArchivedOrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedOrder
+        fields = ['id', 'status', 'date', 'total', 'user', 'delivery_crew', 'items']
+
+
 class UserSerializer(ModelSerializer):
     """
     Display users generically
@@ -113,3 +240,50 @@ class UserSerializer(ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email']
+
+
+class DailySalesSerializer(ModelSerializer):
+    """ Revenue Report Row """
+    class Meta:
+        model = DailySales
+        fields = ['date', 'orders', 'revenue']
+
+
+class CrewDeliveryStatsSerializer(EagerLoadingMixin, ModelSerializer):
+    """ Delivery Crew Report Row """
+    select_related_fields = ['crew']
+    username = serializers.ReadOnlyField(source='crew.username')
+    open = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CrewDeliveryStats
+        fields = ['crew', 'username', 'assigned', 'delivered', 'open']
+
+    def get_open(self, stats):
+        return stats.assigned - stats.delivered
+
+
+class MenuItemSalesSerializer(EagerLoadingMixin, ModelSerializer):
+    """ Top Selling Menu Items Report Row """
+    select_related_fields = ['menuitem']
+    title = serializers.ReadOnlyField(source='menuitem.title')
+
+    class Meta:
+        model = MenuItemSales
+        fields = ['menuitem', 'title', 'quantity', 'revenue']
+
+
+class OrderEventSerializer(ModelSerializer):
+    """ Order Change pushed by the order event feed """
+    order = serializers.IntegerField(source='order_id')
+    delivery_crew = serializers.IntegerField(source='delivery_crew_id')
+
+    class Meta:
+        model = OrderEvent
+        fields = ['id', 'order', 'kind', 'status', 'delivery_crew', 'created']
+
+
+# Compiled read paths for the hot list endpoints (see `row_serializers`)
+category_rows = RowSerializer(CategorySerializer)
+menu_item_rows = RowSerializer(MenuItemSerializer)
+order_rows = RowSerializer(OrderSerializer)
@@ -0,0 +1,85 @@
+"""
+Little Lemon Signal Handlers
+
+Keeps the caches derived from the models in step with writes.
+Connected in `LittlelemonapiConfig.ready`.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import revoke_credentials, token_cache
+from .menu_cache import bump_menu_version
+from .models import Category, MenuItem
+from .pricing import reprice_item
+from .roles import invalidate_roles
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drops cached roles for every user whose group membership changed
+
+    `reverse` is True when the change was made from the Group side
+    (`group.user_set.add(...)`), in which case `pk_set` holds user ids.
+    Clearing a group's members is caught before it happens so the
+    affected users are still known.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_roles(instance)
+        return
+    if action in ('post_add', 'post_remove'):
+        user_ids = list(pk_set)
+    elif action == 'pre_clear':
+        user_ids = list(instance.user_set.values_list('pk', flat=True))
+    else:
+        return
+    invalidate_roles(*user_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """
+    Revokes cached tokens of a changed or deleted user in every worker
+
+    The new version is published once the change is committed, so no
+    worker can re-resolve the token from the old row under it.
+    """
+    user_id = instance.pk
+    token_cache.discard_users(user_id)
+    transaction.on_commit(lambda: revoke_credentials(user_id))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """
+    Revokes a deleted token in every worker
+    """
+    user_id = instance.user_id
+    token_cache.discard(instance.key)
+    transaction.on_commit(lambda: revoke_credentials(user_id))
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def menu_changed(sender, **kwargs):
+    """
+    Invalidates cached menu responses once the change is committed
+    """
+    transaction.on_commit(bump_menu_version)
+
+
+@receiver(post_save, sender=MenuItem)
+def menu_item_saved(sender, instance, created, update_fields, **kwargs):
+    """
+    Reprices open carts holding a menu item whose price may have changed
+    """
+    if created or update_fields is not None and 'price' not in update_fields:
+        return
+    reprice_item(instance)
@@ -0,0 +1,67 @@
+"""
+Little Lemon SQLite Backend
+
+The stock sqlite3 backend with the connection tuned for a busy API:
+
+    ENGINE: "LittleLemonAPI.sqlite"
+
+Every new connection runs these pragmas:
+
+    journal_mode = WAL       readers no longer wait for the writer,
+                             and the writer no longer waits for them
+    synchronous = NORMAL     fsync at checkpoints only, which is
+                             still crash safe in WAL mode
+    cache_size = -32000      32 MB page cache per connection
+    mmap_size = 128 MB       reads are served from the page cache
+                             without copying
+    temp_store = MEMORY      sorts and temp indexes stay in memory
+    busy_timeout = 5000      wait up to 5 s for a lock, not fail
+
+Transactions start with BEGIN IMMEDIATE, so the write lock is taken
+when `transaction.atomic()` is entered. A deferred transaction that
+reads and then writes cannot always be retried by busy_timeout and
+fails with "database is locked" instead.
+
+Override pragmas or the transaction mode in OPTIONS:
+
+    "OPTIONS": {"pragmas": {"cache_size": -64000}, "transaction_mode": "DEFERRED"}
+
+Pair this backend with CONN_MAX_AGE so the tuned connections, and
+their warm page caches, are reused across requests.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -32000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop('pragmas', {})}
+        self.transaction_mode = params.pop('transaction_mode', 'IMMEDIATE').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}"
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,177 @@
+"""
+Little Lemon Streaming Responses
+
+JSONRenderer and XMLRenderer build the whole document in memory
+before the first byte goes out. The renderers here behave exactly
+like them, and can also render a list response incrementally: the
+envelope first, then list items in batches as they are serialized.
+
+List views mixing in StreamingListMixin send a StreamingHttpResponse
+when asked with `?stream=`:
+
+    ?stream=1     the usual page, streamed; `page_size` may go up
+                  to STREAM_MAX_PAGE_SIZE (default 10000)
+    ?stream=all   every row, unpaginated, as a bare list
+
+With `?stream=all`, views using `RowListMixin` hand the renderer a
+generator reading values() rows through `QuerySet.iterator`. Memory
+then stays bounded from the database cursor to the socket. Streamed
+JSON is never indented. Renderers that cannot stream (the browsable
+API) get the data as a plain list.
+"""
+
+from io import StringIO
+from types import GeneratorType
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.xmlutils import SimplerXMLGenerator
+from rest_framework import renderers
+from rest_framework.response import Response
+from rest_framework_xml.renderers import XMLRenderer
+
+STREAM_MAX_PAGE_SIZE = getattr(settings, 'STREAM_MAX_PAGE_SIZE', 10000)
+STREAM_BATCH_SIZE = 500
+
+STREAMABLE = (list, tuple, GeneratorType)
+
+
+def batched(items, size=STREAM_BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class StreamingJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer that can also write a list response piece by piece
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, GeneratorType):
+            data = list(data)
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def render_stream(self, data):
+        encode = self.encoder_class(
+            ensure_ascii=self.ensure_ascii, allow_nan=not self.strict,
+            separators=renderers.SHORT_SEPARATORS if self.compact else renderers.LONG_SEPARATORS,
+        ).encode
+
+        def chunk(text):
+            return text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+        def items(values):
+            yield b'['
+            separator = ''
+            for batch in batched(values):
+                yield chunk(separator + ','.join(encode(item) for item in batch))
+                separator = ','
+            yield b']'
+
+        if isinstance(data, STREAMABLE):
+            yield from items(data)
+            return
+        yield b'{'
+        for index, (key, value) in enumerate(data.items()):
+            yield chunk((',' if index else '') + encode(key) + ':')
+            if isinstance(value, STREAMABLE):
+                yield from items(value)
+            else:
+                yield chunk(encode(value))
+        yield b'}'
+
+
+class Buffer(StringIO):
+    """ Write target the XML generator is drained from between batches """
+
+    def drain(self):
+        text = self.getvalue()
+        self.seek(0)
+        self.truncate()
+        return text.encode(XMLRenderer.charset)
+
+
+class StreamingXMLRenderer(XMLRenderer):
+    """
+    XMLRenderer that can also write a list response piece by piece
+    """
+
+    def _to_xml(self, xml, data):
+        if isinstance(data, GeneratorType):
+            data = list(data)
+        super()._to_xml(xml, data)
+
+    def render_stream(self, data):
+        buffer = Buffer()
+        xml = SimplerXMLGenerator(buffer, self.charset)
+        xml.startDocument()
+        xml.startElement(self.root_tag_name, {})
+
+        def items(values):
+            for batch in batched(values):
+                self._to_xml(xml, batch)
+                yield buffer.drain()
+
+        if isinstance(data, STREAMABLE):
+            yield from items(data)
+        else:
+            for key, value in data.items():
+                xml.startElement(key, {})
+                if isinstance(value, STREAMABLE):
+                    yield from items(value)
+                else:
+                    self._to_xml(xml, value)
+                xml.endElement(key)
+        xml.endElement(self.root_tag_name)
+        xml.endDocument()
+        yield buffer.drain()
+
+
+class StreamingListMixin:
+    """
+    Streams list responses requested with `?stream=1` or `?stream=all`
+    """
+    stream_query_param = 'stream'
+
+    @property
+    def stream_mode(self):
+        value = self.request.query_params.get(self.stream_query_param, '').lower()
+        if value == 'all':
+            return 'all'
+        if value in ('1', 'true', 'yes'):
+            return 'page'
+        return None
+
+    @property
+    def paginator(self):
+        paginator = super().paginator
+        if paginator is not None and self.stream_mode == 'page':
+            paginator.max_page_size = STREAM_MAX_PAGE_SIZE
+        return paginator
+
+    def paginate_queryset(self, queryset):
+        if self.stream_mode == 'all':
+            return None
+        return super().paginate_queryset(queryset)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if not isinstance(response, Response) or self.stream_mode is None:
+            return response
+        renderer = getattr(response, 'accepted_renderer', None)
+        if response.status_code != 200 or not hasattr(renderer, 'render_stream'):
+            return response
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        streaming = StreamingHttpResponse(renderer.render_stream(response.data), content_type=content_type)
+        for header, value in response.items():
+            if header.lower() != 'content-type':
+                streaming[header] = value
+        return streaming
@@ -0,0 +1,75 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User, Group
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .archive import archive_orders
+from .models import Category, MenuItem, Order, OrderItem, ArchivedOrder, ArchivedOrderItem, DailySales
+from .reporting import rebuild_summaries
+from .roles import MANAGER, DELIVERY_CREW
+from .testing import reset_caches
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.ana = User.objects.create_user('Ana')
+        self.mario = User.objects.create_user('Mario')
+        self.sana = User.objects.create_user('Sana')
+        Group.objects.create(name=MANAGER).user_set.add(self.sana)
+        Group.objects.create(name=DELIVERY_CREW).user_set.add(self.mario)
+        category = Category.objects.create(slug='mains', title='Mains')
+        self.items = MenuItem.objects.bulk_create(
+            MenuItem(title=f'Item {i}', price=Decimal('4.00'), featured=False, category=category)
+            for i in range(3)
+        )
+        # Delivered in June, delivered in July, open in June
+        self.orders = Order.objects.bulk_create([
+            Order(user=self.jon, delivery_crew=self.mario, status=True, total=8, date=f'2023-06-{day:02}')
+            for day in range(1, 8)
+        ] + [
+            Order(user=self.jon, delivery_crew=self.mario, status=True, total=8, date='2023-07-20'),
+            Order(user=self.ana, status=False, total=8, date='2023-06-01'),
+        ])
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, menuitem=item, quantity=1, unit_price=item.price, price=item.price)
+            for order in self.orders for item in self.items[:2]
+        )
+        rebuild_summaries()
+
+    def test_moves_old_delivered_orders_in_batches(self):
+        summaries = list(DailySales.objects.order_by('date').values_list('date', 'orders', 'revenue'))
+        # Per batch: savepoint, 7 statements, release
+        with self.assertNumQueries(9 * 3):
+            moved = archive_orders(30, batch_size=3, today=date(2023, 7, 25))
+        self.assertEqual(moved, 7)
+        self.assertEqual(set(ArchivedOrder.objects.values_list('pk', flat=True)),
+                         {order.pk for order in self.orders[:7]})
+        self.assertEqual(ArchivedOrderItem.objects.count(), 14)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(OrderItem.objects.count(), 4)
+
+        rebuild_summaries()
+        self.assertEqual(list(DailySales.objects.order_by('date').values_list('date', 'orders', 'revenue')), summaries)
+
+    def test_order_detail_reads_the_archive(self):
+        order = self.orders[0]
+        client = APIClient()
+        client.force_authenticate(self.jon)
+        live = client.get(f'/api/orders/{order.pk}').data
+        call_command('archive_orders', days=30, stdout=StringIO())
+        self.assertFalse(Order.objects.filter(pk=order.pk).exists())
+
+        for user, expected in ((self.jon, 200), (self.mario, 200), (self.sana, 200), (self.ana, 403)):
+            with self.subTest(user=user.username):
+                reset_caches()
+                client.force_authenticate(User.objects.get(pk=user.pk))
+                response = client.get(f'/api/orders/{order.pk}')
+                self.assertEqual(response.status_code, expected)
+                if expected == 200:
+                    self.assertEqual(response.data, live)
+        client.force_authenticate(self.sana)
+        self.assertEqual(client.get('/api/orders/999').status_code, 404)
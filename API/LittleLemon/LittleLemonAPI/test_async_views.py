@@ -0,0 +1,86 @@
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User, Group
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from . import async_views
+from .models import Category, MenuItem, Cart, Order
+from .roles import MANAGER
+from .testing import reset_caches
+
+
+class AsyncReadViewTest(TestCase):
+    """ The async endpoints must answer exactly like the sync ones """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sana = User.objects.create_user('Sana')
+        cls.jon = User.objects.create_user('Jon')
+        Group.objects.create(name=MANAGER).user_set.add(cls.sana)
+        desserts = Category.objects.create(slug='desserts', title='Desserts')
+        mains = Category.objects.create(slug='mains', title='Mains')
+        for i in range(7):
+            MenuItem.objects.create(title=f'Lemon Dish {i}', price=Decimal(10 - i),
+                                    featured=i == 0, category=desserts if i % 2 else mains)
+        cls.item = MenuItem.objects.first()
+        Cart.objects.create(user=cls.jon, menuitem=cls.item, quantity=2,
+                            unit_price=cls.item.price, price=cls.item.price * 2)
+        for day in range(1, 8):
+            Order.objects.create(user=cls.jon, total=5, date=f'2023-07-0{day}')
+        cls.tokens = {user: Token.objects.create(user=user).key for user in (cls.sana, cls.jon)}
+
+    def setUp(self):
+        reset_caches()
+
+    def native_get(self, path, user=None, **headers):
+        if user:
+            headers['Authorization'] = f'Token {self.tokens[user]}'
+        return async_to_sync(self.async_client.get)(path, headers=headers)
+
+    def compare(self, path, user=None):
+        headers = {'HTTP_AUTHORIZATION': f'Token {self.tokens[user]}'} if user else {}
+        sync = self.client.get(f'/api/{path}', HTTP_ACCEPT='application/json', **headers)
+        reset_caches()
+        native = self.native_get(f'/api/{path}', user)
+        self.assertEqual(native.resolver_match.func.view_class.__module__, async_views.__name__, path)
+        self.assertEqual(native.status_code, sync.status_code, path)
+        self.assertEqual(native.json(), sync.json(), path)
+
+    def test_responses_match_sync_views(self):
+        self.compare('menu-categories')
+        self.compare('menu-items')
+        self.compare('menu-items?page=2&page_size=3&ordering=-price')
+        self.compare('menu-items?category=Desserts')
+        self.compare('menu-items?search=lem dish&page=2')
+        self.compare(f'menu-items/{self.item.pk}')
+        self.compare('menu-items/999')
+        self.compare('cart/menu-items', self.jon)
+        self.compare('cart/menu-items')
+        self.compare('orders', self.sana)
+        self.compare('orders?page=2', self.jon)
+        self.compare('orders?page=9', self.jon)
+
+    async def test_served_natively_under_asgi(self):
+        response = await self.async_client.get(
+            '/api/orders', headers={'Authorization': f'Token {self.tokens[self.jon]}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 7)
+
+    def test_other_requests_are_handed_to_the_drf_views(self):
+        browsable = self.native_get('/api/menu-items', Accept='text/html')
+        self.assertEqual(browsable.status_code, 200)
+        self.assertTrue(browsable['Content-Type'].startswith('text/html'))
+        cursor = self.native_get('/api/orders?pagination=cursor', self.jon)
+        self.assertEqual(cursor.status_code, 200)
+        self.assertIn('next', cursor.json())
+        self.assertNotIn('count', cursor.json())
+        streamed = self.native_get('/api/menu-items?stream=1')
+        self.assertEqual(streamed.status_code, 200)
+        self.assertTrue(streamed.streaming)
+        created = async_to_sync(self.async_client.post)(
+            '/api/menu-categories', {'title': 'Drinks'},
+            headers={'Authorization': f'Token {self.tokens[self.sana]}'},
+        )
+        self.assertEqual(created.status_code, 201)
+        self.assertTrue(Category.objects.filter(title='Drinks').exists())
@@ -0,0 +1,99 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User, Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .authentication import TokenCache
+from .roles import MANAGER, get_roles
+from .testing import reset_caches
+
+
+class TokenCacheTest(TestCase):
+    def setUp(self):
+        self.sana = User.objects.create_user('Sana')
+
+    def test_least_recently_used_entry_is_evicted(self):
+        tokens = TokenCache(timeout=60, maxsize=2)
+        tokens.set('a', self.sana)
+        tokens.set('b', self.sana)
+        tokens.get('a')
+        tokens.set('c', self.sana)
+        self.assertIsNotNone(tokens.get('a'))
+        self.assertIsNone(tokens.get('b'))
+
+    def test_entries_expire(self):
+        tokens = TokenCache(timeout=-1)
+        tokens.set('a', self.sana)
+        self.assertIsNone(tokens.get('a'))
+
+    def test_callers_get_copies(self):
+        tokens = TokenCache()
+        tokens.set('a', self.sana)
+        tokens.get('a').first_name = 'Changed'
+        self.assertEqual(tokens.get('a').first_name, '')
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.managers = Group.objects.create(name=MANAGER)
+        self.sana = User.objects.create_user('Sana')
+        self.managers.user_set.add(self.sana)
+        self.token = Token.objects.create(user=self.sana)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def native_get(self, path):
+        return async_to_sync(self.async_client.get)(path, headers={'Authorization': f'Token {self.token.key}'})
+
+    def count_queries(self, path, get=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = (get or self.client.get)(path)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_warm_token_skips_token_and_group_queries(self):
+        for get in (self.client.get, self.native_get):
+            reset_caches()
+            cold = self.count_queries('/api/orders', get)
+            self.assertEqual(self.count_queries('/api/orders', get), cold - 2)
+
+    def test_deleted_token_is_rejected(self):
+        self.count_queries('/api/orders')
+        Token.objects.filter(user=self.sana).delete()
+        self.assertEqual(self.client.get('/api/orders').status_code, 401)
+        self.assertEqual(self.native_get('/api/orders').status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.count_queries('/api/orders')
+        self.sana.is_active = False
+        self.sana.save()
+        self.assertEqual(self.client.get('/api/orders').status_code, 401)
+
+    def test_revocation_reaches_other_workers(self):
+        worker = TokenCache()
+        worker.set(self.token.key, self.sana)
+        self.assertIsNotNone(worker.get(self.token.key))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sana.is_active = False
+            self.sana.save()
+        self.assertIsNone(worker.get(self.token.key))
+
+        worker.set('other', User.objects.get(pk=self.sana.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            Token.objects.filter(user=self.sana).delete()
+        self.assertIsNone(worker.get('other'))
+
+    def test_roles_are_read_from_the_shared_cache(self):
+        worker = TokenCache()
+        worker.set(self.token.key, self.sana)
+        self.assertIn(MANAGER, get_roles(worker.get(self.token.key)))
+        self.managers.user_set.remove(self.sana)
+        self.assertNotIn(MANAGER, get_roles(worker.get(self.token.key)))
+
+    def test_group_change_is_seen(self):
+        self.client.get('/api/groups/manager/users')
+        self.managers.user_set.remove(self.sana)
+        self.assertEqual(self.client.get('/api/groups/manager/users').status_code, 403)
@@ -0,0 +1,53 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from .models import Category, MenuItem, Cart, Order, OrderItem
+from .benchmark import SCENARIOS, Runner, compare_serializers, percentile, uncovered_patterns
+from .testing import reset_caches
+
+
+class BenchmarkTest(TestCase):
+    def test_every_route_has_a_scenario(self):
+        self.assertEqual(uncovered_patterns(SCENARIOS), [])
+
+    def test_percentile_is_nearest_rank(self):
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([3], 95), 3)
+
+    def test_seeded_run_has_no_errors(self):
+        reset_caches()
+        call_command('seed_littlelemon', categories=3, menu_items=30, users=20, managers=1,
+                     delivery_crew=2, orders=40, cart_users=2, stdout=StringIO())
+        report = Runner(requests=2, warmup=0).run()
+        for name, route in report['routes'].items():
+            with self.subTest(route=name):
+                self.assertEqual(route['errors'], 0)
+                self.assertEqual(route['requests'], 2)
+
+    def test_flush_removes_only_seeded_rows(self):
+        seed = dict(categories=3, menu_items=30, users=20, managers=1,
+                    delivery_crew=2, orders=40, cart_users=2, stdout=StringIO())
+        jon = User.objects.create_user('Jon')
+        drinks = Category.objects.create(slug='drinks', title='Drinks')
+        lemonade = MenuItem.objects.create(title='Lemonade', price=3, featured=False, category=drinks)
+        Cart.objects.create(user=jon, menuitem=lemonade, quantity=1, unit_price=3, price=3)
+        call_command('seed_littlelemon', **seed)
+        seeded_item = MenuItem.objects.filter(category__slug__startswith='seed_').first()
+        order = Order.objects.create(user=jon, total=3, date='2023-07-01')
+        OrderItem.objects.create(order=order, menuitem=seeded_item, quantity=1, unit_price=3, price=3)
+
+        call_command('seed_littlelemon', flush=True, **seed)
+        self.assertTrue(Cart.objects.filter(user=jon, menuitem=lemonade).exists())
+        self.assertTrue(OrderItem.objects.filter(order=order, menuitem=seeded_item).exists())
+        self.assertEqual(User.objects.filter(username__startswith='seed_').count(), 23)
+
+    def test_serializer_comparison_reports_every_case(self):
+        call_command('seed_littlelemon', categories=3, menu_items=30, users=20, managers=1,
+                     delivery_crew=2, orders=40, cart_users=2, stdout=StringIO())
+        report = compare_serializers(rows=20, repeat=1)
+        self.assertEqual(sorted(report), ['category', 'menu-item', 'order'])
+        self.assertEqual(report['order']['rows'], 20)
+        self.assertGreater(report['order']['serialize_ms_per_1k']['speedup'], 0)
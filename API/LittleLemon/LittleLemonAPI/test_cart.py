@@ -0,0 +1,39 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .models import Category, MenuItem, Cart
+from .testing import reset_caches
+
+
+class CartBatchTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.client = APIClient()
+        self.client.force_authenticate(self.jon)
+        category = Category.objects.create(slug='mains', title='Mains')
+        self.pasta = MenuItem.objects.create(title='Pasta', price=Decimal('8.00'), featured=False, category=category)
+        self.salad = MenuItem.objects.create(title='Salad', price=Decimal('5.50'), featured=False, category=category)
+
+    def test_batch_upserts_lines(self):
+        Cart.objects.create(user=self.jon, menuitem=self.pasta, quantity=1,
+                            unit_price=self.pasta.price, price=self.pasta.price)
+        lines = [
+            {'menuitem': self.pasta.pk, 'quantity': 3},
+            {'menuitem': self.salad.pk, 'quantity': 2},
+        ]
+        with self.assertNumQueries(3):
+            response = self.client.post('/api/cart/menu-items', lines, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 2)
+        cart = {line.menuitem_id: line for line in Cart.objects.filter(user=self.jon)}
+        self.assertEqual(cart[self.pasta.pk].quantity, 3)
+        self.assertEqual(cart[self.pasta.pk].price, Decimal('24.00'))
+        self.assertEqual(cart[self.salad.pk].price, Decimal('11.00'))
+
+    def test_batch_rejects_unknown_menu_items(self):
+        lines = [{'menuitem': self.pasta.pk, 'quantity': 1}, {'menuitem': 999, 'quantity': 1}]
+        response = self.client.post('/api/cart/menu-items', lines, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Cart.objects.exists())
@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User, Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from .dispatch import assign_least_loaded
+from .models import Order, CrewDeliveryStats
+from .reporting import rebuild_summaries
+from .roles import MANAGER, DELIVERY_CREW
+from .testing import reset_caches
+
+
+class LeastLoadedTest(TestCase):
+    def test_fills_the_least_loaded_first(self):
+        assignments = assign_least_loaded(range(1, 7), [(3, 10), (0, 11), (1, 12)])
+        self.assertEqual(assignments, {1: 11, 2: 11, 3: 12, 4: 11, 5: 12, 6: 10})
+
+
+class DispatchTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.sana = User.objects.create_user('Sana')
+        self.mario = User.objects.create_user('Mario')
+        self.luigi = User.objects.create_user('Luigi')
+        Group.objects.create(name=MANAGER).user_set.add(self.sana)
+        Group.objects.create(name=DELIVERY_CREW).user_set.add(self.mario, self.luigi)
+        # Mario already has two open orders
+        Order.objects.bulk_create(
+            Order(user=self.jon, delivery_crew=self.mario, total=10, date='2023-07-01')
+            for _ in range(2)
+        )
+        self.open = Order.objects.bulk_create(
+            Order(user=self.jon, total=10, date=f'2023-07-{day:02}') for day in range(2, 12)
+        )
+        rebuild_summaries()
+        self.client = APIClient()
+        self.client.force_authenticate(self.sana)
+
+    def test_dispatch_evens_out_open_orders(self):
+        response = self.client.post('/api/orders/dispatch', {'limit': 6}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['assigned']), 6)
+        # Oldest orders first, Luigi catches up before Mario gets more
+        self.assertEqual(
+            [row['order'] for row in response.data['assigned']],
+            [order.pk for order in self.open[:6]],
+        )
+        open_orders = {
+            stats.crew_id: stats.assigned - stats.delivered
+            for stats in CrewDeliveryStats.objects.all()
+        }
+        self.assertEqual(open_orders, {self.mario.pk: 4, self.luigi.pk: 4})
+        stats = list(CrewDeliveryStats.objects.order_by('crew_id').values_list())
+        rebuild_summaries()
+        self.assertEqual(stats, list(CrewDeliveryStats.objects.order_by('crew_id').values_list()))
+
+    def test_named_orders_skip_assigned_ones(self):
+        assigned = Order.objects.filter(delivery_crew=self.mario).first()
+        orders = [self.open[0].pk, assigned.pk]
+        response = self.client.post('/api/orders/dispatch', {'orders': orders}, format='json')
+        self.assertEqual([row['order'] for row in response.data['assigned']], [self.open[0].pk])
+        self.assertEqual(response.data['skipped'], [assigned.pk])
+        self.assertEqual(Order.objects.get(pk=assigned.pk).delivery_crew, self.mario)
+
+    def test_query_count_independent_of_batch_size(self):
+        self.client.post('/api/orders/dispatch', {'limit': 1}, format='json')
+        counts = []
+        for limit in (1, 8):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post('/api/orders/dispatch', {'limit': limit}, format='json')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_requires_manager(self):
+        client = APIClient()
+        client.force_authenticate(self.jon)
+        self.assertEqual(client.post('/api/orders/dispatch', {}, format='json').status_code, 403)
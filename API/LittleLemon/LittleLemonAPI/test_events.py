@@ -0,0 +1,125 @@
+import json
+import time
+from django.contrib.auth.models import User, Group
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .events import ORDER_EVENTS_WSGI_LONG_POLL, bell
+from .models import Category, MenuItem, Cart, Order, OrderEvent
+from .roles import MANAGER, DELIVERY_CREW
+from .testing import reset_caches
+
+
+class OrderEventsTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.ana = User.objects.create_user('Ana')
+        self.sana = User.objects.create_user('Sana')
+        self.mario = User.objects.create_user('Mario')
+        Group.objects.create(name=MANAGER).user_set.add(self.sana)
+        Group.objects.create(name=DELIVERY_CREW).user_set.add(self.mario)
+        self.tokens = {
+            user.pk: Token.objects.create(user=user).key
+            for user in (self.jon, self.ana, self.sana, self.mario)
+        }
+        self.client = APIClient()
+
+    def as_user(self, user):
+        self.client.force_authenticate(User.objects.get(pk=user.pk))
+        return self.client
+
+    def poll(self, user, query='after=0&wait=0'):
+        reset_caches()
+        response = self.client.get(f'/api/orders/events?{query}',
+                                   HTTP_AUTHORIZATION=f'Token {self.tokens[user.pk]}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def checkout(self, user):
+        category = Category.objects.get_or_create(slug='mains', title='Mains')[0]
+        item = MenuItem.objects.create(title=f'Pasta {user}', price=8, featured=False, category=category)
+        Cart.objects.create(user=user, menuitem=item, quantity=1, unit_price=8, price=8)
+        response = self.as_user(user).post('/api/orders')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_order_writes_publish_events(self):
+        order = self.checkout(self.jon)
+        self.as_user(self.sana).patch(f'/api/orders/{order}', {'delivery_crew': 'Mario'}, format='json')
+        self.as_user(self.mario).patch(f'/api/orders/{order}', {'status': True}, format='json')
+        # No change, no event
+        self.as_user(self.mario).patch(f'/api/orders/{order}', {'status': True}, format='json')
+        self.assertEqual(
+            list(OrderEvent.objects.order_by('id').values_list('order_id', 'kind', 'delivery_crew_id', 'status')),
+            [(order, 'created', None, False), (order, 'assigned', self.mario.pk, False),
+             (order, 'status', self.mario.pk, True)],
+        )
+
+    def test_dispatch_publishes_assignments(self):
+        orders = Order.objects.bulk_create(
+            Order(user=self.ana, total=10, date='2023-07-01') for _ in range(3)
+        )
+        response = self.as_user(self.sana).post('/api/orders/dispatch', {'limit': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(OrderEvent.objects.values_list('order_id', 'user_id', 'delivery_crew_id', 'kind')),
+            [(order.pk, self.ana.pk, self.mario.pk, 'assigned') for order in orders],
+        )
+
+    def test_feed_shows_only_visible_orders(self):
+        jons = self.checkout(self.jon)
+        anas = self.checkout(self.ana)
+        self.as_user(self.sana).patch(f'/api/orders/{anas}', {'delivery_crew': 'Mario'}, format='json')
+
+        visible = lambda user: [(event['order'], event['kind']) for event in self.poll(user)['events']]
+        self.assertEqual(visible(self.jon), [(jons, 'created')])
+        self.assertEqual(visible(self.ana), [(anas, 'created'), (anas, 'assigned')])
+        self.assertEqual(visible(self.mario), [(anas, 'assigned')])
+        self.assertEqual(len(visible(self.sana)), 3)
+
+    def test_long_poll_cursor(self):
+        self.checkout(self.jon)
+        last = OrderEvent.objects.get().id
+        self.assertEqual(self.poll(self.jon, 'wait=0'), {'events': [], 'last_id': last})
+        self.assertEqual(self.poll(self.jon, f'after={last}&wait=0'), {'events': [], 'last_id': last})
+        self.assertEqual(self.poll(self.jon)['last_id'], last)
+
+        reset_caches()
+        response = self.client.get('/api/orders/events?after=soon',
+                                   HTTP_AUTHORIZATION=f'Token {self.tokens[self.jon.pk]}')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/orders/events').status_code, 401)
+
+    def test_event_stream_falls_back_to_long_poll_under_wsgi(self):
+        self.checkout(self.jon)
+        response = self.client.get('/api/orders/events?after=0&wait=0', HTTP_ACCEPT='text/event-stream',
+                                   HTTP_AUTHORIZATION=f'Token {self.tokens[self.jon.pk]}')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(len(response.json()['events']), 1)
+
+    def test_long_poll_is_capped_under_wsgi(self):
+        started = time.monotonic()
+        self.assertEqual(self.poll(self.jon, 'wait=60')['events'], [])
+        self.assertLess(time.monotonic() - started, ORDER_EVENTS_WSGI_LONG_POLL + 1)
+
+    async def test_event_stream(self):
+        first = await OrderEvent.objects.acreate(order_id=1, user_id=self.jon.pk, kind='created', status=False)
+        await OrderEvent.objects.acreate(order_id=2, user_id=self.ana.pk, kind='created', status=False)
+        response = await self.async_client.get('/api/orders/events', headers={
+            'Authorization': f'Token {self.tokens[self.jon.pk]}',
+            'Accept': 'text/event-stream',
+            'Last-Event-ID': '0',
+        })
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        self.assertEqual(await anext(chunks), b'retry: 1000\nid: 0\n\n')
+
+        lines = (await anext(chunks)).decode().splitlines()
+        self.assertEqual(lines[:2], [f'id: {first.id}', 'event: order'])
+        self.assertEqual(json.loads(lines[2][len('data: '):])['order'], 1)
+
+        pushed = await OrderEvent.objects.acreate(order_id=3, user_id=self.jon.pk, kind='created', status=False)
+        bell.ring()
+        self.assertTrue((await anext(chunks)).startswith(f'id: {pushed.id}\n'.encode()))
+        await chunks.aclose()
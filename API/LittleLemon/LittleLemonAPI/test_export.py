@@ -0,0 +1,73 @@
+import csv
+import json
+from decimal import Decimal
+from django.contrib.auth.models import User, Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from .models import Category, MenuItem, Order, OrderItem
+from .roles import MANAGER
+from .testing import explain_query_plan, reset_caches
+
+
+class OrderExportTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.sana = User.objects.create_user('Sana')
+        Group.objects.create(name=MANAGER).user_set.add(self.sana)
+        category = Category.objects.create(slug='mains', title='Mains')
+        items = MenuItem.objects.bulk_create(
+            MenuItem(title=f'Item {i}', price=Decimal('2.50'), featured=False, category=category)
+            for i in range(3)
+        )
+        self.orders = Order.objects.bulk_create(
+            Order(user=self.jon, total=Decimal('5.00') * lines, date=f'2023-07-0{lines + 1}')
+            for lines in range(4)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, menuitem=item, quantity=2, unit_price=item.price, price=item.price * 2)
+            for lines, order in enumerate(self.orders) for item in items[:lines]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.sana)
+
+    def export(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_nests_items_under_orders(self):
+        records = [json.loads(line) for line in self.export('/api/orders/export.ndjson').splitlines()]
+        self.assertEqual([record['id'] for record in records], [order.pk for order in self.orders])
+        self.assertEqual([len(record['items']) for record in records], [0, 1, 2, 3])
+        self.assertEqual(records[1]['total'], '5.00')
+        self.assertEqual(records[1]['date'], '2023-07-02')
+        self.assertEqual(records[1]['items'][0]['price'], '5.00')
+
+    def test_csv_has_a_line_per_item(self):
+        rows = list(csv.DictReader(self.export('/api/orders/export.csv?from=2023-07-02').splitlines()))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['order'], str(self.orders[1].pk))
+        self.assertEqual(rows[0]['quantity'], '2')
+
+    def test_order_without_items_is_exported(self):
+        rows = list(csv.DictReader(self.export('/api/orders/export.csv?to=2023-07-01').splitlines()))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['menuitem'], '')
+
+    def test_streamed_with_one_query_without_sorting(self):
+        self.export('/api/orders/export.csv')
+        with CaptureQueriesContext(connection) as queries:
+            self.export('/api/orders/export.ndjson')
+        self.assertEqual(len(queries), 1)
+        plan = explain_query_plan(queries[0]['sql'])
+        self.assertFalse([step for step in plan if 'TEMP B-TREE' in step], plan)
+
+    def test_unknown_format_and_permissions(self):
+        self.assertEqual(self.client.get('/api/orders/export.xlsx').status_code, 404)
+        client = APIClient()
+        client.force_authenticate(self.jon)
+        self.assertEqual(client.get('/api/orders/export.csv').status_code, 403)
@@ -0,0 +1,142 @@
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from . import menu_cache
+from .models import Category, MenuItem
+from .testing import reset_caches
+
+
+class MenuCacheTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.client = APIClient()
+        self.category = Category.objects.create(slug='desserts', title='Desserts')
+        self.item = MenuItem.objects.create(
+            title='Lemon Dessert', price=Decimal('4.50'), featured=True, category=self.category
+        )
+
+    def test_repeat_reads_skip_database(self):
+        first = self.client.get('/api/menu-items')
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/menu-items')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_conditional_get_returns_not_modified(self):
+        etag = self.client.get(f'/api/menu-items/{self.item.pk}')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/menu-items/{self.item.pk}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_menu_change_invalidates_cache(self):
+        etag = self.client.get('/api/menu-categories')['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.category.title = 'Sweets'
+            self.category.save()
+            # Not before the change is committed
+            self.assertEqual(self.client.get('/api/menu-categories')['ETag'], etag)
+        for callback in callbacks:
+            callback()
+        response = self.client.get('/api/menu-categories', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['title'], 'Sweets')
+
+    def test_menu_change_in_another_worker_invalidates_cache(self):
+        etag = self.client.get('/api/menu-categories')['ETag']
+        # A separate backend instance stands in for another process
+        with mock.patch.object(menu_cache, 'cache', caches.create_connection('default')):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.category.title = 'Sweets'
+                self.category.save()
+        response = self.client.get('/api/menu-categories', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class MenuQueryCountTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def list_queries(self):
+        reset_caches()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/menu-items')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def add_items(self, count):
+        for i in range(count):
+            category = Category.objects.create(slug=f'c{i}', title=f'Category {i}')
+            MenuItem.objects.create(
+                title=f'Item {i}', price=Decimal('1.00'), featured=False, category=category
+            )
+
+    def test_menu_item_page_has_fixed_query_count(self):
+        self.add_items(1)
+        one = self.list_queries()
+        self.add_items(4)
+        self.assertEqual(self.list_queries(), one)
+
+
+class MenuPaginationTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.client = APIClient()
+        category = Category.objects.create(slug='mains', title='Mains')
+        for i, price in enumerate(['9.00', '3.00', '5.00', '3.00', '7.00', '1.00', '5.00']):
+            MenuItem.objects.create(
+                title=f'Item {i}', price=Decimal(price), featured=False, category=category
+            )
+
+    def test_page_size_is_selectable(self):
+        response = self.client.get('/api/menu-items?page_size=7')
+        self.assertEqual(len(response.data['results']), 7)
+
+    def test_cursor_mode_walks_all_items_in_price_order(self):
+        url = '/api/menu-items?pagination=cursor&page_size=3&category=Mains'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            seen.extend(response.data['results'])
+            url = response.data['next']
+        expected = list(MenuItem.objects.order_by('price', 'id').values_list('id', flat=True))
+        self.assertEqual([item['id'] for item in seen], expected)
+
+
+class MenuSearchTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.client = APIClient()
+        desserts = Category.objects.create(slug='desserts', title='Desserts')
+        mains = Category.objects.create(slug='mains', title='Mains')
+        self.lemon = MenuItem.objects.create(title='Lemon Dessert', price=Decimal('4.50'), featured=True, category=desserts)
+        self.cake = MenuItem.objects.create(title='Cheesecake', price=Decimal('6.00'), featured=False, category=desserts)
+        self.fish = MenuItem.objects.create(title='Grilled Fish', price=Decimal('12.00'), featured=False, category=mains)
+
+    def search(self, term):
+        reset_caches()
+        response = self.client.get('/api/menu-items', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_prefix_search_over_titles_and_categories(self):
+        self.assertEqual(self.search('lem'), [self.lemon.pk])
+        self.assertEqual(self.search('dess'), [self.lemon.pk, self.cake.pk])
+        self.assertEqual(self.search('gril ma'), [self.fish.pk])
+        self.assertEqual(self.search('"*'), [self.lemon.pk, self.cake.pk, self.fish.pk])
+
+    def test_index_follows_writes(self):
+        self.fish.title = 'Seared Salmon'
+        self.fish.save()
+        Category.objects.filter(title='Mains').update(title='Entrees')
+        self.assertEqual(self.search('salm entr'), [self.fish.pk])
+        self.assertEqual(self.search('grilled'), [])
+        self.fish.delete()
+        self.assertEqual(self.search('salmon'), [])
@@ -0,0 +1,185 @@
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User, Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from .models import Category, MenuItem, Cart, Order, OrderItem
+from .roles import MANAGER, DELIVERY_CREW
+from .testing import reset_caches
+from .views import OrderItemsView
+
+
+class CheckoutTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.client = APIClient()
+        self.client.force_authenticate(self.jon)
+        category = Category.objects.create(slug='mains', title='Mains')
+        self.items = MenuItem.objects.bulk_create(
+            MenuItem(title=f'Item {i}', price=Decimal('2.50'), featured=False, category=category)
+            for i in range(20)
+        )
+
+    def fill_cart(self, lines):
+        Cart.objects.bulk_create(
+            Cart(user=self.jon, menuitem=item, quantity=2,
+                 unit_price=item.price, price=item.price * 2)
+            for item in self.items[:lines]
+        )
+
+    def checkout(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/orders')
+        self.assertEqual(response.status_code, 201)
+        return response, len(queries)
+
+    def test_checkout_moves_cart_into_order(self):
+        self.fill_cart(3)
+        response, _ = self.checkout()
+        order = Order.objects.get(pk=response.data['id'])
+        self.assertEqual(order.total, Decimal('15.00'))
+        self.assertEqual(response.data['total'], '15.00')
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 3)
+        self.assertFalse(Cart.objects.filter(user=self.jon).exists())
+
+    def test_checkout_query_count_independent_of_cart_size(self):
+        self.fill_cart(1)
+        _, small = self.checkout()
+        self.fill_cart(20)
+        _, large = self.checkout()
+        self.assertEqual(small, large)
+
+    def test_checkout_ignores_status_and_delivery_crew(self):
+        crew = User.objects.create_user('Mario')
+        self.fill_cart(1)
+        response = self.client.post(
+            '/api/orders', {'status': True, 'delivery_crew': crew.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data['id'])
+        self.assertFalse(order.status)
+        self.assertIsNone(order.delivery_crew_id)
+
+    def test_order_detail_has_fixed_query_count(self):
+        sana = User.objects.create_user('Sana')
+        Group.objects.create(name=MANAGER).user_set.add(sana)
+        counts = []
+        for lines in (1, 10):
+            order = Order.objects.create(user=self.jon, total=0, date='2023-07-01')
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, menuitem=item, quantity=1,
+                          unit_price=item.price, price=item.price)
+                for item in self.items[:lines]
+            )
+            reset_caches()
+            self.client.force_authenticate(User.objects.get(pk=sana.pk))
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(f'/api/orders/{order.pk}')
+            self.assertEqual(len(response.data['items']), lines)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class OrderCursorPaginationTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.client = APIClient()
+        self.client.force_authenticate(self.jon)
+        # More rows on one date than DRF's offset_cutoff of 1000
+        Order.objects.bulk_create(
+            Order(user=self.jon, total=i, date='2023-07-02') for i in range(1300)
+        )
+        Order.objects.bulk_create(
+            Order(user=self.jon, total=i, date='2023-07-01') for i in range(50)
+        )
+
+    def walk(self, url, link):
+        seen, pages = [], 0
+        while url:
+            reset_caches()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse([q['sql'] for q in queries if 'OFFSET' in q['sql']])
+            seen.extend(order['id'] for order in response.data['results'])
+            url = response.data[link]
+            pages += 1
+        return seen, pages
+
+    def test_cursor_walks_rows_sharing_a_date(self):
+        expected = list(Order.objects.order_by('-date', '-id').values_list('id', flat=True))
+        seen, pages = self.walk('/api/orders?pagination=cursor&page_size=100', 'next')
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 14)
+
+    def test_previous_links_walk_back(self):
+        url = '/api/orders?pagination=cursor&page_size=100'
+        for _ in range(13):
+            reset_caches()
+            url = self.client.get(url).data['next']
+        reset_caches()
+        last = self.client.get(url).data
+        seen, _ = self.walk(last['previous'], 'previous')
+        expected = list(Order.objects.order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(sorted(seen), sorted(expected[:1300]))
+        self.assertEqual(len(seen), len(set(seen)))
+
+
+class OrderTransitionTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        jon = User.objects.create_user('Jon')
+        self.sana = User.objects.create_user('Sana')
+        self.ali = User.objects.create_user('Ali')
+        self.bo = User.objects.create_user('Bo')
+        Group.objects.create(name=MANAGER).user_set.add(self.sana)
+        Group.objects.create(name=DELIVERY_CREW).user_set.add(self.ali, self.bo)
+        self.order = Order.objects.create(user=jon, delivery_crew=self.ali, total=0, date='2023-07-01')
+        self.client = APIClient()
+
+    def patch(self, user, data):
+        self.client.force_authenticate(User.objects.get(pk=user.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/api/orders/{self.order.pk}', data, format='json')
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "LittleLemonAPI_order"')]
+        return response, updates
+
+    def concurrently(self, **changes):
+        """ Applies `changes` right after the view has read the order """
+        get_object = OrderItemsView.get_object
+
+        def stale_get_object(view):
+            order = get_object(view)
+            Order.objects.filter(pk=order.pk).update(**changes)
+            return order
+        return mock.patch.object(OrderItemsView, 'get_object', stale_get_object)
+
+    def test_status_update_writes_one_column(self):
+        response, updates = self.patch(self.ali, {'status': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['status'])
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "status" = ', updates[0])
+        self.assertIn('"delivery_crew_id" = ', updates[0].split('WHERE')[1])
+
+    def test_status_update_conflicts_with_reassignment(self):
+        with self.concurrently(delivery_crew=self.bo):
+            response, _ = self.patch(self.ali, {'status': True})
+        self.assertEqual(response.status_code, 409)
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.delivery_crew_id, self.order.status), (self.bo.pk, False))
+
+    def test_assignment_conflicts_with_status_change(self):
+        with self.concurrently(status=True):
+            response, _ = self.patch(self.sana, {'delivery_crew': 'Bo'})
+        self.assertEqual(response.status_code, 409)
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.delivery_crew_id, self.order.status), (self.ali.pk, True))
+
+        response, _ = self.patch(self.sana, {'delivery_crew': 'Bo'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['delivery_crew'], self.bo.pk)
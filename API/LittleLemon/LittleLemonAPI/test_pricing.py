@@ -0,0 +1,58 @@
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User, Group
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .models import Category, MenuItem, Cart
+from .roles import MANAGER
+from .testing import reset_caches
+
+
+class CartRepricingTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.ana = User.objects.create_user('Ana')
+        category = Category.objects.create(slug='mains', title='Mains')
+        self.pasta = MenuItem.objects.create(title='Pasta', price=Decimal('8.00'), featured=False, category=category)
+        self.salad = MenuItem.objects.create(title='Salad', price=Decimal('5.50'), featured=False, category=category)
+        for user, quantity in ((self.jon, 2), (self.ana, 3)):
+            for item in (self.pasta, self.salad):
+                Cart.objects.create(user=user, menuitem=item, quantity=quantity,
+                                    unit_price=item.price, price=item.price * quantity)
+
+    def prices(self, item):
+        return sorted(Cart.objects.filter(menuitem=item).values_list('quantity', 'unit_price', 'price'))
+
+    def test_price_change_reprices_carts(self):
+        sana = User.objects.create_user('Sana')
+        Group.objects.create(name=MANAGER).user_set.add(sana)
+        client = APIClient()
+        client.force_authenticate(sana)
+        response = client.patch(f'/api/menu-items/{self.pasta.pk}', {'price': '9.25'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.prices(self.pasta), [
+            (2, Decimal('9.25'), Decimal('18.50')),
+            (3, Decimal('9.25'), Decimal('27.75')),
+        ])
+        self.assertEqual(self.prices(self.salad)[0], (2, Decimal('5.50'), Decimal('11.00')))
+
+    def test_unrelated_saves_do_not_reprice(self):
+        Cart.objects.filter(menuitem=self.pasta).update(unit_price=Decimal('1.00'))
+        self.pasta.title = 'Penne'
+        self.pasta.save(update_fields=['title'])
+        self.assertEqual(self.prices(self.pasta)[0][1], Decimal('1.00'))
+
+    def test_command_reprices_stale_lines(self):
+        MenuItem.objects.update(price=Decimal('10.00'))
+        out = StringIO()
+        with self.assertNumQueries(1):
+            call_command('reprice_carts', stdout=out)
+        self.assertIn('Repriced 4 cart lines', out.getvalue())
+        self.assertEqual(self.prices(self.salad), [
+            (2, Decimal('10.00'), Decimal('20.00')),
+            (3, Decimal('10.00'), Decimal('30.00')),
+        ])
+        call_command('reprice_carts', stdout=out)
+        self.assertIn('Repriced 0 cart lines', out.getvalue())
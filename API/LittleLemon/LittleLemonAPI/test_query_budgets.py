@@ -0,0 +1,77 @@
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import resolve
+from . import views
+from .benchmark import SCENARIOS, Actors, Runner, build_context, read_body
+from .testing import QueryBudgetTestMixin, reset_caches
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    """ Every benchmark scenario must stay within its view's budget """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_littlelemon', categories=4, menu_items=40, users=30, managers=2,
+                     delivery_crew=3, orders=120, cart_users=3, stdout=StringIO())
+
+    def test_routes_within_query_budget(self):
+        runner = Runner(requests=1, warmup=0)
+        ctx = build_context(Actors.load())
+        for scenario in SCENARIOS:
+            with self.subTest(scenario=scenario.name):
+                # Warm up once for per-process setup, then measure with
+                # cold caches as the worst case
+                for _ in range(2):
+                    if scenario.prepare:
+                        scenario.prepare(ctx)
+                    path = scenario.path(ctx) if callable(scenario.path) else scenario.path
+                    runner.request(scenario, ctx)
+                if scenario.prepare:
+                    scenario.prepare(ctx)
+                urlconf = settings.ASGI_URLCONF if scenario.asgi else None
+                view_class = resolve(path.split('?')[0], urlconf).func.view_class
+                reset_caches()
+                with self.assertQueryBudget(view_class, scenario.method):
+                    response, _, _ = runner.request(scenario, ctx)
+                self.assertIn(response.status_code, scenario.expect)
+
+    def test_middleware_reports_queries_in_headers(self):
+        reset_caches()
+        with self.settings(QUERY_BUDGET_ENABLED=True,
+                           MIDDLEWARE=['LittleLemonAPI.query_budget.QueryBudgetMiddleware']):
+            response = self.client.get('/api/menu-items')
+        self.assertEqual(response['X-Query-View'], 'MenuItemsListView')
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertEqual(response['X-Query-Duplicates'], '0')
+        self.assertEqual(response['X-Query-Budget'], '2')
+
+    def test_middleware_measures_async_views(self):
+        reset_caches()
+        with self.settings(QUERY_BUDGET_ENABLED=True,
+                           MIDDLEWARE=['LittleLemonAPI.async_views.NativeRoutesMiddleware',
+                                       'LittleLemonAPI.query_budget.QueryBudgetMiddleware']):
+            response = async_to_sync(self.async_client.get)('/api/menu-items')
+        self.assertEqual(response.resolver_match.func.view_class.__module__, 'LittleLemonAPI.async_views')
+        self.assertEqual(response['X-Query-View'], 'MenuItemsListView')
+        self.assertEqual(response['X-Query-Count'], '2')
+
+    def test_middleware_counts_queries_of_streamed_bodies(self):
+        self.client.force_login(User.objects.filter(groups__name='Manager').first())
+        with self.settings(QUERY_BUDGET_ENABLED=True,
+                           MIDDLEWARE=['django.contrib.sessions.middleware.SessionMiddleware',
+                                       'django.contrib.auth.middleware.AuthenticationMiddleware',
+                                       'LittleLemonAPI.query_budget.QueryBudgetMiddleware']), \
+                mock.patch.object(views.OrderExportView, 'query_budget', {'GET': 0}), \
+                self.assertLogs('LittleLemonAPI.query_budget', 'WARNING') as logs:
+            response = self.client.get('/api/orders/export.csv')
+            self.assertEqual(logs.output, [])
+            read_body(response)
+        # The rows are read while the body is sent, after the headers
+        before_body = int(response['X-Query-Count'])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn(f'ran {before_body + 1} queries, over its budget of 0', logs.output[0])
@@ -0,0 +1,39 @@
+from datetime import date
+from django.contrib.auth.models import User, Group
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .models import Order
+from .roles import MANAGER, DELIVERY_CREW
+from .testing import QueryPlanTestMixin, reset_caches
+
+
+class OrderListPlanTest(QueryPlanTestMixin, TestCase):
+    """ Every role's order listing must be served from an index """
+
+    def setUp(self):
+        reset_caches()
+        self.client = APIClient()
+        self.sana = User.objects.create_user('Sana')
+        self.adrian = User.objects.create_user('Adrian')
+        self.jon = User.objects.create_user('Jon')
+        Group.objects.create(name=MANAGER).user_set.add(self.sana)
+        Group.objects.create(name=DELIVERY_CREW).user_set.add(self.adrian)
+        Order.objects.bulk_create(
+            Order(user=self.jon, delivery_crew=self.adrian if day % 2 else None,
+                  status=day % 3 == 0, total=10, date=date(2023, 7, day))
+            for day in range(1, 29)
+        )
+
+    def list_plans(self, user, params):
+        reset_caches()
+        self.client.force_authenticate(User.objects.get(pk=user.pk))
+        def get():
+            response = self.client.get('/api/orders', params)
+            self.assertEqual(response.status_code, 200)
+        return self.capture_plans(Order._meta.db_table, get)
+
+    def test_role_list_queries_use_indexes(self):
+        for user in (self.sana, self.adrian, self.jon):
+            for params in ({}, {'page': 2}, {'pagination': 'cursor'}):
+                with self.subTest(user=user.username, params=params):
+                    self.assertNoFullScan(Order._meta.db_table, self.list_plans(user, params))
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from . import replicas
+from .models import MenuItem
+from .replicas import PIN_COOKIE, ReplicaMiddleware, copy_database, read_from_primary
+from .testing import reset_caches
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTest(SimpleTestCase):
+    def setUp(self):
+        reset_caches()
+        self.factory = RequestFactory()
+        self.reads = []
+
+    def view(self, request, write=False):
+        self.reads.append(router.db_for_read(MenuItem))
+        if write:
+            router.db_for_write(MenuItem)
+            self.reads.append(router.db_for_read(MenuItem))
+        return HttpResponse()
+
+    def send(self, request, **kwargs):
+        self.reads = []
+        return ReplicaMiddleware(lambda request: self.view(request, **kwargs))(request)
+
+    def test_reads_of_safe_requests_use_one_replica(self):
+        response = self.send(self.factory.get('/api/menu-items'))
+        self.assertIn(self.reads[0], ('replica1', 'replica2'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_read(MenuItem), 'default')
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.send(self.factory.post('/api/orders', HTTP_AUTHORIZATION='Token abc'))
+        self.assertEqual(self.reads, ['default'])
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+
+        self.send(self.factory.get('/api/orders', HTTP_AUTHORIZATION='Token abc'))
+        self.assertEqual(self.reads, ['default'])
+        self.factory.cookies[PIN_COOKIE] = '1'
+        self.send(self.factory.get('/api/orders'))
+        self.assertEqual(self.reads, ['default'])
+
+    def test_token_pin_reaches_other_workers(self):
+        # A separate backend instance stands in for another process
+        with mock.patch.object(replicas, 'cache', caches.create_connection('default')):
+            self.send(self.factory.post('/api/orders', HTTP_AUTHORIZATION='Token abc'))
+        self.send(self.factory.get('/api/orders', HTTP_AUTHORIZATION='Token abc'))
+        self.assertEqual(self.reads, ['default'])
+
+    def test_reads_filling_shared_caches_use_the_primary(self):
+        def view(request):
+            self.reads.append(router.db_for_read(MenuItem))
+            with read_from_primary():
+                self.reads.append(router.db_for_read(MenuItem))
+            self.reads.append(router.db_for_read(MenuItem))
+            return HttpResponse()
+
+        ReplicaMiddleware(view)(self.factory.get('/api/menu-items'))
+        replica, primary, after = self.reads
+        self.assertEqual(primary, 'default')
+        self.assertNotEqual(replica, 'default')
+        self.assertEqual(after, replica)
+
+    def test_reads_after_a_write_use_the_primary(self):
+        response = self.send(self.factory.get('/api/menu-items'), write=True)
+        self.assertNotEqual(self.reads[0], 'default')
+        self.assertEqual(self.reads[1], 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    async def test_async_requests(self):
+        async def view(request):
+            self.reads = [await sync_to_async(router.db_for_read)(MenuItem)]
+            return HttpResponse()
+        await ReplicaMiddleware(view)(self.factory.get('/api/menu-items'))
+        self.assertIn(self.reads[0], ('replica1', 'replica2'))
+
+    def test_copy_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary, replica = os.path.join(directory, 'primary'), os.path.join(directory, 'replica')
+            with closing(sqlite3.connect(primary)) as db:
+                db.execute('CREATE TABLE lemon (id INTEGER)')
+                db.execute('INSERT INTO lemon VALUES (1)')
+                db.commit()
+            copy_database(primary, replica)
+            with closing(sqlite3.connect(replica)) as db:
+                self.assertEqual(db.execute('SELECT id FROM lemon').fetchall(), [(1,)])
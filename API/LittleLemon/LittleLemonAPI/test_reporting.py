@@ -0,0 +1,90 @@
+from decimal import Decimal
+from django.contrib.auth.models import User, Group
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .models import Category, MenuItem, Cart, DailySales, CrewDeliveryStats, MenuItemSales
+from .reporting import rebuild_summaries
+from .roles import MANAGER, DELIVERY_CREW
+from .testing import reset_caches
+
+
+def snapshot():
+    return (
+        sorted(DailySales.objects.values_list('date', 'orders', 'revenue')),
+        sorted(CrewDeliveryStats.objects.filter(assigned__gt=0)
+               .values_list('crew_id', 'assigned', 'delivered')),
+        sorted(MenuItemSales.objects.filter(quantity__gt=0)
+               .values_list('menuitem_id', 'quantity', 'revenue')),
+    )
+
+
+class SalesSummaryTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.sana = User.objects.create_user('Sana')
+        self.mario = User.objects.create_user('Mario')
+        self.luigi = User.objects.create_user('Luigi')
+        Group.objects.create(name=MANAGER).user_set.add(self.sana)
+        Group.objects.create(name=DELIVERY_CREW).user_set.add(self.mario, self.luigi)
+        category = Category.objects.create(slug='mains', title='Mains')
+        self.items = MenuItem.objects.bulk_create(
+            MenuItem(title=f'Item {i}', price=Decimal('2.50') * (i + 1), featured=False,
+                     category=category)
+            for i in range(4)
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=user.pk))
+        return client
+
+    def checkout(self, items, quantity):
+        Cart.objects.bulk_create(
+            Cart(user=self.jon, menuitem=item, quantity=quantity,
+                 unit_price=item.price, price=item.price * quantity)
+            for item in items
+        )
+        response = self.client_for(self.jon).post('/api/orders')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_summaries_follow_order_writes(self):
+        first = self.checkout(self.items[:3], 2)
+        second = self.checkout(self.items[1:], 1)
+        third = self.checkout(self.items[:1], 5)
+
+        manager = self.client_for(self.sana)
+        for order, crew in ((first, self.mario), (second, self.mario), (second, self.luigi), (third, self.mario)):
+            response = manager.patch(f'/api/orders/{order}', {'delivery_crew': crew.username})
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client_for(self.mario).patch(f'/api/orders/{first}', {'status': 1}).status_code, 200)
+        self.assertEqual(self.client_for(self.mario).patch(f'/api/orders/{third}', {'status': 'bad'}).status_code, 400)
+        self.assertEqual(manager.delete(f'/api/orders/{third}').status_code, 204)
+
+        incremental = snapshot()
+        rebuild_summaries()
+        self.assertEqual(incremental, snapshot())
+        self.assertEqual(
+            incremental[1],
+            sorted([(self.mario.pk, 1, 1), (self.luigi.pk, 1, 0)]),
+        )
+
+    def test_reports(self):
+        self.checkout(self.items[:2], 2)
+        order = self.checkout(self.items[1:2], 3)
+        self.client_for(self.sana).patch(f'/api/orders/{order}', {'delivery_crew': 'Mario'})
+
+        self.assertEqual(self.client_for(self.jon).get('/api/reports/daily-sales').status_code, 403)
+        manager = self.client_for(self.sana)
+        daily = manager.get('/api/reports/daily-sales').data['results']
+        self.assertEqual(len(daily), 1)
+        self.assertEqual((daily[0]['orders'], daily[0]['revenue']), (2, '30.00'))
+        self.assertEqual(manager.get('/api/reports/daily-sales?from=2000-01-01&to=2000-12-31').data['count'], 0)
+        self.assertEqual(manager.get('/api/reports/daily-sales?from=soon').status_code, 400)
+
+        crew = manager.get('/api/reports/delivery-crew').data['results']
+        self.assertEqual(crew, [{'crew': self.mario.pk, 'username': 'Mario', 'assigned': 1, 'delivered': 0, 'open': 1}])
+
+        top = manager.get('/api/reports/top-items').data['results']
+        self.assertEqual([(row['title'], row['quantity']) for row in top], [('Item 1', 5), ('Item 0', 2)])
@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User, Group
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .roles import MANAGER, DELIVERY_CREW, get_roles, is_delivery_crew, is_manager
+from .testing import reset_caches
+
+
+class RolesTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.managers = Group.objects.create(name=MANAGER)
+        Group.objects.create(name=DELIVERY_CREW)
+        self.sana = User.objects.create_user('Sana')
+        self.mario = User.objects.create_user('Mario')
+        self.managers.user_set.add(self.sana)
+
+    def test_roles_resolved_once_per_request(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(is_manager(self.sana))
+            self.assertEqual(get_roles(self.sana), {MANAGER})
+
+    def test_roles_shared_across_requests(self):
+        get_roles(self.sana)
+        fresh = User.objects.get(pk=self.sana.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_manager(fresh))
+
+    def test_group_views_invalidate_roles(self):
+        self.assertFalse(is_manager(User.objects.get(pk=self.mario.pk)))
+        client = APIClient()
+        client.force_authenticate(self.sana)
+        response = client.post('/api/groups/manager/users', {'username': 'Mario'})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(is_manager(User.objects.get(pk=self.mario.pk)))
+
+        response = client.delete(f'/api/groups/manager/users/{self.mario.pk}')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(is_manager(User.objects.get(pk=self.mario.pk)))
+
+
+class GroupMembershipTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        Group.objects.create(name=MANAGER).user_set.add(User.objects.create_user('Sana'))
+        self.crew = Group.objects.create(name=DELIVERY_CREW)
+        self.drivers = [User.objects.create_user(f'Driver {i}') for i in range(6)]
+        self.crew.user_set.add(self.drivers[0])
+        sana = User.objects.get(username='Sana')
+        get_roles(sana)
+        self.client = APIClient()
+        self.client.force_authenticate(sana)
+
+    def change(self, method, usernames):
+        send = getattr(self.client, method)
+        response = send('/api/groups/delivery-crew/users', {'usernames': usernames}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return {row['username']: row['result'] for row in response.data['results']}
+
+    def test_batch_add_and_remove(self):
+        names = [driver.username for driver in self.drivers]
+        for driver in self.drivers:
+            get_roles(driver)
+        with self.assertNumQueries(3):
+            results = self.change('post', names + ['Nobody'])
+        self.assertEqual(results, {
+            names[0]: 'already a member', **{name: 'added' for name in names[1:]}, 'Nobody': 'not found',
+        })
+        # Cached roles of every added user were dropped
+        self.assertTrue(all(is_delivery_crew(User.objects.get(pk=driver.pk)) for driver in self.drivers))
+
+        with self.assertNumQueries(2):
+            results = self.change('delete', names[:3] + ['Sana'])
+        self.assertEqual(results, {**{name: 'removed' for name in names[:3]}, 'Sana': 'not a member'})
+        self.assertEqual(set(self.crew.user_set.all()), set(self.drivers[3:]))
+        self.assertFalse(is_delivery_crew(User.objects.get(pk=self.drivers[0].pk)))
+
+    def test_single_user_responses(self):
+        response = self.client.post('/api/groups/delivery-crew/users', {'username': 'Driver 0'})
+        self.assertEqual((response.status_code, response.data), (200, 'User Driver 0 is already in Delivery Crew'))
+        response = self.client.post('/api/groups/delivery-crew/users', {'username': 'Nobody'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post('/api/groups/delivery-crew/users', {})
+        self.assertEqual(response.status_code, 400)
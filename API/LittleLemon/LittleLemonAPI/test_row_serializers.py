@@ -0,0 +1,79 @@
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User, Group
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .models import Category, MenuItem, Order
+from .roles import MANAGER
+from .row_serializers import RowSerializer
+from .serializers import (
+    CategorySerializer, MenuItemSerializer, OrderSerializer, CrewDeliveryStatsSerializer,
+    category_rows, menu_item_rows, order_rows,
+)
+from .testing import reset_caches
+
+
+class RowSerializerTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.jon = User.objects.create_user('Jon')
+        self.sana = User.objects.create_user('Sana')
+        Group.objects.create(name=MANAGER).user_set.add(self.sana)
+        categories = Category.objects.bulk_create(
+            Category(slug=f'c{i}', title=f'Lemon {i}') for i in range(3)
+        )
+        MenuItem.objects.bulk_create(
+            MenuItem(title=f'Lemon Item {i}', price=Decimal(i) + Decimal('0.5'), featured=i % 2 == 0,
+                     category=categories[i % 3])
+            for i in range(12)
+        )
+        Order.objects.bulk_create(
+            Order(user=self.jon, delivery_crew=self.sana if i % 2 else None, status=i % 3 == 0,
+                  total=Decimal('12.5') * i, date=f'2023-07-{i + 1:02}')
+            for i in range(12)
+        )
+
+    def test_rows_match_model_serializers(self):
+        for rows, serializer, queryset in (
+            (category_rows, CategorySerializer, Category.objects.order_by('id')),
+            (menu_item_rows, MenuItemSerializer, MenuItem.objects.order_by('id')),
+            (order_rows, OrderSerializer, Order.objects.order_by('id')),
+        ):
+            with self.subTest(serializer=serializer.__name__):
+                expected = serializer(queryset, many=True).data
+                self.assertEqual(rows.many(queryset.values(*rows.values_fields)), expected)
+
+    def test_list_endpoints_match_model_serializers(self):
+        client = APIClient()
+        token = Token.objects.create(user=self.sana).key
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+        def sync_get(path):
+            return client.get(path)
+
+        def native_get(path):
+            return async_to_sync(self.async_client.get)(path, headers={'Authorization': f'Token {token}'})
+
+        paths = [
+            (sync_get, '/api/menu-categories'), (sync_get, '/api/menu-items'),
+            (sync_get, '/api/menu-items?ordering=-price&page=2'), (sync_get, '/api/menu-items?search=lemon'),
+            (sync_get, '/api/menu-items?pagination=cursor'),
+            (sync_get, '/api/orders'), (sync_get, '/api/orders?pagination=cursor'),
+            (native_get, '/api/menu-categories'), (native_get, '/api/menu-items?search=lemon'),
+            (native_get, '/api/orders'),
+        ]
+        for get, path in paths:
+            with self.subTest(path=path, native=get is native_get):
+                reset_caches()
+                fast = get(path)
+                reset_caches()
+                with self.settings(FAST_READ_SERIALIZERS=False):
+                    slow = get(path)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, slow.content)
+
+    def test_method_fields_are_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            RowSerializer(CrewDeliveryStatsSerializer)
@@ -0,0 +1,27 @@
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from .models import Category
+
+
+def pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class TunedBackendTest(TestCase):
+    def test_connection_pragmas(self):
+        self.assertEqual(connection.vendor, 'sqlite')
+        self.assertEqual(pragma('synchronous'), 1)
+        self.assertEqual(pragma('cache_size'), -32000)
+        self.assertEqual(pragma('busy_timeout'), 5000)
+        self.assertEqual(pragma('temp_store'), 2)
+
+
+class ImmediateTransactionTest(TransactionTestCase):
+    def test_transactions_take_the_write_lock_up_front(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Category.objects.create(slug='mains', title='Mains')
+        self.assertEqual(queries.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
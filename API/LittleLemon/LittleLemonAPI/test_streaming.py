@@ -0,0 +1,69 @@
+import json
+from decimal import Decimal
+from django.contrib.auth.models import User, Group
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .models import Category, MenuItem, Order
+from .roles import MANAGER
+from .testing import reset_caches
+
+
+class StreamingTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.sana = User.objects.create_user('Sana')
+        Group.objects.create(name=MANAGER).user_set.add(self.sana)
+        category = Category.objects.create(slug='mains', title='Mains   & <Co>')
+        MenuItem.objects.bulk_create(
+            MenuItem(title=f'Item {i}', price=Decimal(i) + Decimal('0.25'), featured=False, category=category)
+            for i in range(30)
+        )
+        Order.objects.bulk_create(
+            Order(user=self.sana, total=Decimal('1.5') * i, date=f'2023-07-{i % 28 + 1:02}')
+            for i in range(700)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.sana)
+
+    def get(self, path, **kwargs):
+        reset_caches()
+        self.client.force_authenticate(User.objects.get(pk=self.sana.pk))
+        response = self.client.get(path, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return response, b''.join(response.streaming_content)
+        return response, response.content
+
+    def test_streamed_pages_match_rendered_pages(self):
+        for path in ('/api/orders?page=3', '/api/menu-items?page_size=20', '/api/menu-categories'):
+            for media_type in ('application/json', 'application/xml'):
+                with self.subTest(path=path, media_type=media_type):
+                    plain, expected = self.get(path, HTTP_ACCEPT=media_type)
+                    streamed, content = self.get(f'{path}&stream=1' if '?' in path else f'{path}?stream=1',
+                                                 HTTP_ACCEPT=media_type)
+                    self.assertFalse(plain.streaming)
+                    self.assertTrue(streamed.streaming)
+                    self.assertEqual(streamed['Content-Type'], plain['Content-Type'])
+                    # Page links keep the stream parameter
+                    self.assertEqual(content.replace(b'&amp;stream=1', b'').replace(b'&stream=1', b''), expected)
+
+    def test_streamed_pages_may_be_large(self):
+        _, content = self.get('/api/orders?stream=1&page_size=600')
+        self.assertEqual(len(json.loads(content)['results']), 600)
+        _, content = self.get('/api/orders?page_size=600')
+        self.assertEqual(len(json.loads(content)['results']), 100)
+
+    def test_stream_all_returns_every_row(self):
+        response, content = self.get('/api/orders?stream=all')
+        self.assertTrue(response.streaming)
+        orders = json.loads(content)
+        self.assertEqual(len(orders), 700)
+        self.assertEqual(orders[0]['id'], Order.objects.order_by('-date', '-id').first().pk)
+
+        _, content = self.get('/api/menu-items?stream=all&ordering=-price', HTTP_ACCEPT='application/xml')
+        self.assertEqual(content.count(b'<list-item>'), 30)
+        self.assertIn(b'<title>Item 29</title>', content.split(b'<list-item>')[1])
+
+    def test_browsable_api_gets_a_plain_list(self):
+        response, _ = self.get('/api/orders?stream=all', HTTP_ACCEPT='text/html')
+        self.assertFalse(response.streaming)
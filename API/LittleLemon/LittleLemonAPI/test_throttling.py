@@ -0,0 +1,60 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .testing import reset_caches
+from .throttling import ThrottleStore
+
+
+class ThrottleStoreTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / 'throttle.sqlite3'
+        self.store = ThrottleStore(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_bucket_empties_and_refills(self):
+        results = [self.store.consume('anon_1', 3, 1.0, 100.0)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        self.assertFalse(self.store.consume('anon_1', 3, 1.0, 100.5)[0])
+        self.assertTrue(self.store.consume('anon_1', 3, 1.0, 101.5)[0])
+        self.assertTrue(self.store.consume('anon_2', 3, 1.0, 101.5)[0])
+
+    def test_bucket_never_exceeds_capacity(self):
+        self.store.consume('anon_1', 2, 1.0, 0.0)
+        results = [self.store.consume('anon_1', 2, 1.0, 1000.0)[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+    def test_processes_share_buckets(self):
+        # A second store on the same file stands in for another worker
+        other = ThrottleStore(self.path)
+        self.assertTrue(self.store.consume('anon_1', 2, 1.0, 10.0)[0])
+        self.assertTrue(other.consume('anon_1', 2, 1.0, 10.0)[0])
+        self.assertFalse(self.store.consume('anon_1', 2, 1.0, 10.0)[0])
+
+
+class ThrottleTest(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.client = APIClient()
+
+    def test_anonymous_rate(self):
+        for _ in range(10):
+            self.assertEqual(self.client.get('/api/menu-items').status_code, 200)
+        response = self.client.get('/api/menu-items')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 6)
+
+    def test_falls_back_to_the_cache_when_the_store_fails(self):
+        busy = sqlite3.OperationalError('database is locked')
+        with mock.patch.object(ThrottleStore, 'consume', side_effect=busy), \
+                self.assertLogs('LittleLemonAPI.throttling', 'WARNING'):
+            for _ in range(10):
+                self.assertEqual(self.client.get('/api/menu-items').status_code, 200)
+            response = self.client.get('/api/menu-items')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 60)
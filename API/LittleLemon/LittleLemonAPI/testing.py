@@ -0,0 +1,128 @@
+"""
+Little Lemon Test Helpers
+
+Shared assertions for the test modules of this app, and the test
+runner configured in settings.
+"""
+
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from django.core.cache import cache
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+from .authentication import token_cache
+from .query_budget import QueryRecorder, get_query_budget
+from .throttling import get_throttle_store
+
+
+def reset_caches():
+    """
+    Clears the default cache, cached tokens and throttle buckets
+    """
+    cache.clear()
+    token_cache.clear()
+    get_throttle_store().reset()
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the suite against a throwaway cache and throttle store
+
+    The configured ones are shared with any dev server on the host,
+    and `reset_caches` empties them before every test.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.scratch = Path(tempfile.mkdtemp(prefix='littlelemon-test-'))
+        self.scratch_settings = override_settings(**self.scratch_overrides())
+        self.scratch_settings.enable()
+
+    def scratch_overrides(self):
+        return {
+            'CACHES': {
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': self.scratch / 'cache',
+                },
+            },
+            'THROTTLE_STORE_PATH': self.scratch / 'throttle.sqlite3',
+        }
+
+    def teardown_test_environment(self, **kwargs):
+        self.scratch_settings.disable()
+        shutil.rmtree(self.scratch, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+
+def explain_query_plan(sql):
+    """
+    Returns the SQLite EXPLAIN QUERY PLAN detail lines for a statement
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTestMixin:
+    """
+    Fails a test when a query falls back to a full scan of a table
+
+    A plan step counts as a full scan when it reads the table without
+    an index (`SCAN <table>` on its own) or needs a temporary B-tree
+    to sort the result.
+    """
+
+    def capture_plans(self, table, func, *args, **kwargs):
+        """
+        Runs func and returns {sql: plan} for every query touching table
+        """
+        with CaptureQueriesContext(connection) as queries:
+            func(*args, **kwargs)
+        pattern = re.compile(rf'\b"?{re.escape(table)}"?\b')
+        return {
+            query['sql']: explain_query_plan(query['sql'])
+            for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and pattern.search(query['sql'])
+        }
+
+    def assertNoFullScan(self, table, plans):
+        self.assertTrue(plans, f'No queries touched {table}')
+        full_scan = re.compile(rf'^SCAN {re.escape(table)}$')
+        for sql, plan in plans.items():
+            for step in plan:
+                if full_scan.match(step) or step.startswith('USE TEMP B-TREE FOR ORDER BY'):
+                    self.fail(f'Full scan of {table} ({step}):\n{sql}\n' + '\n'.join(plan))
+
+
+class QueryBudgetTestMixin:
+    """
+    Fails a test when a view runs more queries than its query_budget
+
+        with self.assertQueryBudget(OrdersView, 'GET'):
+            self.client.get('/api/orders')
+
+    Views without a budget for the method fail too, so every route
+    exercised this way has to declare one.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, view_class, method):
+        budget = get_query_budget(view_class, method)
+        self.assertIsNotNone(budget, f'{view_class.__name__} declares no {method} query budget')
+        recorder = QueryRecorder()
+        with recorder.record():
+            yield recorder
+        if recorder.count > budget:
+            repeated = '\n'.join(
+                f'  {times}x {sql}' for sql, times in recorder.duplicates.items()
+            )
+            self.fail(
+                f'{view_class.__name__} {method} ran {recorder.count} queries, '
+                f'budget is {budget}\n' + '\n'.join(f'  {sql}' for sql, _ in recorder.statements)
+                + (f'\nRepeated statements:\n{repeated}' if repeated else '')
+            )
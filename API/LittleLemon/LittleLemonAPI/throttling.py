@@ -0,0 +1,148 @@
+"""
+Little Lemon Throttling
+
+Drop-in replacements for DRF's AnonRateThrottle and UserRateThrottle.
+DRF keeps a list of request timestamps per client in the default
+cache, which is a per-process LocMem cache here, so every gunicorn
+worker enforced its own limit and each check re-filtered the list.
+
+These throttles keep one token bucket per client in a small SQLite
+file (THROTTLE_STORE_PATH) that every worker process on the host
+opens. A rate of "10/minute" becomes a bucket of 10 tokens refilled
+at 10 per minute. Each check is a single UPSERT on the primary key:
+refill, take a token if one is there, report the result. That is
+constant time and atomic across processes.
+
+If the store cannot be reached in time (busy past its timeout, or
+broken) the check is logged and falls back to DRF's throttle on the
+default cache, so the limit still holds without failing the API.
+"""
+
+import logging
+import random
+import sqlite3
+import threading
+from django.conf import settings
+from rest_framework import throttling
+
+logger = logging.getLogger(__name__)
+
+PRUNE_AFTER = 24 * 60 * 60
+
+_CREATE = """
+CREATE TABLE IF NOT EXISTS throttle_bucket (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    stamp REAL NOT NULL,
+    allowed INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+# SET expressions all see the old row, so `allowed` is decided on
+# the refilled balance before this request's token is taken.
+_CONSUME = """
+INSERT INTO throttle_bucket (key, tokens, stamp, allowed)
+VALUES (:key, :capacity - 1, :now, 1)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = MIN(:capacity, tokens + MAX(0, :now - stamp) * :rate)
+             - (MIN(:capacity, tokens + MAX(0, :now - stamp) * :rate) >= 1),
+    stamp = MAX(stamp, :now),
+    allowed = MIN(:capacity, tokens + MAX(0, :now - stamp) * :rate) >= 1
+RETURNING allowed, tokens
+"""
+
+
+class ThrottleStore:
+    """
+    Token buckets in a SQLite file shared by all local processes
+
+    Each thread keeps its own connection. Buckets untouched for a
+    day are full again, so they are pruned now and then.
+    """
+
+    def __init__(self, path, timeout=0.05):
+        self.path = str(path)
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def connection(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = OFF')
+            db.execute(_CREATE)
+            self.local.db = db
+        return db
+
+    def consume(self, key, capacity, rate, now):
+        """
+        Takes a token from the bucket; returns (allowed, tokens left)
+        """
+        db = self.connection()
+        allowed, tokens = db.execute(
+            _CONSUME, {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        ).fetchone()
+        if random.random() < 0.001:
+            db.execute('DELETE FROM throttle_bucket WHERE stamp < ?', (now - PRUNE_AFTER,))
+        return bool(allowed), tokens
+
+    def reset(self):
+        self.connection().execute('DELETE FROM throttle_bucket')
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_throttle_store():
+    """
+    The store for the configured THROTTLE_STORE_PATH
+    """
+    path = str(getattr(settings, 'THROTTLE_STORE_PATH', settings.BASE_DIR / 'throttle.sqlite3'))
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, ThrottleStore(path))
+    return store
+
+
+class SharedRateThrottleMixin:
+    """
+    Replaces the cached history list with the shared token bucket
+    """
+    tokens = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        try:
+            allowed, self.tokens = get_throttle_store().consume(
+                self.key, self.num_requests, self.num_requests / self.duration, self.timer()
+            )
+        except sqlite3.Error:
+            logger.warning('Throttle store unavailable, using the cache for %s', self.key, exc_info=True)
+            return super().allow_request(request, view)
+        return allowed
+
+    def wait(self):
+        """
+        Seconds until the bucket holds a whole token again
+        """
+        if self.tokens is None:
+            # Denied by the cache fallback
+            return super().wait()
+        if self.tokens >= 1:
+            return None
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class AnonRateThrottle(SharedRateThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SharedRateThrottleMixin, throttling.UserRateThrottle):
+    pass
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('menu-categories', views.CategoriesView.as_view()),
@@ -8,9 +8,25 @@ urlpatterns = [
     path('cart/menu-items', views.CartView.as_view()),
     path('cart/menu-items/<int:pk>', views.CartView.as_view()),
     path('orders', views.OrdersView.as_view()),
+    path('orders/export.<str:fmt>', views.OrderExportView.as_view()),
+    path('orders/dispatch', views.DispatchView.as_view()),
+    path('orders/events', async_views.OrderEventsView.as_view()),
     path('orders/<int:pk>', views.OrderItemsView.as_view()),
     path('groups/manager/users', views.ManagerGroupView.as_view()),
     path('groups/manager/users/<int:pk>', views.ManagerGroupView.as_view()),
     path('groups/delivery-crew/users', views.DeliveryGroupView.as_view()),
     path('groups/delivery-crew/users/<int:pk>', views.DeliveryGroupView.as_view()),
+    path('reports/daily-sales', views.DailySalesReportView.as_view()),
+    path('reports/delivery-crew', views.CrewDeliveryReportView.as_view()),
+    path('reports/top-items', views.TopMenuItemsReportView.as_view()),
+]
+
+# Mounted ahead of `urlpatterns` for requests served under ASGI, see
+# `async_views`
+async_urlpatterns = [
+    path('menu-categories', async_views.CategoriesView.as_view()),
+    path('menu-items', async_views.MenuItemsListView.as_view()),
+    path('menu-items/<int:pk>', async_views.MenuItemView.as_view()),
+    path('cart/menu-items', async_views.CartView.as_view()),
+    path('orders', async_views.OrdersView.as_view()),
 ]
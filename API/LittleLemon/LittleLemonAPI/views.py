@@ -8,14 +8,34 @@ or part of the Manager group.
 Global AnonRateThrottle and UserRateThrottle are applied.
 """
 
+from datetime import date
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Sum
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.contrib.auth.models import User, Group
-from rest_framework import generics, status
+from django.contrib.auth.models import User
+from rest_framework import filters, generics, status
 from rest_framework.permissions import BasePermission, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
-from .models import Category, MenuItem, Cart, Order, OrderItem
-from .serializers import CategorySerializer, MenuItemSerializer, CartSerializer, OrderSerializer, OrderDetailSerializer, UserSerializer
+from rest_framework.exceptions import APIException, NotFound, ParseError, PermissionDenied
+from rest_framework.views import APIView
+from .models import Category, MenuItem, Cart, Order, OrderItem, ArchivedOrder, DailySales, CrewDeliveryStats, MenuItemSales
+from .serializers import CategorySerializer, MenuItemSerializer, CartSerializer, CartBatchSerializer, OrderSerializer, OrderDetailSerializer, UserSerializer
+from .serializers import category_rows, menu_item_rows, order_rows
+from .serializers import ArchivedOrderDetailSerializer, DispatchSerializer, MembershipSerializer, DailySalesSerializer, CrewDeliveryStatsSerializer, MenuItemSalesSerializer
+from .roles import MANAGER, DELIVERY_CREW, is_manager, is_delivery_crew
+from .menu_cache import CachedMenuMixin
+from .pagination import SelectablePaginationMixin, OrderCursorPagination, MenuItemCursorPagination
+from .dispatch import apply_assignments, assign_least_loaded, crew_loads
+from .events import ASSIGNED, CREATED, STATUS, order_event, record_events
+from .export import CONTENT_TYPES, STREAMS, export_rows
+from .memberships import ALREADY_MEMBER, NOT_FOUND, add_members, remove_members, remove_user_ids
+from .reporting import record_delivery, record_order
+from .row_serializers import RowListMixin
+from .search import MenuSearchFilter
+from .streaming import StreamingListMixin
 
 
 class IsManagerOrAdminUser(BasePermission):
@@ -36,8 +56,7 @@ class IsManagerOrAdminUser(BasePermission):
         `permission_classes = [IsManagerUser | IsAdminUser]`
         """
         user = request.user
-        is_manager = user.groups.filter(name='Manager').exists()
-        return user.is_authenticated and (user.is_staff or is_manager)
+        return user.is_authenticated and (user.is_staff or is_manager(user))
 
 
 class IsDeliveryCrewUser(BasePermission):
@@ -46,13 +65,50 @@ class IsDeliveryCrewUser(BasePermission):
     """
     def has_permission(self, request, view):
         user = request.user
-        is_delivery_crew = user.groups.filter(name='Delivery Crew').exists()
-        return user.is_authenticated and is_delivery_crew
+        return user.is_authenticated and is_delivery_crew(user)
 
 
-class CategoriesView(generics.ListCreateAPIView):
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The resource was changed by another request.'
+    default_code = 'conflict'
+
+
+def filter_date_range(queryset, query_params):
+    """
+    Applies the `?from=YYYY-MM-DD&to=YYYY-MM-DD` bounds on `date`
+    """
+    bounds = {'from': 'date__gte', 'to': 'date__lte'}
+    for param, lookup in bounds.items():
+        value = query_params.get(param)
+        if value:
+            try:
+                queryset = queryset.filter(**{lookup: date.fromisoformat(value)})
+            except ValueError:
+                raise ParseError(f"'{param}' must be a YYYY-MM-DD date")
+    return queryset
+
+
+class EagerLoadingViewMixin:
+    """
+    Applies the serializer's select/prefetch related declarations
+
+    `filter_queryset` is used by both `list` and `get_object`, so
+    hooking it covers views that override `get_queryset`.
+    """
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
+
+
+class CategoriesView(CachedMenuMixin, StreamingListMixin, RowListMixin, generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    row_serializer = category_rows
+    query_budget = {'GET': 2, 'POST': 3}
     search_fields = ['title']
 
     def get_permissions(self):
@@ -62,9 +118,13 @@ class CategoriesView(generics.ListCreateAPIView):
             return []
 
 
-class MenuItemsListView(generics.ListCreateAPIView):
+class MenuItemsListView(CachedMenuMixin, StreamingListMixin, RowListMixin, EagerLoadingViewMixin, SelectablePaginationMixin, generics.ListCreateAPIView):
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
+    row_serializer = menu_item_rows
+    cursor_pagination_class = MenuItemCursorPagination
+    query_budget = {'GET': 2, 'POST': 4}
+    filter_backends = [filters.OrderingFilter, MenuSearchFilter]
     ordering_fields = ['price']
     filterset_fields = ['price']
     search_fields = ['title', 'category__title']
@@ -83,9 +143,10 @@ class MenuItemsListView(generics.ListCreateAPIView):
         return queryset
 
 
-class MenuItemView(generics.RetrieveUpdateDestroyAPIView):
+class MenuItemView(CachedMenuMixin, EagerLoadingViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
+    query_budget = {'GET': 1, 'PUT': 5, 'PATCH': 5, 'DELETE': 8}
 
     def get_permissions(self):
         if self.request.method != 'GET':
@@ -94,17 +155,30 @@ class MenuItemView(generics.RetrieveUpdateDestroyAPIView):
             return []
 
 
-class CartView(generics.ListCreateAPIView):
+class CartView(EagerLoadingViewMixin, generics.ListCreateAPIView):
     """
     View your Cart
+
+    POSTing a list of {menuitem, quantity} objects instead of a
+    single object upserts all of them at once.
     """
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'GET': 3, 'POST': 4, 'DELETE': 2}
 
     def get_queryset(self):
         user = self.request.user
         return Cart.objects.filter(user=user)
 
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        batch = CartBatchSerializer(data=request.data, context=self.get_serializer_context())
+        batch.is_valid(raise_exception=True)
+        cart = batch.save()
+        serializer = self.get_serializer(cart, many=True)
+        return Response(serializer.data, status.HTTP_201_CREATED)
+
     def delete(self, request, *args, **kwargs):
         Cart.objects.all().filter(user=request.user).delete()
         return Response("Cart emptied", status.HTTP_204_NO_CONTENT)
@@ -119,14 +193,18 @@ class CartDeleteView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated]
 
 
-class OrdersView(generics.ListCreateAPIView):
+class OrdersView(StreamingListMixin, RowListMixin, SelectablePaginationMixin, generics.ListCreateAPIView):
     serializer_class = OrderSerializer
+    row_serializer = order_rows
+    cursor_pagination_class = OrderCursorPagination
+    ordering = ['-date', '-id']
+    query_budget = {'GET': 4, 'POST': 11}
 
     def get_queryset(self):
         user = self.request.user
-        if user.groups.filter(name='Manager').exists():
+        if is_manager(user):
             return Order.objects.all()
-        elif user.groups.filter(name='Delivery Crew').exists():
+        elif is_delivery_crew(user):
             return Order.objects.filter(delivery_crew=user)
         else:
             return Order.objects.filter(user=user)
@@ -145,32 +223,84 @@ class OrdersView(generics.ListCreateAPIView):
         return [permission() for permission in permission_classes]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
-        order = serializer.instance
-        cart = Cart.objects.filter(user=self.request.user)
-        items = [create_order_item(order, item) for item in cart]
-        order.total = sum(item.price for item in items)
-        order.save()
-        cart.delete()
+        """
+        Checkout the user's Cart into a new Order
+
+        Runs as a single transaction whose query count does not
+        depend on the size of the cart: lock the cart lines, total
+        them in the database, insert the Order and all of its
+        OrderItems in one bulk statement, empty the cart, add the
+        order to the sales summaries and publish its event.
+        """
+        user = self.request.user
+        with transaction.atomic():
+            cart = Cart.objects.filter(user=user)
+            lines = list(
+                cart.select_for_update()
+                .values_list('menuitem_id', 'quantity', 'unit_price', 'price')
+            )
+            total = cart.aggregate(total=Sum('price'))['total'] or Decimal('0')
+            order = serializer.save(user=user, total=total, date=date.today())
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    menuitem_id=menuitem_id,
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    price=price)
+                for menuitem_id, quantity, unit_price, price in lines
+            ])
+            cart.delete()
+            record_order(order, [
+                (menuitem_id, quantity, price) for menuitem_id, quantity, _, price in lines
+            ])
+            record_events([order_event(order, CREATED)])
     
 
 
-class OrderItemsView(generics.RetrieveUpdateDestroyAPIView):
+class OrderItemsView(EagerLoadingViewMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = OrderDetailSerializer
     allowed_methods = ['GET']
+    query_budget = {'GET': 5, 'PUT': 8, 'PATCH': 8, 'DELETE': 13}
 
     def get_queryset(self):
         user = self.request.user
         order = self.kwargs['pk']
-        if user.groups.filter(name='Manager').exists():
+        if is_manager(user):
             return Order.objects.filter(pk=order)
-        elif user.groups.filter(name='Delivery Crew').exists():
+        elif is_delivery_crew(user):
             return Order.objects.filter(pk=order, delivery_crew=user)
         elif Order.objects.filter(user=user, id=order).exists():
-            return Order.objects.fitler(pk=order)
+            return Order.objects.filter(pk=order)
         
         raise PermissionDenied("You are not allowed to access this order")
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Order with its items, read from the archive once archived
+        """
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except (Http404, PermissionDenied):
+            archived = self.get_archived_order()
+            if archived is None:
+                raise
+        return Response(ArchivedOrderDetailSerializer(archived).data)
+
+    def get_archived_order(self):
+        """
+        The archived order, if the user may see it (see `archive`)
+        """
+        user = self.request.user
+        orders = ArchivedOrder.objects.filter(pk=self.kwargs['pk'])
+        if is_manager(user):
+            pass
+        elif is_delivery_crew(user):
+            orders = orders.filter(delivery_crew=user)
+        else:
+            orders = orders.filter(user=user)
+        return ArchivedOrderDetailSerializer.setup_eager_loading(orders).first()
+
     def update(self, request, *args, **kwargs):
         """
         Modify Order
@@ -181,135 +311,249 @@ class OrderItemsView(generics.RetrieveUpdateDestroyAPIView):
         """
         order = self.get_object()
         user = self.request.user
-        if user.groups.filter(name='Manager').exists():
+        if is_manager(user):
             delivery_crew = request.data.get('delivery_crew')
             if delivery_crew is None:
                 return Response({'detail': 'Delivery Crew was not provided'}, status.HTTP_400_BAD_REQUEST)
             try:
-                delivery_crew = User.objects.get(username=delivery_crew, groups__name='Delivery Crew')
-                order.delivery_crew = delivery_crew
-                order.save()
-                serializer = self.get_serializer(order)
-                return Response(serializer.data)
+                delivery_crew = User.objects.get(username=delivery_crew, groups__name=DELIVERY_CREW)
             except User.DoesNotExist:
                 return Response({'detail': 'Invalid delivery crew'}, status=status.HTTP_400_BAD_REQUEST)
-        elif user.groups.filter(name='Delivery Crew').exists():
+            self.compare_and_set(order, delivery_crew=delivery_crew)
+            serializer = self.get_serializer(order)
+            return Response(serializer.data)
+        elif is_delivery_crew(user):
             status_value = request.data.get('status')
             if status_value is None:
                 return Response({'detail': 'Order status not provided'}, status=status.HTTP_400_BAD_REQUEST)
-            order.status = status_value
-            order.save()
+            try:
+                status_value = Order._meta.get_field('status').to_python(status_value)
+            except ValidationError:
+                return Response({'detail': 'Invalid order status'}, status=status.HTTP_400_BAD_REQUEST)
+            self.compare_and_set(order, status=status_value)
             serializer = self.get_serializer(order)
             return Response(serializer.data)
         
         raise PermissionDenied("You are not allowed to modify this order.")
 
+    def compare_and_set(self, order, **changes):
+        """
+        Write `changes` only if the order is still as it was read
+
+        A single UPDATE conditioned on the delivery crew and status
+        that were loaded, so a concurrent assignment or status change
+        is never overwritten: the request fails with 409 instead.
+        An actual change is published as an order event.
+        """
+        before = (order.delivery_crew_id, order.status)
+        with transaction.atomic():
+            updated = (
+                Order.objects
+                .filter(pk=order.pk, delivery_crew_id=before[0], status=before[1])
+                .update(**changes)
+            )
+            if not updated:
+                raise Conflict('The order was changed by another request, reload it and try again.')
+            for field, value in changes.items():
+                setattr(order, field, value)
+            after = (order.delivery_crew_id, order.status)
+            record_delivery(before, after)
+            if after[0] != before[0]:
+                record_events([order_event(order, ASSIGNED)])
+            elif after[1] != before[1]:
+                record_events([order_event(order, STATUS)])
+
+    def perform_destroy(self, instance):
+        """
+        Delete the Order and take it out of the sales summaries
+        """
+        with transaction.atomic():
+            lines = [
+                (item.menuitem_id, item.quantity, item.price)
+                for item in instance.orderitem_set.all()
+            ]
+            instance.delete()
+            record_order(instance, lines, sign=-1)
+
 
 
-class ManagerGroupView(generics.ListCreateAPIView, generics.DestroyAPIView):
+class OrderExportView(APIView):
     """
-    Handles adding and removing users from Manager group
+    Stream all orders with their items as CSV or NDJSON
+
+    `/api/orders/export.csv` or `/api/orders/export.ndjson`, optionally
+    narrowed with `?from=YYYY-MM-DD&to=YYYY-MM-DD`.
+    """
+    permission_classes = [IsManagerOrAdminUser]
+    query_budget = {'GET': 3}
+
+    def get(self, request, fmt):
+        if fmt not in STREAMS:
+            raise NotFound(f"Orders can be exported as {', '.join(STREAMS)}")
+        rows = export_rows(filter_date_range(Order.objects.all(), request.query_params))
+        response = StreamingHttpResponse(STREAMS[fmt](rows), content_type=CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="orders.{fmt}"'
+        return response
+
+
+class DispatchView(generics.GenericAPIView):
+    """
+    Assign a batch of unassigned orders to the Delivery Crew
+
+    Orders go to the least loaded crew members, by open order count,
+    in one transaction with a single UPDATE. Orders that are assigned,
+    delivered or unknown are skipped.
     """
-    queryset = User.objects.filter(groups__name='Manager')
+    serializer_class = DispatchSerializer
+    permission_classes = [IsManagerOrAdminUser]
+    query_budget = {'POST': 8}
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = serializer.validated_data.get('orders')
+
+        with transaction.atomic():
+            orders = Order.objects.select_for_update().filter(delivery_crew__isnull=True, status=False)
+            if requested is not None:
+                orders = orders.filter(pk__in=requested)
+            customers = dict(
+                orders.order_by('date', 'id')
+                .values_list('pk', 'user_id')[:serializer.validated_data['limit']]
+            )
+            loads = crew_loads()
+            if not loads:
+                return Response({'detail': 'There is no Delivery Crew to dispatch to'}, status.HTTP_400_BAD_REQUEST)
+            assignments = assign_least_loaded(customers, loads)
+            if apply_assignments(assignments) != len(assignments):
+                raise Conflict('Some orders were assigned by another request, nothing was dispatched.')
+            record_events([
+                order_event(Order(pk=order_id, user_id=customers[order_id], delivery_crew_id=crew_id), ASSIGNED)
+                for order_id, crew_id in assignments.items()
+            ])
+
+        return Response({
+            'assigned': [
+                {'order': order_id, 'delivery_crew': crew_id}
+                for order_id, crew_id in assignments.items()
+            ],
+            'skipped': sorted(set(requested or ()) - set(assignments)),
+        })
+
+
+class GroupMembershipView(generics.ListCreateAPIView, generics.DestroyAPIView):
+    """
+    Lists, adds and removes the members of `group_name`
+
+    POST {"username": ...} adds one user and DELETE on `<int:pk>`
+    removes one. POST or DELETE {"usernames": [...]} on the list
+    changes a batch at once (see `memberships`) and answers with
+    the result for each username.
+    """
+    group_name = None
+    member_label = None
+    group_label = None
     serializer_class = UserSerializer
     permission_classes = [IsManagerOrAdminUser]
+    query_budget = {'GET': 4, 'POST': 5, 'DELETE': 4}
+
+    def get_queryset(self):
+        return User.objects.filter(groups__name=self.group_name).order_by('id')
+
+    def get_membership(self):
+        serializer = MembershipSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def report(self, results):
+        return Response({
+            'results': [{'username': username, 'result': result} for username, result in results.items()]
+        })
 
     def post(self, request, *args, **kwargs):
         """
-        Adds user to Manager group by username in POST
+        Adds users to the group by username in POST
         """
-        username = self.request.data.get('username')
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            return Response(
-                f"User {username} does not exist",
-                status.HTTP_404_NOT_FOUND
-            )
-        
-        if user.groups.filter(name='Manager').exists():
-            return Response(
-                f"User {user} is already a Manager",
-                status.HTTP_200_OK
-            )
-        
-        managers = Group.objects.get(name='Manager')
-        managers.user_set.add(user)
-        print(managers)
-        print(type(managers))
-        return Response(
-            f'User {user} added to Managers',
-            status.HTTP_201_CREATED
-        )
+        membership = self.get_membership()
+        if 'usernames' in membership:
+            return self.report(add_members(self.group_name, membership['usernames']))
+
+        username = membership['username']
+        result = add_members(self.group_name, [username])[username]
+        if result == NOT_FOUND:
+            return Response(f"User {username} does not exist", status.HTTP_404_NOT_FOUND)
+        if result == ALREADY_MEMBER:
+            return Response(f"User {username} is already {self.member_label}", status.HTTP_200_OK)
+        return Response(f'User {username} added to {self.group_label}', status.HTTP_201_CREATED)
 
     def delete(self, request, *args, **kwargs):
         """
-        Removes user from Manager group based on <int:pk> URI
+        Removes a user from the group based on <int:pk> URI, or a batch
+        by username
         """
+        if 'pk' not in kwargs:
+            membership = self.get_membership()
+            usernames = membership.get('usernames') or [membership['username']]
+            return self.report(remove_members(self.group_name, usernames))
+
         user = self.get_object()  # Retrieve user based on URL pk
-        managers = Group.objects.get(name='Manager')
-        managers.user_set.remove(user)
+        remove_user_ids(self.group_name, [user.pk])
         return Response(
-            f'User {user} removed from Managers',
+            f'User {user} removed from {self.group_label}',
             status.HTTP_204_NO_CONTENT
         )
 
 
-class DeliveryGroupView(generics.ListCreateAPIView, generics.DestroyAPIView):
+class ManagerGroupView(GroupMembershipView):
+    """
+    Handles adding and removing users from Manager group
+    """
+    group_name = MANAGER
+    member_label = 'a Manager'
+    group_label = 'Managers'
+
+
+class DeliveryGroupView(GroupMembershipView):
     """
     Handles adding and removing users from Delivery group
     """
-    queryset = User.objects.filter(groups__name='Delivery Crew')
-    serializer_class = UserSerializer
+    group_name = DELIVERY_CREW
+    member_label = 'in Delivery Crew'
+    group_label = 'Delivery Crew'
+
+
+class DailySalesReportView(generics.ListAPIView):
+    """
+    Orders and revenue per day, newest first
+
+    Narrow the range with `?from=YYYY-MM-DD&to=YYYY-MM-DD`.
+    """
+    serializer_class = DailySalesSerializer
     permission_classes = [IsManagerOrAdminUser]
+    filter_backends = []
+    query_budget = {'GET': 4}
 
-    def post(self, request, *args, **kwargs):
-        """
-        Adds user to Delivery group by username in POST
-        """
-        username = self.request.data.get('username')
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            return Response(
-                f"User {username} does not exist",
-                status.HTTP_404_NOT_FOUND
-            )
+    def get_queryset(self):
+        return filter_date_range(DailySales.objects.order_by('-date'), self.request.query_params)
 
-        if user.groups.filter(name='Delivery Crew').exists():
-            return Response(
-                f"User {user} is already in Delivery Crew",
-                status.HTTP_200_OK
-            )
-        
-        managers = Group.objects.get(name='Delivery Crew')
-        managers.user_set.add(user)
-        print(managers)
-        print(type(managers))
-        return Response(
-            f'User {user} added to Delivery Crew',
-            status.HTTP_201_CREATED
-        )
 
-    def delete(self, request, *args, **kwargs):
-        """
-        Removes user from Delivery group based on <int:pk> URI
-        """
-        user = self.get_object()  # Retrieve user based on URL pk
-        managers = Group.objects.get(name='Delivery Crew')
-        managers.user_set.remove(user)
-        return Response(
-            f'User {user} removed from Delivery Crew',
-            status.HTTP_204_NO_CONTENT
-        )
+class CrewDeliveryReportView(EagerLoadingViewMixin, generics.ListAPIView):
+    """
+    Orders assigned to, delivered by and still open for each crew member
+    """
+    queryset = CrewDeliveryStats.objects.order_by('-assigned', 'crew_id')
+    serializer_class = CrewDeliveryStatsSerializer
+    permission_classes = [IsManagerOrAdminUser]
+    filter_backends = []
+    query_budget = {'GET': 4}
 
 
-def create_order_item(order, item):
-    order_item = OrderItem.objects.create(
-            order=order,
-            menuitem=item.menuitem,
-            quantity = item.quantity,
-            unit_price = item.unit_price,
-            price = item.price)
-    order_item.save()
-    return order_item
\ No newline at end of file
+class TopMenuItemsReportView(EagerLoadingViewMixin, generics.ListAPIView):
+    """
+    Menu items by quantity sold, best sellers first
+    """
+    queryset = MenuItemSales.objects.order_by('-quantity', 'menuitem_id')
+    serializer_class = MenuItemSalesSerializer
+    permission_classes = [IsManagerOrAdminUser]
+    filter_backends = []
+    query_budget = {'GET': 4}